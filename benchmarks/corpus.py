@@ -0,0 +1,154 @@
+"""Seeded generator of synthetic RIS-like bibliographic records."""
+import random
+import string
+
+# punctuation added to or removed from noisy titles
+PUNCTUATION = ".,:;!?-"
+
+
+def generate_words(rng: random.Random, count: int) -> list[str]:
+    """Generate a vocabulary of pseudo words.
+
+    Args:
+        rng (random.Random): Random number generator.
+        count (int): Number of words.
+
+    Returns:
+        list[str]: Words.
+    """
+    words = set()
+    while len(words) < count:
+        length = rng.randint(3, 12)
+        words.add("".join(rng.choices(string.ascii_lowercase, k=length)))
+    return sorted(words)
+
+
+def add_typos(rng: random.Random, text: str, count: int) -> str:
+    """Add typos to text by substituting, deleting, inserting or swapping characters.
+
+    Args:
+        rng (random.Random): Random number generator.
+        text (str): Text.
+        count (int): Number of typos.
+
+    Returns:
+        str: Text with typos.
+    """
+    chars = list(text)
+    for _ in range(count):
+        if len(chars) < 2:
+            break
+        index = rng.randrange(len(chars) - 1)
+        operation = rng.randrange(4)
+        if operation == 0:
+            chars[index] = rng.choice(string.ascii_lowercase)
+        elif operation == 1:
+            del chars[index]
+        elif operation == 2:
+            chars.insert(index, rng.choice(string.ascii_lowercase))
+        else:
+            chars[index], chars[index + 1] = chars[index + 1], chars[index]
+    return "".join(chars)
+
+
+def add_noise(rng: random.Random, title: str) -> str:
+    """Add typo, case and punctuation noise to a title.
+
+    Args:
+        rng (random.Random): Random number generator.
+        title (str): Title.
+
+    Returns:
+        str: Noisy title.
+    """
+    title = add_typos(rng, title, rng.choice([0, 0, 1, 1, 2, 3]))
+    case = rng.randrange(4)
+    if case == 0:
+        title = title.upper()
+    elif case == 1:
+        title = title.lower()
+    if rng.random() < 0.3:
+        title = title.rstrip(PUNCTUATION) if title[-1:] in PUNCTUATION else title + "."
+    if rng.random() < 0.2:
+        index = rng.randrange(len(title) + 1)
+        title = title[:index] + rng.choice(PUNCTUATION) + title[index:]
+    return title
+
+
+def get_cluster_size(rng: random.Random, duplicate_rate: float, max_cluster_size: int) -> int:
+    """Get the size of a cluster of duplicates.
+
+    Clusters beyond the original record follow a power law distribution,
+    so most duplicated records have a single duplicate.
+
+    Args:
+        rng (random.Random): Random number generator.
+        duplicate_rate (float): Fraction of clusters with duplicates.
+        max_cluster_size (int): Maximum number of records in a cluster.
+
+    Returns:
+        int: Number of records in the cluster.
+    """
+    if max_cluster_size < 2 or rng.random() >= duplicate_rate:
+        return 1
+    sizes = range(2, max_cluster_size + 1)
+    return rng.choices(sizes, weights=[1 / (size - 1) ** 2 for size in sizes])[0]
+
+
+def generate_corpus(
+    size: int,
+    duplicate_rate: float = 0.2,
+    max_cluster_size: int = 5,
+    seed: int = 0,
+) -> list[dict]:
+    """Generate RIS-like records, with clusters of noisy duplicates.
+
+    Each record has the rispy fields id, title, abstract, year, authors and doi.
+    The cluster of each record is stored in custom1, as the ground truth.
+    Duplicates keep the id of their original about half of the time,
+    and have typo, case and punctuation noise added to their title.
+
+    Args:
+        size (int): Number of records.
+        duplicate_rate (float): Fraction of clusters with duplicates.
+        max_cluster_size (int): Maximum number of records in a cluster.
+        seed (int): Random seed; the same seed always generates the same records.
+
+    Returns:
+        list[dict]: Records, in random order.
+    """
+    rng = random.Random(seed)
+    words = generate_words(rng, 5000)
+    surnames = [word.capitalize() for word in generate_words(rng, 2000)]
+    records = []
+    cluster = 0
+    while len(records) < size:
+        title = " ".join(rng.choices(words, k=rng.randint(6, 14))).capitalize()
+        original = {
+            "id": f"R{cluster}",
+            "title": title,
+            "abstract": " ".join(rng.choices(words, k=rng.randint(50, 150))).capitalize() + ".",
+            "year": str(rng.randint(1990, 2024)),
+            "authors": [
+                f"{rng.choice(surnames)}, {rng.choice(string.ascii_uppercase)}."
+                for _ in range(rng.randint(1, 6))
+            ],
+            "doi": f"10.{rng.randint(1000, 9999)}/{cluster}",
+            "custom1": str(cluster),
+        }
+        records.append(original)
+        for index in range(1, get_cluster_size(rng, duplicate_rate, max_cluster_size)):
+            if len(records) >= size:
+                break
+            duplicate = dict(original, title=add_noise(rng, title))
+            if rng.random() < 0.5:
+                duplicate["id"] = f"R{cluster}-{index}"
+            if rng.random() < 0.2:
+                # some sources truncate abstracts
+                duplicate["abstract"] = original["abstract"][: rng.randint(100, 300)]
+            if rng.random() < 0.3:
+                duplicate["doi"] = None
+            records.append(duplicate)
+        cluster += 1
+    rng.shuffle(records)
+    return records
@@ -0,0 +1,135 @@
+"""Benchmark dedupe modules and dedupers on synthetic corpora.
+
+Each benchmark reports its wall time, peak traced memory, the number of
+fuzzy comparisons performed and the statistics of each module, and results are written to a JSON file so
+they can be compared between versions. For example:
+
+    python benchmarks/run.py --sizes 1000 10000 --output bench.json
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+from corpus import generate_corpus
+
+import deduper
+from deduper import blocking, dedupe
+from deduper.app.constants import DEDUPER_MAP
+from deduper.observers import StatsCollector
+
+MODULES = {
+    "unique_id": dedupe.UniqueDedupe(fields=["id"]),
+    "unique_id_doi": dedupe.UniqueDedupe(fields=["id", "doi"]),
+    "unique_together_id_year": dedupe.UniqueTogetherDedupe(fields=["id", "year"]),
+    "normalized_title": dedupe.NormalizedDedupe(fields=["title"]),
+    "fuzzy_title": dedupe.FuzzyDedupe(field="title", threshold=90),
+    "fuzzy_title_vectorized": dedupe.FuzzyDedupe(field="title", threshold=90, vectorized=True),
+    "fuzzy_title_blocked": dedupe.FuzzyDedupe(
+        field="title", threshold=90, blockers=[blocking.TokenBlocker(min_length=4, prefix=3)]
+    ),
+    "minhash_abstract": dedupe.MinHashDedupe(field="abstract", threshold=0.5),
+    "tfidf_title": dedupe.TfidfDedupe(field="title", threshold=0.8),
+}
+
+
+def measure(deduper_: type[dedupe.Deduper], records: list[dict]) -> dict[str, Any]:
+    """Measure a deduper.
+
+    The deduper is run twice, once with a StatsCollector for time and comparisons,
+    and once for peak memory, since tracing memory slows it down.
+
+    Args:
+        deduper_ (type[dedupe.Deduper]): Deduper.
+        records (list[dict]): Records.
+
+    Returns:
+        dict[str, Any]: Measurements.
+    """
+    collector = StatsCollector()
+    start = time.perf_counter()
+    groups = deduper_.get_duplicates(records, observer=collector)
+    seconds = time.perf_counter() - start
+    tracemalloc.start()
+    try:
+        deduper_.get_duplicates(records)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        "seconds": round(seconds, 6),
+        "peak_memory_bytes": peak,
+        "comparisons": sum(stats.counts["comparisons"] for stats in collector.stats),
+        "groups": len(groups),
+        "modules": collector.to_list(),
+    }
+
+
+def run_benchmarks(sizes: list[int], seed: int, duplicate_rate: float, max_cost: float) -> list:
+    """Run every benchmark at every corpus size.
+
+    Benchmarks whose first module is estimated to cost more than
+    max_cost on the whole corpus are skipped.
+
+    Args:
+        sizes (list[int]): Corpus sizes.
+        seed (int): Corpus seed.
+        duplicate_rate (float): Fraction of clusters with duplicates.
+        max_cost (float): Maximum estimated cost of a benchmark.
+
+    Returns:
+        list: Results.
+    """
+    results = []
+    for size in sizes:
+        records = generate_corpus(size, duplicate_rate=duplicate_rate, seed=seed)
+        # standalone modules are run as single module dedupers
+        benchmarks = [
+            ("module", name, type(name, (dedupe.Deduper,), {"modules": [module]}))
+            for name, module in MODULES.items()
+        ] + [("deduper", name, deduper_) for name, deduper_ in DEDUPER_MAP.items()]
+        for kind, name, deduper_ in benchmarks:
+            result = {"kind": kind, "name": name, "size": size}
+            if deduper_.modules[0].estimate_cost(size) > max_cost:
+                result["skipped"] = True
+            else:
+                result.update(measure(deduper_, records))
+            results.append(result)
+            sys.stdout.write(json.dumps(result) + "\n")
+    return results
+
+
+def main():
+    """Run benchmarks and write their results to a JSON file."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000, 1_000_000])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--duplicate-rate", type=float, default=0.2)
+    parser.add_argument(
+        "--max-cost",
+        type=float,
+        default=1e7,
+        help="skip benchmarks estimated to cost more, such as unblocked fuzzy matching",
+    )
+    parser.add_argument("--output", type=Path, default=Path("bench_results.json"))
+    args = parser.parse_args()
+    results = run_benchmarks(args.sizes, args.seed, args.duplicate_rate, args.max_cost)
+    data = {
+        "version": deduper.__version__,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "created": datetime.now(UTC).isoformat(),
+        "seed": args.seed,
+        "duplicate_rate": args.duplicate_rate,
+        "results": results,
+    }
+    args.output.write_text(json.dumps(data, indent=2))
+
+
+if __name__ == "__main__":
+    main()
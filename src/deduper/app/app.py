@@ -1,10 +1,12 @@
 from shiny import reactive, req
 from shiny.express import input, render, ui
 from shiny import ui as core_ui
-import rispy
-from deduper.app.constants import DEDUPER_MAP, PAGE_SIZE, ANNOTATE_CHOICES
-import pandas as pd
-import io
+from deduper.app.cards import get_card_key, render_card
+from deduper.app.compute import executor, get_duplicates
+from deduper.app.constants import DEDUPER_MAP, PAGE_SIZE, PAGE_SIZES
+from deduper.app.export import ANNOTATED_COLUMNS, COLUMNS, FORMATS, iter_rows, stream_export
+from deduper.observers import ProgressObserver
+import asyncio
 import math
 from deduper.app.icons import question_circle_fill
 
@@ -17,7 +19,13 @@ from deduper.app.icons import question_circle_fill
 
 
 annotations = reactive.value([])
+progress_observer = reactive.value(None)
 page = reactive.value(1)
+# group indexes whose long fields are shown in full
+expanded = reactive.value(frozenset())
+# key of the card shown in each slot of the page, so only changed cards are sent
+shown_cards = {}
+shown_results = [None]
 
 ID_URL_MAP ={
 "---":None,
@@ -37,64 +45,111 @@ core_ui.card(
         ),
     core_ui.card_footer(
         core_ui.row(
-            core_ui.column(4,ui.input_action_button("compute", "Compute!")),
-            core_ui.column(4,ui.div(id="download_container")),
-            core_ui.column(4,ui.div(id="annotate_container")),
+            core_ui.column(3,ui.input_action_button("compute", "Compute!")),
+            core_ui.column(3,ui.div(id="download_container")),
+            core_ui.column(3,ui.div(id="annotate_container")),
+            core_ui.column(3,ui.input_select("page_size","Groups per page",{str(size):str(size) for size in PAGE_SIZES},selected=str(PAGE_SIZE))),
         )
     )
 )
 
-@reactive.calc
-def records():
-    file = req(input["file"]())
-    with open(file[0]["datapath"], 'r', errors="ignore") as f:
-        return rispy.load(f)
+@render.ui
+def compute_progress():
+    observer = progress_observer()
+    if observer is None or compute_task.status() != "running":
+        return None
+    # poll the background run for progress
+    reactive.invalidate_later(0.5)
+    percent = round(observer.progress*100)
+    bar = ui.div({"class":"progress-bar","role":"progressbar","style":f"width: {percent}%"},f"{percent}%")
+    return core_ui.card(
+        core_ui.row(
+            core_ui.column(8,ui.div({"class":"progress mb-2"},bar),ui.div(observer.message)),
+            core_ui.column(4,ui.input_action_button("cancel","Cancel")),
+        )
+    )
 
 @reactive.calc
 def deduper():
     deduper_selection = req(input["deduper_select"]())
     return DEDUPER_MAP[deduper_selection]
 
-@reactive.calc
+# dedupe runs in a background thread, so the session stays responsive
+@reactive.extended_task
+async def compute_task(path,deduper_,observer):
+    loop = asyncio.get_running_loop()
+    # the file is hashed in the executor too, before the cache lookup
+    return await loop.run_in_executor(executor,get_duplicates,path,deduper_,observer)
+
+@reactive.effect
 @reactive.event(input["compute"])
+def start_compute():
+    file = req(input["file"]())
+    # a new run replaces the current one
+    cancel_compute()
+    observer = ProgressObserver(len(deduper().modules))
+    progress_observer.set(observer)
+    compute_task(file[0]["datapath"],deduper(),observer)
+
+def cancel_compute():
+    with reactive.isolate():
+        observer = progress_observer()
+    if observer is not None:
+        # the run stops at its next progress report
+        observer.cancel()
+    compute_task.cancel()
+
+@reactive.effect
+@reactive.event(input["cancel"])
+def cancel():
+    cancel_compute()
+
+@reactive.calc
 def results():
-    return deduper().get_duplicates(records())
+    return compute_task.result()
+
+@reactive.calc
+def page_size():
+    return int(input["page_size"]())
 
 @reactive.calc
 def results_slice():
-    start = (page()-1)*PAGE_SIZE
-    end = page()*PAGE_SIZE
+    start = (page()-1)*page_size()
+    end = page()*page_size()
     return results()[start:end]
 
 @reactive.calc
 def annotations_slice():
-    start = (page()-1)*PAGE_SIZE
-    end = page()*PAGE_SIZE
+    start = (page()-1)*page_size()
+    end = page()*page_size()
     return annotations()[start:end]
 
 @reactive.effect
 def set_annotations():
-    annotations.set([0]*len(records()))
+    annotations.set([0]*len(results()))
+    expanded.set(frozenset())
+
+@reactive.effect
+@reactive.event(page_size)
+def reset_page():
+    page.set(1)
 
 ui.div(id="pagination_container_0")
 
 ui.div(id="results_container")
+ui.div(id="results_empty")
 
+def export_filename():
+    return f"duplicate_results.{FORMATS[input['export_format']()][1]}"
+
+# exports are streamed to the client as they are written
 def download_results():
-    req(records())    
-    results = deduper().get_duplicates(records())
-    export = [{"duplicate_group":i, "id":record["id"]} for i,group in enumerate(results) for record in group]
-    with io.BytesIO() as buf:
-        pd.DataFrame(export).to_excel(buf,index=False)
-        yield buf.getvalue()
+    rows = iter_rows(compute_task.result())
+    yield from stream_export(rows,COLUMNS,input["export_format"]())
 
 def download_annotated_results():
-    req(records())    
-    results = deduper().get_duplicates(records())
-    export = [{"duplicate_group":i, "id":record["id"], "resolution":ANNOTATE_CHOICES.get(annotations()[i],"Duplicate identified"), "resolved_id":record["id"] if annotations()[i] < len(ANNOTATE_CHOICES) else group[annotations()[i]-len(ANNOTATE_CHOICES)]["id"]} for i,group in enumerate(results) for record in group]
-    with io.BytesIO() as buf:
-        pd.DataFrame(export).to_excel(buf,index=False)
-        yield buf.getvalue()
+    rows = iter_rows(compute_task.result(),list(annotations()))
+    yield from stream_export(rows,ANNOTATED_COLUMNS,input["export_format"]())
 
 @reactive.effect
 @reactive.event(results)
@@ -107,65 +162,59 @@ def render_annotate():
 def render_download():
     ui.remove_ui("#download_container *")
     download_func = download_annotated_results if input["annotate"]() else download_results
-    ui.insert_ui(render.download(label="Download results", filename="duplicate_results.xlsx")(download_func),"#download_container")
+    with reactive.isolate():
+        export_format = input["export_format"]() if "export_format" in input else "xlsx"
+    ui.insert_ui(ui.input_select("export_format","Format",{key:value[0] for key,value in FORMATS.items()},selected=export_format,width="auto"),"#download_container")
+    ui.insert_ui(render.download(label="Download results", filename=export_filename)(download_func),"#download_container")
 
 
 @reactive.effect
-@reactive.event(results_slice,input["annotate"],input["id_url_select"])
+@reactive.event(results_slice,input["annotate"],input["id_url_select"],expanded)
 def render_results():
-    ui.remove_ui("#results_container *")
-    cards = []
-    for x,result in enumerate(results_slice()):
-        id = f"duplicate_{x}"
-        rows = []
-        selected = annotations_slice()[x]
-
-        if input["annotate"]():
-            for k,v in ANNOTATE_CHOICES.items():
-                checked = {"checked":"checked"} if k == selected else {}
-                radio_button = ui.tags.input(value=k,type="radio",name=id,**checked)
-                row = core_ui.row(
-                    core_ui.column(1,radio_button),
-                    core_ui.column(11,ui.div(v,{"class":"fw-bold"})),
-                    )
-                rows.append(row)
-
-            for y,data in enumerate(result,len(ANNOTATE_CHOICES)):
-                checked = {"checked":"checked"} if y == selected else {}
-                radio_button = ui.tags.input(value=y,type="radio",name=id,**checked)
-                cols = [core_ui.column(1,radio_button)]
-                for col_name in [("id","ID",1),("year","Year",1),("title","Title",3),("authors","Authors",2),("abstract","Abstract",4)]:
-                    value = data.get(col_name[0],"")
-                    if col_name[0] == "id" and (url:=ID_URL_MAP.get(input["id_url_select"]())) is not None:
-                        value = ui.a(value,target="_blank",href=url.format(id=value))
-                    col_contents = ui.div({"class":"overflow-auto","style":"max-height:150px;"},ui.div({"class":"fw-bold"},col_name[1]),value)
-                    cols.append(ui.div({"class":f"col-sm-{col_name[2]}"},col_contents))
-                row = core_ui.row(*cols)
-                rows.append(row)
-
+    if shown_results[0] is not results():
+        # every card of previous results is stale
+        shown_results[0] = results()
+        shown_cards.update({x:False for x in shown_cards})
+    start = (page()-1)*page_size()
+    annotate = bool(input["annotate"]())
+    id_url = ID_URL_MAP.get(input["id_url_select"]())
+    for x in range(max(page_size(),len(shown_cards))):
+        if x < len(results_slice()):
+            y = start + x
+            key = get_card_key(y,annotate,annotations_slice()[x],id_url,y in expanded())
+        else:
+            key = None
+        if x in shown_cards and shown_cards[x] == key:
+            # the browser already shows this card
+            continue
+        if x not in shown_cards:
+            # slots are only added, so they stay in page order
+            ui.insert_ui(ui.div(id=f"result_slot_{x}"),"#results_container")
         else:
+            ui.remove_ui(f"#result_slot_{x} > *")
+        if key is not None:
+            card = render_card(x,y,results_slice()[x],annotate,annotations_slice()[x],id_url,y in expanded())
+            ui.insert_ui(card,f"#result_slot_{x}")
+        shown_cards[x] = key
+    ui.remove_ui("#results_empty *")
+    if not results_slice():
+        ui.insert_ui(ui.p("No duplicates found!"),"#results_empty")
 
-            for data in result:
-                cols = []
-                for col_name in [("id","ID",1),("year","Year",1),("title","Title",3),("authors","Authors",3),("abstract","Abstract",4)]:
-                    value = data.get(col_name[0],"")
-                    if col_name[0] == "id" and (url:=ID_URL_MAP.get(input["id_url_select"]())) is not None:
-                        value = ui.a(value,target="_blank",href=url.format(id=value))
-                    col_contents = ui.div({"class":"overflow-auto","style":"max-height:150px;"},ui.div({"class":"fw-bold"},col_name[1]),value)
-                    cols.append(ui.div({"class":f"col-sm-{col_name[2]}"},col_contents))
-                row = core_ui.row(*cols)
-                rows.append(row)
-        card = core_ui.card(ui.div({"class":"container"},*rows),id=id,class_="shiny-input-radiogroup")
-        cards.append(card)
-    if not cards:
-        cards = [ui.p("No duplicates found!")]
-    ui.insert_ui(ui.div(*cards),"#results_container")
+@reactive.effect
+@reactive.event(input["expand"])
+def expand_card():
+    expanded.set(expanded() | {input["expand"]()})
+
+@reactive.effect
+@reactive.event(input["collapse"])
+def collapse_card():
+    expanded.set(expanded() - {input["collapse"]()})
 
 @reactive.effect
-@reactive.event(*[input[f"duplicate_{i}"] for i in range(PAGE_SIZE)])
+@reactive.event(*[input[f"duplicate_{i}"] for i in range(max(PAGE_SIZES))])
 def update_annotations():
     for x in range(len(results_slice())):
-        y = (page()-1) * PAGE_SIZE + x
+        y = (page()-1) * page_size() + x
         annotations()[y] = int(input[f"duplicate_{x}"]())
     return
 
@@ -188,7 +237,7 @@ def render_pagination():
                 ]
             )
         components.append(f"Page {page()}")
-        if page() < len(results())/PAGE_SIZE:
+        if page() < len(results())/page_size():
             components.extend(
                 [
                     " ",
@@ -221,7 +270,7 @@ def page_up():
 @reactive.effect
 @reactive.event(input["page_end_0"],input["page_end_1"])
 def page_end():
-    page.set(math.ceil(len(results())/PAGE_SIZE))
+    page.set(math.ceil(len(results())/page_size()))
 
 
 
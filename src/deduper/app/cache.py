@@ -0,0 +1,118 @@
+"""Cache of dedupe results."""
+import hashlib
+import inspect
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from typing import Any
+
+from deduper.dedupe import Deduper
+
+
+def hash_file(path: str, chunk_size: int = 1 << 20) -> str:
+    """Hash the content of a file.
+
+    Args:
+        path (str): File path.
+        chunk_size (int): Number of bytes read at a time.
+
+    Returns:
+        str: SHA-256 hex digest.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(chunk_size):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def get_config(value: Any) -> Hashable:
+    """Get a hashable configuration of a value.
+
+    Objects are configured by the arguments of their constructor,
+    read from the attributes of the same name, so state computed
+    while deduping (such as fitted blockers) is not included.
+
+    Args:
+        value (Any): Value, such as a Deduper, module or blocker.
+
+    Returns:
+        Hashable: Configuration.
+    """
+    if isinstance(value, type) and issubclass(value, Deduper):
+        modules = tuple(get_config(module) for module in value.modules)
+        return (f"{value.__module__}.{value.__qualname__}", modules)
+    if isinstance(value, list | tuple):
+        return tuple(get_config(item) for item in value)
+    if isinstance(value, dict):
+        return tuple(sorted((key, get_config(item)) for key, item in value.items()))
+    if callable(value) and hasattr(value, "__qualname__"):
+        # functions such as scorers
+        return f"{value.__module__}.{value.__qualname__}"
+    if not hasattr(value, "__dict__"):
+        return value
+    parameters = inspect.signature(type(value).__init__).parameters
+    return (
+        type(value).__qualname__,
+        tuple(
+            (name, get_config(getattr(value, name, None))) for name in parameters if name != "self"
+        ),
+    )
+
+
+class ResultCache:
+    """Bounded least recently used cache of dedupe results.
+
+    The cache can be used from several threads. Results are computed
+    outside of the lock, so a slow computation does not block lookups.
+    """
+
+    def __init__(self, maxsize: int = 8):
+        """Create result cache.
+
+        Args:
+            maxsize (int): Maximum number of results kept.
+        """
+        self.maxsize = maxsize
+        self.results: OrderedDict[Hashable, Any] = OrderedDict()
+        self.lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.results)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self.results
+
+    def get_key(self, file_hash: str, deduper: type[Deduper]) -> Hashable:
+        """Get the cache key of a deduper run on a file.
+
+        Args:
+            file_hash (str): Hash of the file content.
+            deduper (type[Deduper]): Deduper.
+
+        Returns:
+            Hashable: Key.
+        """
+        return (file_hash, get_config(deduper))
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """Get a cached result, computing and caching it if it is missing.
+
+        Args:
+            key (Hashable): Key.
+            compute (Callable[[], Any]): Function computing the result.
+
+        Returns:
+            Any: Result.
+        """
+        with self.lock:
+            if key in self.results:
+                self.results.move_to_end(key)
+                return self.results[key]
+        result = compute()
+        with self.lock:
+            self.results[key] = result
+            # evict the least recently used results
+            while len(self.results) > self.maxsize:
+                self.results.popitem(last=False)
+        return result
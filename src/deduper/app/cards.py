@@ -0,0 +1,179 @@
+"""Cards showing the records of each duplicate group."""
+from collections.abc import Hashable
+from typing import Any
+
+from shiny import ui
+
+from deduper.app.constants import ANNOTATE_CHOICES
+
+# fields of each record, with their label and column width
+COLUMNS = [
+    ("id", "ID", 1),
+    ("year", "Year", 1),
+    ("title", "Title", 3),
+    ("authors", "Authors", 3),
+    ("abstract", "Abstract", 4),
+]
+# the radio button column takes its width from authors when annotating
+ANNOTATE_COLUMNS = [
+    ("id", "ID", 1),
+    ("year", "Year", 1),
+    ("title", "Title", 3),
+    ("authors", "Authors", 2),
+    ("abstract", "Abstract", 4),
+]
+# fields only sent in full once their card is expanded
+LONG_FIELDS = {"authors", "abstract"}
+# number of characters of a long field shown before its card is expanded
+PREVIEW_LENGTH = 300
+
+
+def format_value(value: Any) -> str:
+    """Format the value of a record field as text.
+
+    Args:
+        value (Any): Value, such as a string or a list of authors.
+
+    Returns:
+        str: Text.
+    """
+    if value is None:
+        return ""
+    if isinstance(value, list | tuple):
+        return "; ".join(str(item) for item in value)
+    return str(value)
+
+
+def get_preview(text: str, length: int = PREVIEW_LENGTH) -> tuple[str, bool]:
+    """Get the preview of a text.
+
+    Args:
+        text (str): Text.
+        length (int): Maximum number of characters.
+
+    Returns:
+        tuple[str, bool]: Preview, and whether the text was truncated.
+    """
+    if len(text) <= length:
+        return text, False
+    # cut at a word boundary when there is one
+    preview = text[:length].rsplit(" ", 1)[0] or text[:length]
+    return preview + "…", True
+
+
+def get_card_key(
+    group_index: int, annotate: bool, selected: int, id_url: str | None, expanded: bool
+) -> Hashable:
+    """Get a key of everything a card is rendered from.
+
+    A card only needs to be sent to the browser again when its key changes.
+
+    Args:
+        group_index (int): Index of the group in the results.
+        annotate (bool): Whether the card can be annotated.
+        selected (int): Selected annotation choice.
+        id_url (str | None): URL template of record ids.
+        expanded (bool): Whether long fields are shown in full.
+
+    Returns:
+        Hashable: Key.
+    """
+    return (group_index, annotate, selected if annotate else None, id_url, expanded)
+
+
+def render_field(
+    record: dict, field: str, label: str, id_url: str | None, expanded: bool
+) -> tuple[ui.Tag, bool]:
+    """Render a field of a record.
+
+    Args:
+        record (dict): Record.
+        field (str): Field name.
+        label (str): Field label.
+        id_url (str | None): URL template of record ids.
+        expanded (bool): Whether long fields are shown in full.
+
+    Returns:
+        tuple[ui.Tag, bool]: Field contents, and whether the field was truncated.
+    """
+    value = format_value(record.get(field))
+    truncated = False
+    if field in LONG_FIELDS and not expanded:
+        value, truncated = get_preview(value)
+    if field == "id" and id_url is not None:
+        value = ui.a(value, target="_blank", href=id_url.format(id=value))
+    contents = ui.div(
+        {"class": "overflow-auto", "style": "max-height:150px;"},
+        ui.div({"class": "fw-bold"}, label),
+        value,
+    )
+    return contents, truncated
+
+
+def render_card(
+    slot: int,
+    group_index: int,
+    group: list[dict],
+    annotate: bool,
+    selected: int,
+    id_url: str | None,
+    expanded: bool,
+) -> ui.Tag:
+    """Render the card of a duplicate group.
+
+    Long fields are truncated to a preview unless the card is expanded, so
+    a page of many cards stays small. Clicking "Show more" sets the "expand"
+    input to the group index.
+
+    Args:
+        slot (int): Position of the card on the page.
+        group_index (int): Index of the group in the results.
+        group (list[dict]): Records of the group.
+        annotate (bool): Whether the card can be annotated.
+        selected (int): Selected annotation choice.
+        id_url (str | None): URL template of record ids.
+        expanded (bool): Whether long fields are shown in full.
+
+    Returns:
+        ui.Tag: Card.
+    """
+    card_id = f"duplicate_{slot}"
+    rows = []
+    truncated = False
+    if annotate:
+        for value, label in ANNOTATE_CHOICES.items():
+            checked = {"checked": "checked"} if value == selected else {}
+            radio_button = ui.tags.input(value=value, type="radio", name=card_id, **checked)
+            rows.append(
+                ui.row(
+                    ui.column(1, radio_button),
+                    ui.column(11, ui.div(label, {"class": "fw-bold"})),
+                )
+            )
+    for value, record in enumerate(group, len(ANNOTATE_CHOICES)):
+        cols = []
+        if annotate:
+            checked = {"checked": "checked"} if value == selected else {}
+            radio_button = ui.tags.input(value=value, type="radio", name=card_id, **checked)
+            cols.append(ui.column(1, radio_button))
+        for field, label, width in ANNOTATE_COLUMNS if annotate else COLUMNS:
+            contents, field_truncated = render_field(record, field, label, id_url, expanded)
+            truncated = truncated or field_truncated
+            cols.append(ui.div({"class": f"col-sm-{width}"}, contents))
+        rows.append(ui.row(*cols))
+    if truncated:
+        onclick = (
+            f"Shiny.setInputValue('expand', {group_index}, {{priority: 'event'}}); return false;"
+        )
+        rows.append(ui.a("Show more", href="#", onclick=onclick))
+    elif expanded:
+        onclick = (
+            f"Shiny.setInputValue('collapse', {group_index}, {{priority: 'event'}}); return false;"
+        )
+        rows.append(ui.a("Show less", href="#", onclick=onclick))
+    # a plain bootstrap card, since a bslib card sends its dependencies every time
+    return ui.div(
+        {"class": "card mb-3 shiny-input-radiogroup"},
+        ui.div({"class": "card-body container"}, *rows),
+        id=card_id,
+    )
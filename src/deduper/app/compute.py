@@ -0,0 +1,54 @@
+"""Dedupe computation shared by every session of the app."""
+from concurrent.futures import ThreadPoolExecutor
+
+from deduper.app.cache import ResultCache, hash_file
+from deduper.app.constants import COMPUTE_WORKERS, RESULT_CACHE_SIZE, RESULT_FIELDS
+from deduper.app.ris import iter_ris
+from deduper.dedupe import Deduper
+from deduper.observers import Observer
+
+# the app script runs once per session, so shared state is kept here
+executor = ThreadPoolExecutor(max_workers=COMPUTE_WORKERS)
+result_cache = ResultCache(maxsize=RESULT_CACHE_SIZE)
+
+
+def read_records(path: str, deduper: type[Deduper]) -> list[dict]:
+    """Read the records of a RIS file.
+
+    Only the fields the deduper and the results need are read.
+
+    Args:
+        path (str): File path.
+        deduper (type[Deduper]): Deduper.
+
+    Returns:
+        list[dict]: Records.
+    """
+    fields = deduper.get_fields()
+    if fields is not None:
+        fields = [*fields, *RESULT_FIELDS]
+    with open(path, errors="ignore") as f:
+        return list(iter_ris(f, fields))
+
+
+def get_duplicates(
+    path: str, deduper: type[Deduper], observer: Observer | None = None
+) -> list[list[dict]]:
+    """Get the duplicates of a RIS file, from the result cache if possible.
+
+    The file is hashed here rather than in the session, since this runs in
+    the executor, and large uploads take a while to hash. The file is only
+    read if the result is not cached.
+
+    Args:
+        path (str): File path.
+        deduper (type[Deduper]): Deduper.
+        observer (Observer | None): Observer of the run, if the result is computed.
+
+    Returns:
+        list[list[dict]]: Duplicates.
+    """
+    key = result_cache.get_key(hash_file(path), deduper)
+    return result_cache.get_or_compute(
+        key, lambda: deduper.get_duplicates(read_records(path, deduper), observer=observer)
+    )
@@ -24,6 +24,14 @@ DEDUPER_MAP = {
 }
 
 PAGE_SIZE = 10
+# choices of the number of groups per page
+PAGE_SIZES = [10, 50, 100, 500]
+# fields shown in the results and downloads
+RESULT_FIELDS = ["id", "year", "title", "authors", "abstract"]
+# number of dedupe results kept in memory
+RESULT_CACHE_SIZE = 8
+# number of dedupe runs computed at once in the background
+COMPUTE_WORKERS = 2
 ANNOTATE_CHOICES = {
     0: "Not reviewed",
     1: "No duplicates found",
@@ -0,0 +1,168 @@
+"""Streaming export of duplicate results."""
+import csv
+import io
+import tempfile
+from collections.abc import Iterable, Iterator, Sequence
+from typing import BinaryIO
+
+from openpyxl import Workbook
+
+from deduper.app.constants import ANNOTATE_CHOICES
+
+COLUMNS = ["duplicate_group", "id"]
+ANNOTATED_COLUMNS = [*COLUMNS, "resolution", "resolved_id"]
+# number of bytes sent to the client at a time
+CHUNK_SIZE = 1 << 16
+# number of rows in each parquet row group
+PARQUET_BATCH_SIZE = 1 << 16
+
+
+def iter_rows(
+    results: Iterable[list[dict]], annotations: Sequence[int] | None = None
+) -> Iterator[tuple]:
+    """Get the rows of an export, one record at a time.
+
+    Args:
+        results (Iterable[list[dict]]): Duplicate groups of records.
+        annotations (Sequence[int] | None): Selected annotation choice of each group.
+            If None, the export is not annotated.
+
+    Yields:
+        Iterator[tuple]: Rows, in the order of COLUMNS or ANNOTATED_COLUMNS if annotated.
+    """
+    for i, group in enumerate(results):
+        if annotations is None:
+            for record in group:
+                yield i, record["id"]
+            continue
+        choice = annotations[i]
+        resolution = ANNOTATE_CHOICES.get(choice, "Duplicate identified")
+        # choices after the annotate choices select a record of the group
+        resolved = None if choice < len(ANNOTATE_CHOICES) else group[choice - len(ANNOTATE_CHOICES)]
+        for record in group:
+            resolved_id = record["id"] if resolved is None else resolved["id"]
+            yield i, record["id"], resolution, resolved_id
+
+
+def iter_csv(
+    rows: Iterable[tuple], columns: list[str], chunk_size: int = CHUNK_SIZE
+) -> Iterator[bytes]:
+    """Stream rows as CSV.
+
+    Args:
+        rows (Iterable[tuple]): Rows.
+        columns (list[str]): Column names.
+        chunk_size (int): Approximate number of bytes in each chunk.
+
+    Yields:
+        Iterator[bytes]: Chunks of UTF-8 encoded CSV.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for row in rows:
+        writer.writerow(row)
+        if buffer.tell() >= chunk_size:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+def write_xlsx(rows: Iterable[tuple], columns: list[str], f: BinaryIO) -> None:
+    """Write rows to an Excel workbook.
+
+    The workbook is write-only, so rows are written as they are appended
+    instead of being kept in memory.
+
+    Args:
+        rows (Iterable[tuple]): Rows.
+        columns (list[str]): Column names.
+        f (BinaryIO): File.
+    """
+    workbook = Workbook(write_only=True)
+    worksheet = workbook.create_sheet()
+    worksheet.append(columns)
+    for row in rows:
+        worksheet.append(row)
+    workbook.save(f)
+
+
+def write_parquet(
+    rows: Iterable[tuple],
+    columns: list[str],
+    f: BinaryIO,
+    batch_size: int = PARQUET_BATCH_SIZE,
+) -> None:
+    """Write rows to a Parquet file.
+
+    Rows are written in row groups of batch_size, so only one batch is in memory.
+
+    Args:
+        rows (Iterable[tuple]): Rows.
+        columns (list[str]): Column names.
+        f (BinaryIO): File.
+        batch_size (int): Number of rows in each row group.
+    """
+    # pyarrow is only needed for parquet exports
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema(
+        [(name, pa.int64() if name == "duplicate_group" else pa.string()) for name in columns]
+    )
+
+    def write_batch(batch: list[tuple]) -> None:
+        arrays = [
+            [value if j == 0 or value is None else str(value) for value in values]
+            for j, values in enumerate(zip(*batch, strict=True))
+        ]
+        writer.write_batch(pa.record_batch(arrays, schema=schema))
+
+    with pq.ParquetWriter(f, schema) as writer:
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) == batch_size:
+                write_batch(batch)
+                batch = []
+        if batch:
+            write_batch(batch)
+
+
+# label, file extension and writer of each export format; csv is streamed directly
+FORMATS = {
+    "xlsx": ("Excel", "xlsx", write_xlsx),
+    "csv": ("CSV", "csv", None),
+    "parquet": ("Parquet", "parquet", write_parquet),
+}
+
+
+def stream_export(
+    rows: Iterable[tuple], columns: list[str], export_format: str, chunk_size: int = CHUNK_SIZE
+) -> Iterator[bytes]:
+    """Stream rows in an export format.
+
+    Formats which cannot be streamed as they are written are written
+    to a temporary file first, then streamed from it, so memory use does
+    not grow with the number of rows.
+
+    Args:
+        rows (Iterable[tuple]): Rows.
+        columns (list[str]): Column names.
+        export_format (str): Key of FORMATS.
+        chunk_size (int): Number of bytes in each chunk.
+
+    Yields:
+        Iterator[bytes]: Chunks of the export.
+    """
+    writer = FORMATS[export_format][2]
+    if writer is None:
+        yield from iter_csv(rows, columns, chunk_size)
+        return
+    with tempfile.TemporaryFile() as f:
+        writer(rows, columns, f)
+        f.seek(0)
+        while chunk := f.read(chunk_size):
+            yield chunk
@@ -0,0 +1,104 @@
+"""Streaming RIS reader."""
+from collections.abc import Iterable, Iterator
+
+from rispy.config import DELIMITED_TAG_MAPPING, LIST_TYPE_TAGS, TAG_KEY_MAPPING
+
+START_TAG = "TY"
+END_TAG = "ER"
+UNKNOWN_TAG = "UK"
+
+
+def parse_line(line: str) -> tuple[str | None, str]:
+    """Parse a line of a RIS file into its tag and content.
+
+    Args:
+        line (str): Line.
+
+    Returns:
+        tuple[str | None, str]: Tag, or None if the line continues the previous tag,
+            and content.
+    """
+    if line[2:5] == "  -" and line[:2].isupper() and line[0:1].isalpha():
+        return line[0:2], line[6:].strip()
+    return None, line.strip()
+
+
+def add_tag(record: dict, tag: str, content: str, extend_multiline: bool = False) -> None:
+    """Add the content of a tag to a record, the same way rispy does.
+
+    Args:
+        record (dict): Record.
+        tag (str): Tag.
+        content (str): Content.
+        extend_multiline (bool): Whether the content continues the previous line.
+    """
+    name = TAG_KEY_MAPPING.get(tag)
+    if name is None:
+        unknown_tag_map = record.setdefault(TAG_KEY_MAPPING[UNKNOWN_TAG], {})
+        unknown_tag_map.setdefault(tag, []).append(content)
+        return
+    if delimiter := DELIMITED_TAG_MAPPING.get(tag):
+        content = [value.strip() for value in content.split(delimiter)]
+    if tag in LIST_TYPE_TAGS:
+        values = content if isinstance(content, list) else [content]
+        if name not in record:
+            record[name] = values
+        elif isinstance(record[name], list):
+            record[name].extend(values)
+        else:
+            record[name] = [record[name], *values]
+    elif not extend_multiline:
+        # only the first occurrence of a single value tag is kept
+        record.setdefault(name, content)
+    elif isinstance(content, list):
+        record[name].extend(content)
+    else:
+        record[name] = " ".join((record[name], content))
+
+
+def iter_ris(lines: Iterable[str], fields: Iterable[str] | None = None) -> Iterator[dict]:
+    """Read records from the lines of a RIS file, one record at a time.
+
+    Records are read the same way as rispy.load, using its tag names,
+    but lines of tags outside of fields are skipped without being parsed,
+    so reading large files is faster and each record only holds what is needed.
+
+    Args:
+        lines (Iterable[str]): Lines, such as an open text file.
+        fields (Iterable[str] | None): Field names to read, such as "id" and "title".
+            Unknown tags are read into "unknown_tag". If None, every field is read.
+
+    Yields:
+        Iterator[dict]: Records.
+    """
+    if fields is None:
+        tags = None
+    else:
+        fields = set(fields)
+        tags = {tag for tag, name in TAG_KEY_MAPPING.items() if name in fields}
+        if TAG_KEY_MAPPING[UNKNOWN_TAG] not in fields:
+            tags.discard(UNKNOWN_TAG)
+    record = None
+    last_tag = None
+    for line in lines:
+        if record is None:
+            if line.startswith(START_TAG):
+                record = {}
+                if tags is None or START_TAG in tags:
+                    record[TAG_KEY_MAPPING[START_TAG]] = parse_line(line)[1]
+            continue
+        # the tag is checked before parsing, so skipped lines are never parsed
+        if line[2:5] != "  -" or not line[:2].isupper() or not line[0:1].isalpha():
+            if last_tag is not None:
+                add_tag(record, last_tag, line.strip(), extend_multiline=True)
+            continue
+        tag = line[0:2]
+        if tag == END_TAG:
+            yield record
+            record = None
+        elif tags is None or tag in tags or (UNKNOWN_TAG in tags and tag not in TAG_KEY_MAPPING):
+            add_tag(record, tag, line[6:].strip())
+            last_tag = tag
+        else:
+            # skipped tags also skip the lines continuing them
+            last_tag = None
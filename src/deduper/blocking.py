@@ -0,0 +1,239 @@
+"""Blocking strategies used to limit fuzzy comparisons."""
+import math
+from collections import Counter
+from collections.abc import Hashable, Iterable
+from typing import Any
+
+
+class Blocker:
+    """Base blocking strategy.
+
+    A blocker assigns each value zero or more block keys.
+    Objects are only compared with each other if they share a key,
+    and an object can sit in several blocks.
+    """
+
+    # field to block on; if None, the processed field of the dedupe module is used
+    field: str | None = None
+
+    def fit(self, values: list[Any]) -> None:
+        """Prepare the blocker using every value in the candidate set.
+
+        Override this method for blockers that depend on the whole
+        candidate set, such as those using token frequencies.
+
+        Args:
+            values (list[Any]): Values in the candidate set.
+        """
+        return
+
+    def get_keys(self, value: Any) -> Iterable[Hashable]:
+        """Get block keys for a value.
+
+        Args:
+            value (Any): Value.
+
+        Raises:
+            NotImplementedError: This method must implemented on subclasses.
+
+        Returns:
+            Iterable[Hashable]: Block keys.
+        """
+        raise NotImplementedError
+
+    def get_blocks(self, values: list[Any]) -> dict[Hashable, list[int]]:
+        """Get blocks from a list of values.
+
+        Args:
+            values (list[Any]): Values in the candidate set.
+
+        Returns:
+            dict[Hashable, list[int]]: Mapping of block key to ascending value indices.
+        """
+        self.fit(values)
+        blocks = {}
+        for index, value in enumerate(values):
+            for key in set(self.get_keys(value)):
+                if key not in blocks:
+                    blocks[key] = [index]
+                else:
+                    blocks[key].append(index)
+        return blocks
+
+
+class PrefixBlocker(Blocker):
+    """Block on the first characters of a value."""
+
+    def __init__(self, length: int = 5):
+        """Create blocker.
+
+        Args:
+            length (int): Number of leading characters to block on.
+        """
+        self.length = length
+
+    def get_keys(self, value: str) -> Iterable[Hashable]:
+        """Get block keys for a value.
+
+        Args:
+            value (str): Value.
+
+        Returns:
+            Iterable[Hashable]: Block keys.
+        """
+        return [value[: self.length]]
+
+
+class QGramBlocker(Blocker):
+    """Block on every character q-gram of a value.
+
+    Values shorter than q are blocked on the whole value.
+    """
+
+    def __init__(self, q: int = 3):
+        """Create blocker.
+
+        Args:
+            q (int): Length of each q-gram.
+        """
+        self.q = q
+
+    def get_keys(self, value: str) -> Iterable[Hashable]:
+        """Get block keys for a value.
+
+        Args:
+            value (str): Value.
+
+        Returns:
+            Iterable[Hashable]: Block keys.
+        """
+        if len(value) <= self.q:
+            return [value]
+        return [value[index : index + self.q] for index in range(len(value) - self.q + 1)]
+
+
+class TokenBlocker(Blocker):
+    """Block on the whitespace separated tokens of a value."""
+
+    def __init__(self, min_length: int = 1, prefix: int | None = None):
+        """Create blocker.
+
+        Args:
+            min_length (int): Tokens shorter than this are not used as keys.
+            prefix (int | None): If given, only the first tokens of a value are used as keys.
+        """
+        self.min_length = min_length
+        self.prefix = prefix
+
+    def get_keys(self, value: str) -> Iterable[Hashable]:
+        """Get block keys for a value.
+
+        Args:
+            value (str): Value.
+
+        Returns:
+            Iterable[Hashable]: Block keys.
+        """
+        tokens = [token for token in value.split() if len(token) >= self.min_length]
+        return tokens[: self.prefix]
+
+
+class YearBlocker(Blocker):
+    """Block on a year field.
+
+    Objects without a parsable year are blocked together.
+    """
+
+    def __init__(self, field: str = "year", tolerance: int = 0):
+        """Create blocker.
+
+        Args:
+            field (str): Object field containing the year.
+            tolerance (int): Objects are compared if their years
+                differ by this much or less.
+        """
+        self.field = field
+        self.tolerance = tolerance
+
+    def get_keys(self, value: Any) -> Iterable[Hashable]:
+        """Get block keys for a value.
+
+        Args:
+            value (Any): Value.
+
+        Returns:
+            Iterable[Hashable]: Block keys.
+        """
+        try:
+            year = int(str(value).strip()[:4])
+        except ValueError:
+            return [None]
+        # two years share a key when their ranges overlap,
+        # ie when they are within the tolerance
+        return range(year, year + self.tolerance + 1)
+
+
+class PrefixFilterBlocker(Blocker):
+    """Lossless blocking for fuzz.ratio, using prefix filtering.
+
+    A ratio of at least t between strings of length l1 and l2 requires
+    their character multisets to overlap by at least t * l1 / (200 - t).
+    Ordering each value's characters by global rarity, any two values that
+    meet their required overlap share a character within their prefixes,
+    so only those prefix characters are used as keys.
+
+    This never drops a pair that fuzz.ratio scores at or above the threshold.
+    """
+
+    def __init__(self, threshold: float):
+        """Create blocker.
+
+        Args:
+            threshold (float): Score cutoff used for matching. Between 0-100.
+        """
+        self.threshold = threshold
+        self.frequencies = Counter()
+
+    def get_tokens(self, value: str) -> list[tuple[str, int]]:
+        """Get the character multiset of a value as unique tokens.
+
+        Args:
+            value (str): Value.
+
+        Returns:
+            list[tuple[str, int]]: Tokens of character and occurrence.
+        """
+        counts = Counter()
+        tokens = []
+        for char in value:
+            tokens.append((char, counts[char]))
+            counts[char] += 1
+        return tokens
+
+    def fit(self, values: list[str]) -> None:
+        """Count token frequencies so the rarest tokens are used as keys.
+
+        Args:
+            values (list[str]): Values in the candidate set.
+        """
+        self.frequencies = Counter(token for value in values for token in self.get_tokens(value))
+
+    def get_keys(self, value: str) -> Iterable[Hashable]:
+        """Get block keys for a value.
+
+        Args:
+            value (str): Value.
+
+        Returns:
+            Iterable[Hashable]: Block keys.
+        """
+        if self.threshold <= 0:
+            # every pair reaches the threshold, so every value is in one block
+            return [None]
+        if not value:
+            # empty values can only match each other
+            return [None]
+        tokens = sorted(self.get_tokens(value), key=lambda token: (self.frequencies[token], token))
+        # slack guards against floating point error in the scorer
+        overlap = math.ceil(self.threshold * len(tokens) / (200 - self.threshold) - 1e-9)
+        return tokens[: len(tokens) - max(overlap, 1) + 1]
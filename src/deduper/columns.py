@@ -0,0 +1,217 @@
+"""Column storage shared by dedupe modules."""
+from collections.abc import Callable, Iterable, Mapping, Sequence
+from typing import Any
+
+# separator of the parts of a field path
+PATH_SEPARATOR = "__"
+
+
+def get_part(obj: Any, key: str, index: int | None = None) -> Any:
+    """Get a part of a field path from an object.
+
+    Args:
+        obj (Any): Object, such as a dict, list or model instance.
+        key (str): Dict key or attribute name.
+        index (int | None): List index, if the key is one.
+
+    Returns:
+        Any: Value, or None if the object has no such part.
+    """
+    if isinstance(obj, Mapping):
+        return obj.get(key)
+    if index is not None and isinstance(obj, Sequence) and not isinstance(obj, str):
+        return obj[index] if -len(obj) <= index < len(obj) else None
+    return getattr(obj, key, None)
+
+
+def compile_path(field: str) -> Callable[[Any], Any]:
+    """Compile a field path into a function getting its value from a record.
+
+    The path can follow dict keys, attributes and list indexes by use of __,
+    ie "authors__0__name". The path is parsed once, rather than on every access.
+
+    Args:
+        field (str): Field path.
+
+    Returns:
+        Callable[[Any], Any]: Accessor, returning None if any part of the path is missing.
+    """
+    parts = tuple(
+        (key, int(key) if key.lstrip("-").isdigit() else None)
+        for key in field.split(PATH_SEPARATOR)
+    )
+    if len(parts) == 1:
+        key, index = parts[0]
+
+        def get_value(record: Any) -> Any:
+            # dicts are the most common records, so they skip the generic lookup
+            if isinstance(record, dict):
+                return record.get(key)
+            return get_part(record, key, index)
+
+        return get_value
+
+    def get_path_value(record: Any) -> Any:
+        for key, index in parts:
+            if record is None:
+                return None
+            record = get_part(record, key, index)
+        return record
+
+    return get_path_value
+
+
+class ColumnStore:
+    """Field values of a record list, stored as columns indexed by record id.
+
+    The record id is the position of the record in the list.
+    Each column is extracted and processed once per run,
+    then shared by every module that reads it.
+    """
+
+    def __init__(
+        self,
+        records: Sequence[Any],
+        extractors: Mapping[str, Callable[[Any], Any]] | None = None,
+    ):
+        """Create column store.
+
+        Args:
+            records (Sequence[Any]): Records.
+            extractors (Mapping[str, Callable[[Any], Any]] | None): Functions getting
+                the values of fields from a record, by field. Other fields are read
+                by their field path.
+        """
+        self.records = records
+        self.extractors = dict(extractors or {})
+        self.accessors: dict[str, Callable[[Any], Any]] = {}
+        self.columns: dict[tuple, list[Any]] = {}
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __getstate__(self) -> dict:
+        # compiled accessors are closures, which can not be pickled
+        return {**self.__dict__, "accessors": {}}
+
+    def get_accessor(self, field: str) -> Callable[[Any], Any]:
+        """Get the function getting the value of a field from a record.
+
+        Accessors are compiled once per field, and shared by every module.
+
+        Args:
+            field (str): Field path.
+
+        Returns:
+            Callable[[Any], Any]: Accessor.
+        """
+        if (accessor := self.accessors.get(field)) is None:
+            accessor = self.extractors.get(field) or compile_path(field)
+            self.accessors[field] = accessor
+        return accessor
+
+    def extract_value(self, record: Any, field: str) -> Any:
+        """Get field value from a record.
+
+        Args:
+            record (Any): Record.
+            field (str): Field path.
+
+        Returns:
+            Any: Field value of record.
+        """
+        return self.get_accessor(field)(record)
+
+    def get_column(
+        self,
+        field: str,
+        processor: Callable[[Any], Any] | None = None,
+        case_sensitive: bool = True,
+    ) -> list[Any]:
+        """Get the values of a field for every record.
+
+        Args:
+            field (str): Field path.
+            processor (Callable[[Any], Any] | None): Function applied to each value.
+            case_sensitive (bool): If False, str values are lower cased
+                before being processed.
+
+        Returns:
+            list[Any]: Column, indexed by record id.
+        """
+        key = (field, processor, case_sensitive)
+        if (column := self.columns.get(key)) is not None:
+            return column
+        if processor is None and case_sensitive:
+            accessor = self.get_accessor(field)
+            column = [accessor(record) for record in self.records]
+        else:
+            column = self.process_values(self.get_column(field), processor, case_sensitive)
+        self.columns[key] = column
+        return column
+
+    def process_values(
+        self,
+        values: list[Any],
+        processor: Callable[[Any], Any] | None,
+        case_sensitive: bool,
+    ) -> list[Any]:
+        """Process raw field values.
+
+        Args:
+            values (list[Any]): Raw field values.
+            processor (Callable[[Any], Any] | None): Function applied to each value.
+            case_sensitive (bool): If False, str values are lower cased
+                before being processed.
+
+        Returns:
+            list[Any]: Processed values.
+        """
+        if not case_sensitive:
+            values = [value.lower() if isinstance(value, str) else value for value in values]
+        if processor is not None:
+            values = [processor(value) for value in values]
+        return values
+
+    def add(self, records: list[Any]) -> range:
+        """Add records, extending every column that has already been computed.
+
+        The records passed on creation must be a list for records to be added.
+
+        Args:
+            records (list[Any]): Records.
+
+        Returns:
+            range: Record ids of the added records.
+        """
+        start = len(self.records)
+        self.records.extend(records)
+        raw_column_map = {}
+        for (field, processor, case_sensitive), column in self.columns.items():
+            if field not in raw_column_map:
+                accessor = self.get_accessor(field)
+                raw_column_map[field] = [accessor(record) for record in records]
+            column.extend(self.process_values(raw_column_map[field], processor, case_sensitive))
+        return range(start, len(self.records))
+
+    def take(self, ids: Sequence[int], fields: Iterable[str] | None = None) -> "ColumnStore":
+        """Get a column store of a subset of records.
+
+        Records in the new store are renumbered in the order of ids,
+        so ascending ids keep their relative order.
+
+        Args:
+            ids (Sequence[int]): Record ids to take.
+            fields (Iterable[str] | None): Fields to take. If given, only the raw columns of
+                these fields are copied, rather than the records themselves.
+
+        Returns:
+            ColumnStore: Column store.
+        """
+        if fields is None:
+            return ColumnStore([self.records[obj] for obj in ids], self.extractors)
+        column_store = ColumnStore([None] * len(ids))
+        for field in fields:
+            column = self.get_column(field)
+            column_store.columns[(field, None, True)] = [column[obj] for obj in ids]
+        return column_store
@@ -1,41 +1,96 @@
 """Deduping classes."""
-from typing import Any
-
-from rapidfuzz.process import extract
+import copy
+import zlib
+from array import array
+from bisect import bisect_left
+from collections.abc import Callable, Iterable, Iterator, Sequence
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from itertools import pairwise
+from typing import Any, ClassVar
+
+import numpy as np
+from rapidfuzz.fuzz import QRatio, WRatio, ratio
+from rapidfuzz.process import cdist, extract
 from rapidfuzz.utils import default_process
 
+from deduper.blocking import Blocker
+from deduper.columns import ColumnStore
+from deduper.grouping import DisjointSet, GroupList, SimilarityGraph
+from deduper.observers import Observer
+from deduper.parallel import run_parallel
+
 RenameMe = Any
+# odd multiplier combining the word hashes of a shingle
+SHINGLE_MULTIPLIER = np.uint64(0x9E3779B97F4A7C15)
+
+
+def process_str(value: Any) -> str:
+    """Process a value for fuzzy matching.
+
+    Falsy values are treated as an empty string.
+
+    Args:
+        value (Any): Value.
+
+    Returns:
+        str: Processed value.
+    """
+    return default_process(value or "")
+
+
+def process_key(value: Any) -> str | None:
+    """Process a value for exact matching after normalization.
+
+    Values which are empty once processed are treated as None, so they match nothing.
+
+    Args:
+        value (Any): Value.
+
+    Returns:
+        str | None: Processed value.
+    """
+    return process_str(value) or None
 
 
 class DedupeModule:
-    """Base module used for deduping."""
+    """Base module used for deduping.
+
+    Modules operate on groups of record ids,
+    reading field values from a shared ColumnStore.
+    """
+
+    # column store and observer of the current run, if any
+    columns: ColumnStore | None = None
+    observer: Observer | None = None
 
     def condense_obj_set_list(self, obj_set_list: list[set[RenameMe]]) -> list[set[RenameMe]]:
         """Condenses a list of sets by joining them where they intersect.
 
+        Object sets are grouped with a disjoint set, so this runs in
+        near-linear time on the total number of objects.
+
         Args:
             obj_set_list (list[set[RenameMe]]): List of object sets.
 
         Returns:
             list[set[RenameMe]]: Condensed list of object sets.
         """
-        _obj_set_list = obj_set_list.copy()
-        remove_list = [False] * len(_obj_set_list)
-        for index, obj_set in enumerate(_obj_set_list):
-            remaining_obj_set_list = _obj_set_list[index + 1 :]
-            for index_diff, other_obj_set in enumerate(remaining_obj_set_list, 1):
-                if obj_set & other_obj_set:
-                    # join intersecting object sets
-                    _obj_set_list[index + index_diff] = obj_set | other_obj_set
-                    # if this object set was condensed into another,
-                    # then it is safe to remove
-                    remove_list[index] = True
-                    break
-        # filter out removed object sets
+        if self.observer is not None:
+            self.observer.count(self, "condense")
+        # each object set is a node; object sets sharing an object are unioned
+        disjoint_set = DisjointSet(range(len(obj_set_list)))
+        owner_map = {}
+        for index, obj_set in enumerate(obj_set_list):
+            for obj in obj_set:
+                owner = owner_map.setdefault(obj, index)
+                if owner != index:
+                    disjoint_set.union(owner, index)
+        # groups are ordered by their last object set, so each condensed
+        # set takes the position of the final set that was joined into it
         return [
-            obj_set
-            for obj_set, remove in zip(_obj_set_list, remove_list, strict=True)
-            if not remove
+            set().union(*(obj_set_list[index] for index in index_set))
+            for index_set in disjoint_set.groups()
         ]
 
     def join_obj_set_lists(
@@ -60,6 +115,8 @@ class DedupeModule:
         Returns:
             list[set[RenameMe]]: Joined object set list.
         """
+        if self.observer is not None:
+            self.observer.count(self, "join")
         return self.condense_obj_set_list(first_obj_set_list + second_obj_set_list)
 
     def separate_obj_set_lists(
@@ -87,6 +144,8 @@ class DedupeModule:
         intersection. And again, there is no intersection with {4,5} from the other list
         so it is free to be included without any separation.
 
+        Intersections are found through an element to object set index map,
+        so only pairs of object sets that share an element are visited.
 
         Args:
             first_obj_set_list (list[set[RenameMe]]): First object set list.
@@ -95,38 +154,63 @@ class DedupeModule:
         Returns:
             list[set[RenameMe]]: Separated object set list.
         """
+        if self.observer is not None:
+            self.observer.count(self, "separate")
         _obj_set_list = []
 
+        # map each element of the second object set list to the indices
+        # of the second object sets that contain it
+        second_index_map = {}
+        for j, second_obj_set in enumerate(second_obj_set_list):
+            for obj in second_obj_set:
+                if obj not in second_index_map:
+                    second_index_map[obj] = [j]
+                else:
+                    second_index_map[obj].append(j)
         # all elements in the first object set list
-        all_first_obj_set = {obj for obj_set in first_obj_set_list for obj in obj_set}
-        # all elements in the second object set list
-        all_second_obj_set = {obj for obj_set in second_obj_set_list for obj in obj_set}
-        # all elements that intersect between the first and second object set list
-        intersected_obj_set = all_first_obj_set & all_second_obj_set
+        all_first_obj_set = set().union(*first_obj_set_list)
+
+        # number of elements in each object set that intersect with the other list
+        second_intersected_counts = [
+            sum(obj in all_first_obj_set for obj in second_obj_set)
+            for second_obj_set in second_obj_set_list
+        ]
 
         first_obj_set_included = [False] * len(first_obj_set_list)
         second_obj_set_included = [False] * len(second_obj_set_list)
 
         for i, first_obj_set in enumerate(first_obj_set_list):
-            for j, second_obj_set in enumerate(second_obj_set_list):
-                if intersection := first_obj_set & second_obj_set:
-                    # determine what should be included with the intersection
-                    split_obj_set = intersection
-
-                    # if the first object set has no other intersection
-                    # with any other second object set...
-                    if not ((first_obj_set - intersection) & intersected_obj_set):
-                        # then the first object set does not need to be separated
-                        split_obj_set |= first_obj_set
-                        first_obj_set_included[i] = True
-                    # if the second object set has no other intersection
-                    # with any other first object set...
-                    if not ((second_obj_set - intersection) & intersected_obj_set):
-                        # then the second object set does not need to be separated
-                        split_obj_set |= second_obj_set
-                        second_obj_set_included[j] = True
-
-                    _obj_set_list.append(split_obj_set)
+            # only visit the second object sets that share an element
+            intersection_map = {}
+            first_intersected_count = 0
+            for obj in first_obj_set:
+                if (indices := second_index_map.get(obj)) is None:
+                    continue
+                first_intersected_count += 1
+                for j in indices:
+                    if j not in intersection_map:
+                        intersection_map[j] = {obj}
+                    else:
+                        intersection_map[j].add(obj)
+
+            for j in sorted(intersection_map):
+                # determine what should be included with the intersection
+                split_obj_set = intersection = intersection_map[j]
+
+                # if the first object set has no other intersection
+                # with any other second object set...
+                if first_intersected_count == len(intersection):
+                    # then the first object set does not need to be separated
+                    split_obj_set = split_obj_set | first_obj_set
+                    first_obj_set_included[i] = True
+                # if the second object set has no other intersection
+                # with any other first object set...
+                if second_intersected_counts[j] == len(intersection):
+                    # then the second object set does not need to be separated
+                    split_obj_set = split_obj_set | second_obj_set_list[j]
+                    second_obj_set_included[j] = True
+
+                _obj_set_list.append(split_obj_set)
 
         # go through all of the first object sets that were not joined
         # during intersection resolution
@@ -135,8 +219,10 @@ class DedupeModule:
             # or there were two or more.
             # either way, removing all intersected elements from
             # this object set creates the appropriate set to append.
-            non_intersected_obj_set = first_obj_set - intersected_obj_set
-            if not included and non_intersected_obj_set:
+            if included:
+                continue
+            non_intersected_obj_set = {obj for obj in first_obj_set if obj not in second_index_map}
+            if non_intersected_obj_set:
                 _obj_set_list.append(non_intersected_obj_set)
         # go through all of the second object sets that were not joined
         # during intersection resolution
@@ -147,17 +233,21 @@ class DedupeModule:
             # or there were two or more.
             # either way, removing all intersected elements from
             # this object set creates the appropriate set to append.
-            non_intersected_obj_set = second_obj_set - intersected_obj_set
-            if not included and non_intersected_obj_set:
+            if included:
+                continue
+            non_intersected_obj_set = {
+                obj for obj in second_obj_set if obj not in all_first_obj_set
+            }
+            if non_intersected_obj_set:
                 _obj_set_list.append(non_intersected_obj_set)
 
         return _obj_set_list
 
-    def execute(self, obj_set_list: list[set[RenameMe]]) -> list[set[RenameMe]]:
+    def execute(self, obj_set_list: Iterable[Iterable[RenameMe]]) -> list[set[RenameMe]]:
         """Perform deduping on the object set list by splitting up candidate sets.
 
         Args:
-            obj_set_list (list[set[RenameMe]]): Object set list.
+            obj_set_list (Iterable[Iterable[RenameMe]]): Object set list.
 
         Raises:
             NotImplementedError: This method must implemented on subclasses.
@@ -167,11 +257,91 @@ class DedupeModule:
         """
         raise NotImplementedError
 
-    def really_execute(self, obj_list_list:list[list[RenameMe]])->list[list[RenameMe]]:
-        self.obj_list_list = obj_list_list
-        index_list_list = [{(i1,i2) for i2 in range(len(obj_list))} for i1, obj_list in enumerate(obj_list_list)]
-        index_list_list = self.execute(index_list_list)
-        return [[obj_list_list[index[0]][index[1]] for index in index_list] for index_list in index_list_list]
+    def get_fields(self) -> list[str] | None:
+        """Get the fields the module reads.
+
+        Override this method so parallel execution only sends
+        the columns of these fields, rather than whole records.
+
+        Returns:
+            list[str] | None: Field paths, or None if the module reads whole records.
+        """
+        return None
+
+    def estimate_cost(self, size: int) -> float:
+        """Estimate the cost of executing the module on a candidate set.
+
+        Args:
+            size (int): Number of objects in the candidate set.
+
+        Returns:
+            float: Relative cost.
+        """
+        return size
+
+    def get_value(self, obj: RenameMe, field: str) -> Any:
+        """Get field value from object.
+
+        Args:
+            obj (RenameMe): Record id of the object.
+            field (str): Field path, which can follow relations by use of __,
+                ie "foo__bar".
+
+        Returns:
+            Any: Field value of object.
+        """
+        return self.columns.get_column(field)[obj]
+
+    def run(
+        self,
+        group_list: Iterable[Iterable[int]],
+        columns: ColumnStore,
+        observer: Observer | None = None,
+    ) -> GroupList:
+        """Perform deduping on groups of record ids, reading field values from a column store.
+
+        Args:
+            group_list (Iterable[Iterable[int]]): Record id groups.
+            columns (ColumnStore): Column store of the records.
+            observer (Observer | None): Observer notified of events while executing.
+
+        Returns:
+            GroupList: Deduped record id groups.
+        """
+        return GroupList.from_groups(self.copy_for_run(columns, observer).execute(group_list))
+
+    def copy_for_run(self, columns: ColumnStore, observer: Observer | None) -> "DedupeModule":
+        """Copy the module with the state of a single run.
+
+        Modules are shared by every run of a deduper, including runs on other
+        threads, so a run never stores its column store or observer on them.
+
+        Args:
+            columns (ColumnStore): Column store of the records.
+            observer (Observer | None): Observer notified of events while executing.
+
+        Returns:
+            DedupeModule: Shallow copy of the module.
+        """
+        module = copy.copy(self)
+        module.columns = columns
+        module.observer = observer
+        return module
+
+    def really_execute(self, obj_list_list: list[list[RenameMe]]) -> list[list[RenameMe]]:
+        """Perform deduping on lists of objects.
+
+        Args:
+            obj_list_list (list[list[RenameMe]]): Object list list.
+
+        Returns:
+            list[list[RenameMe]]: Deduped object list list.
+        """
+        records = [obj for obj_list in obj_list_list for obj in obj_list]
+        group_list = GroupList.from_sizes(len(obj_list) for obj_list in obj_list_list)
+        group_list = self.run(group_list, ColumnStore(records))
+        return [[records[index] for index in group] for group in group_list]
+
 
 class UniqueDedupe(DedupeModule):
     """Dedupe by matching objects by their fields."""
@@ -186,25 +356,15 @@ class UniqueDedupe(DedupeModule):
         """
         self.fields = fields
         self.case_sensitive = case_sensitive
+        self.processor: Callable[[Any], Any] | None = None
 
-    def get_value(self, obj: RenameMe, field: str) -> Any:
-        """Get field value from object.
-
-        The field can follow relations by use of __,
-        ie "foo__bar".
-
-        Empty strings are returned as None.
-
-        Args:
-            obj (RenameMe): Object to retrieve field from.
-            field (str): Field path.
+    def get_fields(self) -> list[str] | None:
+        """Get the fields the module reads.
 
         Returns:
-            Any: Field value of object.
+            list[str] | None: Field paths.
         """
-        # TODO update comment, make this a method on DedupeModule so it can be overridden
-        # easily on each module
-        return self.obj_list_list[obj[0]][obj[1]].get(field)
+        return list(self.fields)
 
     def get_field_obj_set_list(self, obj_set: set[RenameMe], field: str) -> list[set[RenameMe]]:
         """Get objects grouped by field values.
@@ -217,10 +377,12 @@ class UniqueDedupe(DedupeModule):
             list[set[RenameMe]]: Object set list.
         """
         mapping = {}
+        column = self.columns.get_column(
+            field, processor=self.processor, case_sensitive=self.case_sensitive
+        )
         # map all of the field values to their respective objects
         for obj in obj_set:
-            value = self.get_value(obj, field)
-            value = value.lower() if isinstance(value, str) and not self.case_sensitive else value
+            value = column[obj]
             if value is not None:
                 if value not in mapping:
                     mapping[value] = {obj}
@@ -228,67 +390,323 @@ class UniqueDedupe(DedupeModule):
                     mapping[value].add(obj)
         return list(mapping.values())
 
-    def execute(self, obj_set_list: list[set[RenameMe]]) -> list[set[RenameMe]]:
+    def get_key_obj_set_list(
+        self, obj_set: Iterable[RenameMe], columns: list[list[Any]]
+    ) -> list[set[RenameMe]]:
+        """Get objects grouped by sharing a value of any field.
+
+        The objects are scanned once, checking the values of every field
+        together, so this runs in linear time on objects times fields.
+        It gives the same groups as joining the groups of each field.
+
+        Args:
+            obj_set (Iterable[RenameMe]): Object set.
+            columns (list[list[Any]]): Column of each field.
+
+        Returns:
+            list[set[RenameMe]]: Object set list, without objects that share no value.
+        """
+        disjoint_set = DisjointSet()
+        # the first object with each value of each field
+        owner_maps = [{} for _ in columns]
+        for obj in obj_set:
+            for column, owner_map in zip(columns, owner_maps, strict=True):
+                value = column[obj]
+                if value is not None and (owner := owner_map.setdefault(value, obj)) != obj:
+                    disjoint_set.union(owner, obj)
+        return disjoint_set.groups()
+
+    def execute(self, obj_set_list: Iterable[Iterable[RenameMe]]) -> list[set[RenameMe]]:
         """Perform deduping on the object set list by splitting up candidate sets.
 
         Args:
-            obj_set_list (list[set[RenameMe]]): Object set list.
+            obj_set_list (Iterable[Iterable[RenameMe]]): Object set list.
 
         Returns:
             list[set[RenameMe]]: Deduped object set list.
         """
+        columns = [
+            self.columns.get_column(
+                field, processor=self.processor, case_sensitive=self.case_sensitive
+            )
+            for field in self.fields
+        ]
         _obj_set_list = []
         for obj_set in obj_set_list:
-            joined_obj_set_list = []
-            for field in self.fields:
-                field_obj_set_list = self.get_field_obj_set_list(obj_set, field)
-                joined_obj_set_list = self.join_obj_set_lists(
-                    joined_obj_set_list, field_obj_set_list
-                )
-            _obj_set_list.extend(joined_obj_set_list)
+            if self.observer is not None:
+                self.observer.count(self, "groups")
+            _obj_set_list.extend(self.get_key_obj_set_list(obj_set, columns))
         return [obj_set for obj_set in _obj_set_list if len(obj_set) > 1]
 
 
-
 class UniqueTogetherDedupe(UniqueDedupe):
     """Dedupe by matching objects on their field sets."""
 
-    def execute(self, obj_set_list: list[set[RenameMe]]) -> list[set[RenameMe]]:
-        """Perform deduping on the object set list by splitting up candidate sets.
+    def separate_by_values(
+        self,
+        obj_set_list: list[set[RenameMe]],
+        value_map: dict[RenameMe, RenameMe],
+        value_order: dict[RenameMe, int],
+    ) -> list[set[RenameMe]]:
+        """Separate object sets by the objects sharing each value of a field.
 
-        The UniqueDedupe module is executed first to get a baseline list to filter.
+        This gives the same result as separate_obj_set_lists with the value sets
+        of the field as the second list, given that value sets never overlap and
+        every object with a value is in the object set list. So the value sets
+        are never built, and intersections are found from the value map.
 
         Args:
             obj_set_list (list[set[RenameMe]]): Object set list.
+            value_map (dict[RenameMe, RenameMe]): First object with the value of each object,
+                for objects with a value.
+            value_order (dict[RenameMe, int]): Position of each value set in the second list,
+                by the first object with the value.
+
+        Returns:
+            list[set[RenameMe]]: Separated object set list.
+        """
+        if self.observer is not None:
+            self.observer.count(self, "separate")
+        _obj_set_list = []
+        remaining_obj_set_list = []
+        for obj_set in obj_set_list:
+            intersection_map = {}
+            intersected_count = 0
+            for obj in obj_set:
+                if (value := value_map.get(obj)) is None:
+                    continue
+                intersected_count += 1
+                if value not in intersection_map:
+                    intersection_map[value] = {obj}
+                else:
+                    intersection_map[value].add(obj)
+            included = False
+            for value in sorted(intersection_map, key=value_order.__getitem__):
+                split_obj_set = intersection_map[value]
+                # if the object set has no other intersection, it is not separated;
+                # the value set is always contained in the intersection
+                if intersected_count == len(split_obj_set):
+                    split_obj_set = split_obj_set | obj_set
+                    included = True
+                _obj_set_list.append(split_obj_set)
+            if not included:
+                remaining_obj_set_list.append({obj for obj in obj_set if obj not in value_map})
+        _obj_set_list.extend(obj_set for obj_set in remaining_obj_set_list if obj_set)
+        return _obj_set_list
+
+    def execute(self, obj_set_list: Iterable[Iterable[RenameMe]]) -> list[set[RenameMe]]:
+        """Perform deduping on the object set list by splitting up candidate sets.
+
+        Objects are first joined by sharing a value of any field, like UniqueDedupe,
+        then each joined set is separated by the value sets of each field.
+        Field values are read and hashed once, in the pass that joins the objects,
+        and separating only looks up the objects in the resulting value maps.
+
+        Args:
+            obj_set_list (Iterable[Iterable[RenameMe]]): Object set list.
 
         Returns:
             list[set[RenameMe]]: Deduped object set list.
         """
-        obj_set_list = super().execute(obj_set_list)
+        columns = [
+            self.columns.get_column(
+                field, processor=self.processor, case_sensitive=self.case_sensitive
+            )
+            for field in self.fields
+        ]
         _obj_set_list = []
         for obj_set in obj_set_list:
-            separated_obj_set_list = [obj_set]
-            for field in self.fields:
-                field_obj_set_list = self.get_field_obj_set_list(obj_set, field)
-                separated_obj_set_list = self.separate_obj_set_lists(
-                    separated_obj_set_list, field_obj_set_list
-                )
-            _obj_set_list.extend(separated_obj_set_list)
+            if self.observer is not None:
+                self.observer.count(self, "groups")
+            disjoint_set = DisjointSet()
+            # for each field, the first object with each value,
+            # and the first object with the value of each object
+            owner_maps = [{} for _ in columns]
+            value_maps = [{} for _ in columns]
+            for obj in obj_set:
+                for column, owner_map, value_map in zip(
+                    columns, owner_maps, value_maps, strict=True
+                ):
+                    value = column[obj]
+                    if value is None:
+                        continue
+                    owner = value_map[obj] = owner_map.setdefault(value, obj)
+                    if owner != obj:
+                        disjoint_set.union(owner, obj)
+            for joined_obj_set in disjoint_set.groups():
+                separated_obj_set_list = [joined_obj_set]
+                for value_map in value_maps:
+                    # value sets are ordered as get_field_obj_set_list would order them
+                    value_order = dict.fromkeys(
+                        value_map[obj] for obj in joined_obj_set if obj in value_map
+                    )
+                    value_order = {value: j for j, value in enumerate(value_order)}
+                    separated_obj_set_list = self.separate_by_values(
+                        separated_obj_set_list, value_map, value_order
+                    )
+                _obj_set_list.extend(separated_obj_set_list)
         return [obj_set for obj_set in _obj_set_list if len(obj_set) > 1]
 
 
+class NormalizedDedupe(UniqueDedupe):
+    """Dedupe by matching objects by their field values, processed as for fuzzy matching.
+
+    Values which only differ in case or punctuation match. This is
+    a cheap exact pass to run ahead of a FuzzyDedupe on the same field.
+    """
+
+    def __init__(self, fields: list[str]):
+        """Create dedupe module.
+
+        Args:
+            fields (list[str]): Fields to check on objects.
+        """
+        super().__init__(fields)
+        self.processor = process_key
+
+
+def ratio_length_bound(short: int, long: int) -> float:
+    """Get the highest ratio score of two values with the given lengths.
+
+    Every character of the longer value beyond the length of the shorter one
+    must be inserted, so the score is at most 100 * 2 * short / (short + long).
+
+    Args:
+        short (int): Length of the shorter value.
+        long (int): Length of the longer value.
+
+    Returns:
+        float: Upper bound of the score.
+    """
+    if long == 0:
+        return 100.0
+    return 200 * short / (short + long)
+
+
+def qratio_length_bound(short: int, long: int) -> float:
+    """Get the highest QRatio score of two values with the given lengths.
+
+    Args:
+        short (int): Length of the shorter value.
+        long (int): Length of the longer value.
+
+    Returns:
+        float: Upper bound of the score.
+    """
+    # QRatio scores empty values 0
+    if short == 0:
+        return 0.0
+    return ratio_length_bound(short, long)
+
+
+def wratio_length_bound(short: int, long: int) -> float:
+    """Get the highest WRatio score of two values with the given lengths.
+
+    WRatio is the best of ratio and token or partial ratios, where the token and
+    partial ratios are scaled down by 0.95, 0.9 and 0.6 as the length ratio of
+    the values passes 1.5 and 8.
+
+    Args:
+        short (int): Length of the shorter value.
+        long (int): Length of the longer value.
+
+    Returns:
+        float: Upper bound of the score.
+    """
+    # WRatio scores empty values 0
+    if short == 0:
+        return 0.0
+    length_ratio = long / short
+    # the scales are applied at the boundaries too, so the bound stays loose there
+    if length_ratio <= 1.5:
+        scale = 95.0
+    elif length_ratio <= 8:
+        scale = 90.0
+    else:
+        scale = 60.0
+    return max(ratio_length_bound(short, long), scale)
+
+
+# upper bound of the score of each scorer, by the lengths of the values
+LENGTH_BOUNDS: dict[Callable[..., float], Callable[[int, int], float]] = {
+    ratio: ratio_length_bound,
+    QRatio: qratio_length_bound,
+    WRatio: wratio_length_bound,
+}
+# margin for floating point error, so bounds and cosine similarities never miss a pair
+# at the threshold
+BOUND_TOLERANCE = 1e-6
+
+
 class FuzzyDedupe(DedupeModule):
-    """Dedupe by fuzzy text matching on object field values."""
+    """Dedupe by fuzzy text matching on object field values.
+
+    If the scorer has a length bound in LENGTH_BOUNDS, objects are sorted by the
+    length of their values, and each object is only compared with the window of
+    longer values which could still score at least the threshold. Without blockers,
+    objects with identical processed values are only compared once.
+    """
 
-    def __init__(self, field: str, threshold: float):
+    # number of rows scored at once when vectorized, so tiles on the diagonal
+    # score little of the lower triangle, and the length window of each strip is tight
+    strip_size = 32
+
+    def __init__(
+        self,
+        field: str,
+        threshold: float,
+        scorer: Callable[..., float] = WRatio,
+        blockers: list[Blocker] | None = None,
+        vectorized: bool = False,
+        workers: int = 1,
+        tile_size: int = 1024,
+    ):
         """Create dedupe module.
 
         Args:
             field (str): Object field. Values from this field should be string or None.
             threshold (float): Score cutoff for successful match. Between 0-100.
+            scorer (Callable[..., float]): Rapidfuzz scorer used to compare values.
+            blockers (list[Blocker] | None): Blocking strategies. If given, objects are
+                only compared when they share a block from any of the blockers.
+                If None, every object is compared with every other object.
+            vectorized (bool): Whether to score each block in tiles with cdist,
+                rather than row by row with extract.
+            workers (int): Number of threads cdist uses when vectorized. -1 uses all cores.
+            tile_size (int): Maximum number of columns scored in one cdist call.
         """
         self.field = field
         self.threshold = threshold
+        self.scorer = scorer
+        self.blockers = blockers
+        self.vectorized = vectorized
+        self.workers = workers
+        self.tile_size = tile_size
+
+    def get_fields(self) -> list[str] | None:
+        """Get the fields the module reads.
+
+        Returns:
+            list[str] | None: Field paths.
+        """
+        fields = [self.field]
+        for blocker in self.blockers or []:
+            if blocker.field is not None and blocker.field not in fields:
+                fields.append(blocker.field)
+        return fields
+
+    def estimate_cost(self, size: int) -> float:
+        """Estimate the cost of executing the module on a candidate set.
+
+        Every object may be compared with every other object, so the cost is quadratic.
+
+        Args:
+            size (int): Number of objects in the candidate set.
+
+        Returns:
+            float: Relative cost.
+        """
+        return size * size
 
     def get_str_field(self, obj: RenameMe, field: str) -> str:
         """Get str field value for an object.
@@ -302,40 +720,807 @@ class FuzzyDedupe(DedupeModule):
         Returns:
             str: Field value.
         """
-        # TODO update comment, refactor so that this uses a DedupeModule function
-        return self.obj_list_list[obj[0]][obj[1]].get(field) or ""
+        return self.get_value(obj, field) or ""
+
+    def get_block_lists(self, obj_list: list[RenameMe], str_list: list[str]) -> list[list[int]]:
+        """Get the blocks of objects to compare with each other, using the blockers.
+
+        Args:
+            obj_list (list[RenameMe]): Object list.
+            str_list (list[str]): Processed field values of the object list.
+
+        Returns:
+            list[list[int]]: Ascending object indices of each block. If there are no
+                blockers, a single block contains every object.
+        """
+        if not self.blockers:
+            return [list(range(len(obj_list)))]
+        block_lists = []
+        for blocker in self.blockers:
+            if blocker.field is None:
+                values = str_list
+            else:
+                values = [self.get_str_field(obj, blocker.field) for obj in obj_list]
+            # fit a copy, since the blocker is shared by concurrent runs
+            block_lists.extend(copy.copy(blocker).get_blocks(values).values())
+        return block_lists
+
+    def get_candidate_lists(
+        self, obj_list: list[RenameMe], str_list: list[str]
+    ) -> list[list[int]] | None:
+        """Get the objects each object should be compared with, using the blockers.
+
+        Args:
+            obj_list (list[RenameMe]): Object list.
+            str_list (list[str]): Processed field values of the object list.
+
+        Returns:
+            list[list[int]] | None: For each object, the ascending indices of later
+                objects that share a block with it. None if there are no blockers.
+        """
+        if not self.blockers:
+            return None
+        candidate_set_list = [set() for _ in obj_list]
+        for block in self.get_block_lists(obj_list, str_list):
+            for position, index in enumerate(block):
+                candidate_set_list[index].update(block[position + 1 :])
+        return [sorted(candidate_set) for candidate_set in candidate_set_list]
+
+    def get_length_ends(self, str_list: list[str]) -> list[int] | None:
+        """Get the end of the window of objects each object could match, by value length.
+
+        Args:
+            str_list (list[str]): Processed field values of the object list,
+                sorted by ascending length.
+
+        Returns:
+            list[int] | None: For each object, the index after the last object
+                whose value is short enough to score at least the threshold with it.
+                None if the scorer has no length bound.
+        """
+        bound = LENGTH_BOUNDS.get(self.scorer)
+        if bound is None:
+            return None
+        lengths = [len(value) for value in str_list]
+        lengths_ = sorted(set(lengths))
+        ends = {}
+        for index, short in enumerate(lengths_):
+            # bounds only decrease as the other value gets longer
+            low, high = index, len(lengths_)
+            while low < high:
+                middle = (low + high) // 2
+                if bound(short, lengths_[middle]) >= self.threshold - BOUND_TOLERANCE:
+                    low = middle + 1
+                else:
+                    high = middle
+            max_length = lengths_[low - 1] if low > index else short - 1
+            ends[short] = bisect_left(lengths, max_length + 1)
+        return [ends[length] for length in lengths]
+
+    def get_match_pairs(
+        self, str_list: list[str], block: list[int], ends: list[int] | None = None
+    ) -> Iterator[tuple[int, int, float]]:
+        """Get matching pairs in a block by scoring it in tiles with cdist.
+
+        Each tile scores at most strip_size by tile_size values,
+        which bounds the memory used regardless of block size.
+
+        Args:
+            str_list (list[str]): Processed field values of the object list.
+            block (list[int]): Ascending object indices of the block.
+            ends (list[int] | None): Length window ends from get_length_ends.
+                If given, tiles past the window of every query are not scored.
+
+        Yields:
+            Iterator[tuple[int, int, float]]: Object indices and score of each pair
+                scoring at least the threshold.
+        """
+        for start in range(0, len(block), self.strip_size):
+            query_indices = block[start : start + self.strip_size]
+            block_end = len(block)
+            if ends is not None:
+                block_end = bisect_left(block, max(ends[index] for index in query_indices))
+            # only score the upper triangle, since scoring is done
+            # with the earlier object as the query
+            for choice_start in range(start, block_end, self.tile_size):
+                choice_indices = block[choice_start : min(choice_start + self.tile_size, block_end)]
+                yield from self.score_tile(
+                    str_list, query_indices, choice_indices, diagonal=choice_start == start
+                )
 
-    def execute(self, obj_set_list: list[set[RenameMe]]) -> list[set[RenameMe]]:
+    def score_tile(
+        self,
+        str_list: list[str],
+        query_indices: list[int],
+        choice_indices: list[int],
+        diagonal: bool = False,
+    ) -> Iterator[tuple[int, int, float]]:
+        """Get matching pairs in a tile by scoring it with cdist.
+
+        Args:
+            str_list (list[str]): Processed field values of the object list.
+            query_indices (list[int]): Ascending object indices of the rows.
+            choice_indices (list[int]): Ascending object indices of the columns.
+            diagonal (bool): Whether the rows and columns start at the same object,
+                in which case only pairs above the diagonal are matched.
+
+        Yields:
+            Iterator[tuple[int, int, float]]: Object indices and score of each pair
+                scoring at least the threshold.
+        """
+        if not choice_indices:
+            return
+        matrix = cdist(
+            [str_list[index] for index in query_indices],
+            [str_list[index] for index in choice_indices],
+            scorer=self.scorer,
+            processor=None,
+            score_cutoff=self.threshold,
+            # float32 scores would not equal those of extract, as thresholds of the graph
+            dtype=np.float64,
+            workers=self.workers,
+        )
+        # scores below the cutoff are zeroed
+        mask = matrix > 0 if self.threshold > 0 else np.ones(matrix.shape, dtype=bool)
+        comparisons = matrix.size
+        if diagonal:
+            mask = np.triu(mask, k=1)
+            # pairs on or below the diagonal are not comparisons
+            comparisons = int(
+                np.clip(len(choice_indices) - 1 - np.arange(len(query_indices)), 0, None).sum()
+            )
+        if self.observer is not None:
+            self.observer.count(self, "comparisons", comparisons)
+        for row, column in zip(*np.nonzero(mask), strict=True):
+            yield query_indices[row], choice_indices[column], float(matrix[row, column])
+
+    def execute(self, obj_set_list: Iterable[Iterable[RenameMe]]) -> list[set[RenameMe]]:
         """Perform deduping on the object set list by splitting up candidate sets.
 
         Args:
-            obj_set_list (list[set[RenameMe]]): Object set list.
+            obj_set_list (Iterable[Iterable[RenameMe]]): Object set list.
 
         Returns:
             list[set[RenameMe]]: Deduped object set list.
         """
         _obj_set_list = []
         for obj_set in obj_set_list:
-            obj_list = list(obj_set)
-            new_obj_set_list = []
-            for index, obj in enumerate(obj_list):
+            if self.observer is not None:
+                self.observer.count(self, "groups")
+            # values are processed once per run, rather than once per comparison
+            column = self.columns.get_column(self.field, processor=process_str)
+            obj_list, copy_map = self.get_compared_obj_list(obj_set, column)
+            str_list = [column[obj] for obj in obj_list]
+            ends = self.get_length_ends(str_list)
+            if self.vectorized:
+                new_obj_set_list = self.execute_vectorized(obj_list, str_list, ends)
+            else:
+                new_obj_set_list = self.execute_extract(obj_list, str_list, ends)
+            if copy_map is not None:
+                new_obj_set_list = self.expand_copies(new_obj_set_list, copy_map, column)
+            _obj_set_list.extend(new_obj_set_list)
+        return [obj_set for obj_set in _obj_set_list if len(obj_set) > 1]
+
+    def get_compared_obj_list(
+        self, obj_set: Iterable[RenameMe], column: list[str]
+    ) -> tuple[list[RenameMe], dict[str, list[RenameMe]] | None]:
+        """Get the objects of a candidate set to compare, in the order they are compared.
+
+        Args:
+            obj_set (Iterable[RenameMe]): Object set.
+            column (list[str]): Processed field values, indexed by object.
+
+        Returns:
+            tuple[list[RenameMe], dict[str, list[RenameMe]] | None]: Objects to compare,
+                and the copy map from get_copy_map.
+        """
+        obj_list = list(obj_set)
+        copy_map = self.get_copy_map(obj_list, column)
+        if copy_map is not None:
+            # only the first object with each value is compared
+            obj_list = [copy_list[0] for copy_list in copy_map.values()]
+        if self.scorer in LENGTH_BOUNDS:
+            obj_list.sort(key=lambda obj: len(column[obj]))
+        return obj_list, copy_map
+
+    def get_copy_map(
+        self, obj_list: list[RenameMe], column: list[str]
+    ) -> dict[str, list[RenameMe]] | None:
+        """Get the objects with each distinct processed value.
+
+        Objects with identical values score the same against every other object,
+        so only one of them needs to be compared. This does not hold with blockers,
+        since copies may be in different blocks, and blockers may be fitted
+        on the frequencies of values.
+
+        Args:
+            obj_list (list[RenameMe]): Object list.
+            column (list[str]): Processed field values, indexed by object.
+
+        Returns:
+            dict[str, list[RenameMe]] | None: Objects by value, in order of first
+                appearance. None if there are blockers.
+        """
+        if self.blockers:
+            return None
+        copy_map = {}
+        for obj in obj_list:
+            copy_map.setdefault(column[obj], []).append(obj)
+        return copy_map
+
+    def expand_copies(
+        self,
+        obj_set_list: list[set[RenameMe]],
+        copy_map: dict[str, list[RenameMe]],
+        column: list[str],
+    ) -> list[set[RenameMe]]:
+        """Expand groups of compared objects to every object with their values.
+
+        Copies of a value that matched no other value are only grouped if the
+        value matches itself, since the scorer may not score an empty value 100.
+
+        Args:
+            obj_set_list (list[set[RenameMe]]): Object set list of the compared objects.
+            copy_map (dict[str, list[RenameMe]]): Objects by value, from get_copy_map.
+            column (list[str]): Processed field values, indexed by object.
+
+        Returns:
+            list[set[RenameMe]]: Object set list.
+        """
+        _obj_set_list = []
+        grouped = set()
+        for obj_set in obj_set_list:
+            if len(obj_set) > 1:
+                grouped.update(obj_set)
+                _obj_set_list.append({copy for obj in obj_set for copy in copy_map[column[obj]]})
+        for value, copy_list in copy_map.items():
+            if len(copy_list) > 1 and copy_list[0] not in grouped:
+                if self.observer is not None:
+                    self.observer.count(self, "comparisons")
+                if self.scorer(value, value) >= self.threshold:
+                    _obj_set_list.append(set(copy_list))
+        return _obj_set_list
+
+    def get_scored_pairs(
+        self, obj_list: list[RenameMe], str_list: list[str], ends: list[int] | None = None
+    ) -> Iterator[tuple[int, int, float]]:
+        """Get the pairs of an object list scoring at least the threshold.
+
+        Args:
+            obj_list (list[RenameMe]): Object list.
+            str_list (list[str]): Processed field values of the object list.
+            ends (list[int] | None): Length window ends from get_length_ends.
+
+        Yields:
+            Iterator[tuple[int, int, float]]: Object indices and score of each pair,
+                with the earlier object first.
+        """
+        if self.vectorized:
+            for block in self.get_block_lists(obj_list, str_list):
+                yield from self.get_match_pairs(str_list, block, ends)
+            return
+        candidate_lists = self.get_candidate_lists(obj_list, str_list)
+        for index in range(len(obj_list)):
+            # later objects past the end are too long to match
+            end = len(obj_list) if ends is None else ends[index]
+            if candidate_lists is None:
                 # compare the object with remainder of list.
                 # we do this since previous objects in the list
                 # have already been compared.
-                compare_list = obj_list[index + 1 :]
-                results = extract(
-                    query=self.get_str_field(obj, self.field),
-                    choices=[self.get_str_field(_obj, self.field) for _obj in compare_list],
-                    processor=default_process,
-                    score_cutoff=self.threshold,
-                )
-                # make a set with object and other duplicates
-                # that score high enough.
-                new_obj_set = {obj}
-                for _, _, _index in results:
-                    new_obj_set.add(obj_list[index + _index + 1])
-                new_obj_set_list.append(new_obj_set)
+                compare_indices = range(index + 1, end)
+            else:
+                # only compare with the remainder of list that shares a block.
+                compare_indices = candidate_lists[index]
+                compare_indices = compare_indices[: bisect_left(compare_indices, end)]
+            if self.observer is not None:
+                self.observer.count(self, "comparisons", len(compare_indices))
+            results = extract(
+                query=str_list[index],
+                choices=[str_list[_index] for _index in compare_indices],
+                scorer=self.scorer,
+                processor=None,
+                score_cutoff=self.threshold,
+                limit=None,
+            )
+            for _, score, _index in results:
+                yield index, compare_indices[_index], score
+
+    def execute_extract(
+        self, obj_list: list[RenameMe], str_list: list[str], ends: list[int] | None = None
+    ) -> list[set[RenameMe]]:
+        """Dedupe an object list by scoring each object against later objects with extract.
 
+        Args:
+            obj_list (list[RenameMe]): Object list.
+            str_list (list[str]): Processed field values of the object list.
+            ends (list[int] | None): Length window ends from get_length_ends.
+
+        Returns:
+            list[set[RenameMe]]: Deduped object set list.
+        """
+        # make a set with each object and the later duplicates
+        # that score high enough.
+        new_obj_set_list = [{obj} for obj in obj_list]
+        for first, second, _ in self.get_scored_pairs(obj_list, str_list, ends):
+            new_obj_set_list[first].add(obj_list[second])
+        return self.condense_obj_set_list(new_obj_set_list)
+
+    def execute_vectorized(
+        self, obj_list: list[RenameMe], str_list: list[str], ends: list[int] | None = None
+    ) -> list[set[RenameMe]]:
+        """Dedupe an object list by scoring its blocks in tiles with cdist.
+
+        Matching pairs are joined directly with a disjoint set,
+        so the result is the same as the row by row comparison.
+
+        Args:
+            obj_list (list[RenameMe]): Object list.
+            str_list (list[str]): Processed field values of the object list.
+            ends (list[int] | None): Length window ends from get_length_ends.
+
+        Returns:
+            list[set[RenameMe]]: Deduped object set list.
+        """
+        disjoint_set = DisjointSet(range(len(obj_list)))
+        for block in self.get_block_lists(obj_list, str_list):
+            for first, second, _ in self.get_match_pairs(str_list, block, ends):
+                disjoint_set.union(first, second)
+        return [{obj_list[index] for index in index_set} for index_set in disjoint_set.groups()]
+
+    def get_similarity_graph(
+        self,
+        group_list: Iterable[Iterable[int]],
+        columns: ColumnStore,
+        observer: Observer | None = None,
+    ) -> SimilarityGraph:
+        """Score the pairs of each candidate set once, for grouping at any threshold.
+
+        The module threshold is the floor of the graph, so the groups of
+        the graph at any threshold of at least the floor are those of
+        running the module with that threshold instead. Copies of a value
+        are joined in a chain, scored by the best score they could be
+        grouped by, either with each other or through another value.
+
+        Args:
+            group_list (Iterable[Iterable[int]]): Record id groups.
+            columns (ColumnStore): Column store of the records.
+            observer (Observer | None): Observer notified of events while scoring.
+
+        Returns:
+            SimilarityGraph: Similarity graph.
+        """
+        first, second, scores = self.copy_for_run(columns, observer).get_graph_edges(group_list)
+        return SimilarityGraph(len(columns), first, second, scores, self.threshold)
+
+    def get_graph_edges(self, group_list: Iterable[Iterable[int]]) -> tuple[array, array, array]:
+        """Score the edges of the similarity graph, on a copy made for the run.
+
+        Args:
+            group_list (Iterable[Iterable[int]]): Record id groups.
+
+        Returns:
+            tuple[array, array, array]: First record ids, second record ids and
+                scores of the edges.
+        """
+        first, second, scores = array("q"), array("q"), array("d")
+        column = self.columns.get_column(self.field, processor=process_str)
+        for obj_set in group_list:
+            if self.observer is not None:
+                self.observer.count(self, "groups")
+            obj_list, copy_map = self.get_compared_obj_list(obj_set, column)
+            str_list = [column[obj] for obj in obj_list]
+            best_scores = [-np.inf] * len(obj_list)
+            for index, other, score in self.get_scored_pairs(
+                obj_list, str_list, self.get_length_ends(str_list)
+            ):
+                first.append(obj_list[index])
+                second.append(obj_list[other])
+                scores.append(score)
+                best_scores[index] = max(best_scores[index], score)
+                best_scores[other] = max(best_scores[other], score)
+            if copy_map is None:
+                continue
+            for value, best_score in zip(str_list, best_scores, strict=True):
+                if len(copy_list := copy_map[value]) == 1:
+                    continue
+                if self.observer is not None:
+                    self.observer.count(self, "comparisons")
+                score = max(self.scorer(value, value), best_score)
+                if score >= self.threshold:
+                    for previous, following in pairwise(copy_list):
+                        first.append(previous)
+                        second.append(following)
+                        scores.append(score)
+        return first, second, scores
+
+
+class MinHashDedupe(DedupeModule):
+    """Dedupe long text, such as abstracts, by the similarity of their word shingles.
+
+    Each value is split into shingles of consecutive words and summarized by
+    a MinHash signature. Signatures are split into bands, and objects are only
+    compared when every row of a band is equal (locality sensitive hashing),
+    so the cost is about linear in the number of objects. Candidate pairs are
+    joined if the Jaccard similarity of their shingle sets meets the threshold.
+    """
+
+    # maximum number of shingle hashes permuted at once, which bounds memory use
+    chunk_size = 1 << 16
+
+    def __init__(
+        self,
+        field: str,
+        threshold: float = 0.8,
+        shingle_size: int = 3,
+        num_perm: int = 128,
+        bands: int | None = None,
+        seed: int = 0,
+    ):
+        """Create dedupe module.
+
+        Args:
+            field (str): Object field. Values from this field should be string or None.
+            threshold (float): Jaccard similarity cutoff for successful match. Between 0-1.
+            shingle_size (int): Number of words in each shingle.
+            num_perm (int): Number of hash permutations in each signature.
+            bands (int | None): Number of bands the signatures are split into, which must
+                divide num_perm. More bands find more candidates. If None, the number
+                of bands is chosen from the threshold.
+            seed (int): Seed of the hash permutations.
+        """
+        self.field = field
+        self.threshold = threshold
+        self.shingle_size = shingle_size
+        self.num_perm = num_perm
+        self.bands = bands
+        self.seed = seed
+
+    def get_fields(self) -> list[str] | None:
+        """Get the fields the module reads.
+
+        Returns:
+            list[str] | None: Field paths.
+        """
+        return [self.field]
+
+    def get_band_count(self) -> int:
+        """Get the number of bands the signatures are split into.
+
+        A pair with similarity s is a candidate with probability 1 - (1 - s^r)^b,
+        for b bands of r rows, which rises steeply around (1/b)^(1/r). Unless set,
+        the fewest bands are used that keep this point below the threshold,
+        so pairs at the threshold are likely candidates.
+
+        Returns:
+            int: Number of bands.
+        """
+        if self.bands is not None:
+            return self.bands
+        for bands in range(1, self.num_perm + 1):
+            if (
+                self.num_perm % bands == 0
+                and (1 / bands) ** (bands / self.num_perm) <= self.threshold
+            ):
+                return bands
+        return self.num_perm
+
+    def get_shingles(self, value: str, word_hashes: dict[str, int]) -> np.ndarray:
+        """Get the hashes of the word shingles of a processed value.
+
+        Words are hashed once, and the hashes of consecutive words are combined
+        into shingle hashes with numpy. Values shorter than the shingle size
+        are a single shingle.
+
+        Args:
+            value (str): Processed value.
+            word_hashes (dict[str, int]): Cache of word hashes, shared between values.
+
+        Returns:
+            np.ndarray: Distinct shingle hashes.
+        """
+        words = value.split()
+        for word in words:
+            if word not in word_hashes:
+                # crc32 is stable between processes, unlike hash
+                word_hashes[word] = zlib.crc32(word.encode())
+        hashes = np.fromiter(map(word_hashes.__getitem__, words), dtype=np.uint64, count=len(words))
+        count = len(words) - min(self.shingle_size, len(words)) + 1
+        shingles = hashes[:count].copy()
+        for offset in range(1, len(words) - count + 1):
+            # products wrap around, mixing the word hashes in order
+            shingles *= SHINGLE_MULTIPLIER
+            shingles += hashes[offset : offset + count]
+        return np.unique(shingles)
+
+    def get_signatures(self, shingles_list: list[np.ndarray]) -> np.ndarray:
+        """Get the MinHash signatures of shingle hash sets.
+
+        Hashes are permuted by multiply-shift hashing, and signatures
+        are computed for many sets at once in chunks of chunk_size hashes.
+
+        Args:
+            shingles_list (list[np.ndarray]): Non-empty shingle hash sets.
+
+        Returns:
+            np.ndarray: Signature of each set, with num_perm columns.
+        """
+        rng = np.random.default_rng(self.seed)
+        # odd multipliers make the permutations of 64 bit values bijective
+        multipliers = rng.integers(0, 2**64, self.num_perm, dtype=np.uint64, endpoint=False) | 1
+        increments = rng.integers(0, 2**64, self.num_perm, dtype=np.uint64, endpoint=False)
+        signatures = np.empty((len(shingles_list), self.num_perm), dtype=np.uint64)
+        start = 0
+        while start < len(shingles_list):
+            end = start + 1
+            total = len(shingles_list[start])
+            while end < len(shingles_list) and total + len(shingles_list[end]) <= self.chunk_size:
+                total += len(shingles_list[end])
+                end += 1
+            chunk = shingles_list[start:end]
+            offsets = np.cumsum([0] + [len(shingles) for shingles in chunk[:-1]])
+            # products wrap around, keeping the high bits of the low 64 bits
+            # each permutation is a row, so the minimum of each set is taken along a row
+            permuted = np.multiply(multipliers[:, None], np.concatenate(chunk))
+            permuted += increments[:, None]
+            permuted >>= np.uint64(32)
+            signatures[start:end] = np.minimum.reduceat(permuted, offsets, axis=1).T
+            start = end
+        return signatures
+
+    def get_buckets(self, signatures: np.ndarray) -> Iterator[np.ndarray]:
+        """Get the buckets of signatures that are equal in any band.
+
+        Args:
+            signatures (np.ndarray): Signatures.
+
+        Yields:
+            Iterator[np.ndarray]: Ascending signature indices of each bucket with
+                two or more signatures.
+        """
+        bands = self.get_band_count()
+        rows = self.num_perm // bands
+        for band in range(bands):
+            # each band row is viewed as a single opaque value, so bands are grouped with numpy
+            keys = np.ascontiguousarray(signatures[:, band * rows : (band + 1) * rows])
+            keys = keys.view(np.dtype((np.void, rows * keys.itemsize))).ravel()
+            _, inverse, counts = np.unique(keys, return_inverse=True, return_counts=True)
+            order = np.argsort(inverse, kind="stable")
+            bounds = np.cumsum(counts)
+            for bucket in np.flatnonzero(counts > 1):
+                yield order[bounds[bucket] - counts[bucket] : bounds[bucket]]
+
+    def execute(self, obj_set_list: Iterable[Iterable[RenameMe]]) -> list[set[RenameMe]]:
+        """Perform deduping on the object set list by splitting up candidate sets.
+
+        Args:
+            obj_set_list (Iterable[Iterable[RenameMe]]): Object set list.
+
+        Returns:
+            list[set[RenameMe]]: Deduped object set list.
+        """
+        column = self.columns.get_column(self.field, processor=process_str)
+        _obj_set_list = []
+        for obj_set in obj_set_list:
+            if self.observer is not None:
+                self.observer.count(self, "groups")
+            # objects without any words can not match
+            obj_list = []
+            shingles_list = []
+            word_hashes = {}
+            for obj in obj_set:
+                if column[obj]:
+                    obj_list.append(obj)
+                    shingles_list.append(self.get_shingles(column[obj], word_hashes))
+            if len(obj_list) < 2:
+                continue
+            shingle_sets = [None] * len(obj_list)
+            disjoint_set = DisjointSet()
+            rejected_pairs = set()
+            for bucket in self.get_buckets(self.get_signatures(shingles_list)):
+                bucket = bucket.tolist()
+                for position, first in enumerate(bucket):
+                    for second in bucket[position + 1 :]:
+                        if (first, second) in rejected_pairs or (
+                            first in disjoint_set
+                            and second in disjoint_set
+                            and disjoint_set.find(first) == disjoint_set.find(second)
+                        ):
+                            continue
+                        if self.observer is not None:
+                            self.observer.count(self, "comparisons")
+                        for index in (first, second):
+                            if shingle_sets[index] is None:
+                                shingle_sets[index] = set(shingles_list[index].tolist())
+                        intersection = len(shingle_sets[first] & shingle_sets[second])
+                        union = len(shingle_sets[first]) + len(shingle_sets[second]) - intersection
+                        if intersection >= self.threshold * union:
+                            disjoint_set.union(first, second)
+                        else:
+                            rejected_pairs.add((first, second))
+            _obj_set_list.extend(
+                {obj_list[index] for index in index_set} for index_set in disjoint_set.groups()
+            )
+        return [obj_set for obj_set in _obj_set_list if len(obj_set) > 1]
+
+
+class TfidfDedupe(DedupeModule):
+    """Dedupe by the cosine similarity of TF-IDF vectors of object field values.
+
+    Values are split into words, or character n-grams, and weighted by how rare
+    they are in the candidate set, so word order does not matter and a truncated
+    value still matches on its rare words. Vectors are scored against each other
+    in chunks of rows with a sparse matrix product, using an inverted index of
+    the vectors, so only pairs sharing a term are scored and memory use is
+    bounded by chunk_size.
+    """
+
+    # maximum number of term products computed at once, which bounds memory use
+    chunk_size = 1 << 20
+
+    def __init__(
+        self,
+        field: str,
+        threshold: float = 0.8,
+        char_ngrams: int | None = None,
+        top_k: int | None = None,
+    ):
+        """Create dedupe module.
+
+        Args:
+            field (str): Object field. Values from this field should be string or None.
+            threshold (float): Cosine similarity cutoff for successful match. Between 0-1.
+            char_ngrams (int | None): Length of the character n-grams used as terms.
+                If None, words are used as terms.
+            top_k (int | None): Maximum number of matches kept for each object,
+                among the objects after it. If None, every match is kept.
+        """
+        self.field = field
+        self.threshold = threshold
+        self.char_ngrams = char_ngrams
+        self.top_k = top_k
+
+    def get_fields(self) -> list[str] | None:
+        """Get the fields the module reads.
+
+        Returns:
+            list[str] | None: Field paths.
+        """
+        return [self.field]
+
+    def get_terms(self, value: str) -> list[str]:
+        """Get the terms of a processed value.
+
+        Args:
+            value (str): Processed value.
+
+        Returns:
+            list[str]: Terms.
+        """
+        if self.char_ngrams is None:
+            return value.split()
+        size = min(self.char_ngrams, len(value))
+        return [value[i : i + size] for i in range(len(value) - size + 1)]
+
+    def get_vectors(self, str_list: list[str]) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Get the L2 normalized TF-IDF vectors of processed values, as a sparse matrix.
+
+        Term frequencies are sublinear, 1 + log(tf), and inverse document
+        frequencies are smoothed, 1 + log((1 + n) / (1 + df)).
+
+        Args:
+            str_list (list[str]): Non-empty processed values.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray, np.ndarray]: Row offsets, term ids and weights
+                of the rows, in compressed sparse row format, sorted by term id within rows.
+        """
+        vocabulary = {}
+        term_lists = [
+            [vocabulary.setdefault(term, len(vocabulary)) for term in self.get_terms(value)]
+            for value in str_list
+        ]
+        rows = np.repeat(
+            np.arange(len(str_list), dtype=np.int64), [len(term_list) for term_list in term_lists]
+        )
+        terms = np.fromiter(
+            (term for term_list in term_lists for term in term_list),
+            dtype=np.int64,
+            count=len(rows),
+        )
+        # distinct row and term pairs are sorted by row, then term
+        keys, counts = np.unique(rows * len(vocabulary) + terms, return_counts=True)
+        rows, terms = np.divmod(keys, len(vocabulary))
+        document_counts = np.bincount(terms, minlength=len(vocabulary))
+        idf = 1 + np.log((1 + len(str_list)) / (1 + document_counts))
+        weights = (1 + np.log(counts)) * idf[terms]
+        offsets = np.concatenate(([0], np.cumsum(np.bincount(rows, minlength=len(str_list)))))
+        norms = np.sqrt(np.add.reduceat(weights * weights, offsets[:-1]))
+        weights /= np.repeat(norms, np.diff(offsets))
+        return offsets, terms, weights
+
+    def get_match_lists(self, str_list: list[str]) -> list[list[int]]:
+        """Get the later values each value matches, by scoring chunks of rows.
+
+        Args:
+            str_list (list[str]): Non-empty processed values.
+
+        Returns:
+            list[list[int]]: For each value, the indices of later values
+                with a cosine similarity of at least the threshold.
+        """
+        offsets, terms, weights = self.get_vectors(str_list)
+        rows = np.repeat(np.arange(len(str_list), dtype=np.int64), np.diff(offsets))
+        # inverted index: the rows and weights of each term, in row order
+        order = np.argsort(terms, kind="stable")
+        term_rows, term_weights = rows[order], weights[order]
+        term_counts = np.bincount(terms)
+        term_offsets = np.concatenate(([0], np.cumsum(term_counts)))
+        # each entry of a row is multiplied with every entry of its term
+        row_costs = np.add.reduceat(term_counts[terms], offsets[:-1])
+        match_lists = [[] for _ in str_list]
+        start = 0
+        while start < len(str_list):
+            end = start + 1
+            cost = row_costs[start]
+            while end < len(str_list) and cost + row_costs[end] <= self.chunk_size:
+                cost += row_costs[end]
+                end += 1
+            entries = np.arange(offsets[start], offsets[end])
+            lengths = term_counts[terms[entries]]
+            repeated = np.repeat(entries, lengths)
+            positions = np.arange(len(repeated)) + np.repeat(
+                term_offsets[terms[entries]] - (np.cumsum(lengths) - lengths), lengths
+            )
+            first, second = rows[repeated], term_rows[positions]
+            # only score each pair once, with the earlier value as the query
+            later = second > first
+            products = weights[repeated[later]] * term_weights[positions[later]]
+            pairs, inverse = np.unique(
+                (first[later] - start) * len(str_list) + second[later], return_inverse=True
+            )
+            scores = np.bincount(inverse, weights=products)
+            if self.observer is not None:
+                self.observer.count(self, "comparisons", len(pairs))
+            # identical values can score slightly below 1 from floating point error
+            matched = scores >= self.threshold - BOUND_TOLERANCE
+            pairs, scores = pairs[matched], scores[matched]
+            first, second = np.divmod(pairs, len(str_list))
+            if self.top_k is not None:
+                # keep the best scoring matches of each row
+                order = np.lexsort((-scores, first))
+                first, second = first[order], second[order]
+                row_starts = np.searchsorted(first, first)
+                kept = np.arange(len(first)) - row_starts < self.top_k
+                first, second = first[kept], second[kept]
+            for row, match in zip((first + start).tolist(), second.tolist(), strict=True):
+                match_lists[row].append(match)
+            start = end
+        return match_lists
+
+    def execute(self, obj_set_list: Iterable[Iterable[RenameMe]]) -> list[set[RenameMe]]:
+        """Perform deduping on the object set list by splitting up candidate sets.
+
+        Args:
+            obj_set_list (Iterable[Iterable[RenameMe]]): Object set list.
+
+        Returns:
+            list[set[RenameMe]]: Deduped object set list.
+        """
+        column = self.columns.get_column(self.field, processor=process_str)
+        _obj_set_list = []
+        for obj_set in obj_set_list:
+            if self.observer is not None:
+                self.observer.count(self, "groups")
+            # objects without any terms can not match
+            obj_list = [obj for obj in obj_set if column[obj]]
+            if len(obj_list) < 2:
+                continue
+            match_lists = self.get_match_lists([column[obj] for obj in obj_list])
+            new_obj_set_list = [
+                {obj_list[index], *(obj_list[match] for match in match_list)}
+                for index, match_list in enumerate(match_lists)
+                if match_list
+            ]
             _obj_set_list.extend(self.condense_obj_set_list(new_obj_set_list))
         return [obj_set for obj_set in _obj_set_list if len(obj_set) > 1]
 
@@ -344,9 +1529,32 @@ class Deduper:
     """Deduper."""
 
     modules: list[DedupeModule]
+    # field paths that select the primary object of each duplicate group,
+    # in order of priority; the object with the largest values is primary,
+    # unless the field path is prefixed with "-", then the smallest is
+    primary_keys: Sequence[str] = ()
+    # functions getting the values of fields from a record, by field,
+    # for fields that can not be read by their field path
+    extractors: ClassVar[dict[str, Callable[[Any], Any]]] = {}
+
+    @classmethod
+    def get_fields(cls) -> list[str] | None:
+        """Get the fields the modules read.
+
+        Returns:
+            list[str] | None: Field paths, or None if any module reads whole records.
+        """
+        fields = []
+        for module in cls.modules:
+            if (module_fields := module.get_fields()) is None:
+                return None
+            fields.extend(field for field in module_fields if field not in fields)
+        return fields
 
     @classmethod
-    def get_duplicates(cls, qs: list[RenameMe]) -> list[set[RenameMe]]:
+    def get_duplicates(
+        cls, qs: list[RenameMe], workers: int = 1, observer: Observer | None = None
+    ) -> list[list[RenameMe]]:
         """Get duplicates from a queryset.
 
         This is done by piping the results from the first dedupe module
@@ -355,14 +1563,55 @@ class Deduper:
 
         Args:
             qs (list[RenameMe]): queryset.
+            workers (int): Number of processes used to execute modules.
+                If greater than 1, the candidate sets of each module are executed
+                in parallel. The result is the same as executing them serially.
+            observer (Observer | None): Observer notified as each module runs,
+                such as a StatsCollector.
 
         Returns:
-            list[set[RenameMe]]: Duplicates.
+            list[list[RenameMe]]: Duplicates.
         """
-        obj_set_list = [qs]
-        for module in cls.modules:
-            obj_set_list = module.really_execute(obj_set_list)
-        return obj_set_list
+        records = list(qs)
+        # every module reads from the same columns, so each field
+        # is extracted and processed once per run
+        columns = ColumnStore(records, cls.extractors)
+        group_list = cls.run_modules(columns, workers, observer)
+        return [[records[index] for index in group] for group in group_list]
+
+    @classmethod
+    def run_modules(
+        cls, columns: ColumnStore, workers: int = 1, observer: Observer | None = None
+    ) -> GroupList:
+        """Run every module on the records of a column store.
+
+        Args:
+            columns (ColumnStore): Columns of the records.
+            workers (int): Number of processes used to execute modules.
+            observer (Observer | None): Observer notified as each module runs.
+
+        Returns:
+            GroupList: Duplicate record id groups.
+        """
+        # groups are passed between modules as compact record id arrays,
+        # and are only materialized as objects after the last module
+        group_list = GroupList.from_sizes([len(columns)])
+        # several batches per worker evens out cost estimate errors
+        batch_count = workers * 4
+        with ProcessPoolExecutor(workers) if workers > 1 else nullcontext() as executor:
+            for module in cls.modules:
+                if observer is not None:
+                    observer.start_module(module, group_list)
+                # a single candidate set can not be split up
+                if executor is not None and len(group_list) > 1:
+                    group_list = run_parallel(
+                        module, group_list, columns, executor, batch_count, observer
+                    )
+                else:
+                    group_list = module.run(group_list, columns, observer)
+                if observer is not None:
+                    observer.finish_module(module, group_list)
+        return group_list
 
     @classmethod
     def score_obj(cls, obj: RenameMe) -> Any:
@@ -370,7 +1619,8 @@ class Deduper:
 
         This is used to determine the primary object in a set of duplicates.
 
-        Override this method to provide custom scoring.
+        Override this method to provide custom scoring. For scores
+        computed from fields, primary_keys is faster.
 
         Args:
             obj (RenameMe): Object.
@@ -378,10 +1628,55 @@ class Deduper:
         Returns:
             Any: Object score.
         """
-        # TODO maybe catch if this is not overridden and just fetch first instead
-        # technically it does this, but it runs this method on every obj when its unnecessary
         return 1
 
+    @classmethod
+    def get_primaries(cls, group_list: GroupList, columns: ColumnStore) -> list[int]:
+        """Get the position of the primary object in each group.
+
+        Objects are only compared with the other objects of their group, by
+        score_obj if it is overridden, otherwise by primary_keys. Ties go to
+        the first object of the group.
+
+        Args:
+            group_list (GroupList): Record id groups.
+            columns (ColumnStore): Columns of the records.
+
+        Returns:
+            list[int]: Position of the primary record id within each group.
+        """
+        if cls.score_obj.__func__ is not Deduper.score_obj.__func__:
+            primaries = []
+            for group in group_list:
+                scores = [cls.score_obj(columns.records[index]) for index in group]
+                primaries.append(scores.index(max(scores)))
+            return primaries
+        if not cls.primary_keys:
+            return [0] * len(group_list)
+        key_columns = [
+            (columns.get_column(key.removeprefix("-")), key.startswith("-"))
+            for key in cls.primary_keys
+        ]
+        primaries = []
+        for group in group_list:
+            positions = range(len(group))
+            for column, smallest in key_columns:
+                values = [column[group[position]] for position in positions]
+                # None values are never primary, unless every value is None
+                present = [value for value in values if value is not None]
+                if not present:
+                    continue
+                best = min(present) if smallest else max(present)
+                positions = [
+                    position
+                    for position, value in zip(positions, values, strict=True)
+                    if value is not None and value == best
+                ]
+                if len(positions) == 1:
+                    break
+            primaries.append(positions[0])
+        return primaries
+
     @classmethod
     def separate_duplicates(cls, obj_list: list[RenameMe]) -> tuple[RenameMe, list[RenameMe]]:
         """Determine a primary object among a list of duplicates.
@@ -393,21 +1688,32 @@ class Deduper:
             tuple[RenameMe, list[RenameMe]]: The first element is the primary,
                 the second element is a list of secondaries.
         """
-        # TODO remove copy, use slicing instead
-        _obj_list = obj_list.copy()
-        scores = [cls.score_obj(obj) for obj in _obj_list]
-        return _obj_list.pop(scores.index(max(scores))), _obj_list
+        group_list = GroupList.from_sizes([len(obj_list)])
+        primary = cls.get_primaries(group_list, ColumnStore(obj_list, cls.extractors))[0]
+        return obj_list[primary], obj_list[:primary] + obj_list[primary + 1 :]
 
     @classmethod
-    def deduplicate(cls, qs: list[RenameMe]) -> list[tuple[RenameMe, list[RenameMe]]]:
+    def deduplicate(
+        cls, qs: list[RenameMe], workers: int = 1, observer: Observer | None = None
+    ) -> list[tuple[RenameMe, list[RenameMe]]]:
         """Deduplicate a queryset.
 
+        Primary objects are selected for every group at once,
+        and not at all if neither score_obj nor primary_keys is set.
+
         Args:
             qs (list[RenameMe]): queryset.
+            workers (int): Number of processes used to execute modules.
+            observer (Observer | None): Observer notified as each module runs.
+
+        Returns:
+            list[tuple[RenameMe, list[RenameMe]]]: Primary and secondaries of each group.
         """
-        duplicates = cls.get_duplicates(qs)
+        records = list(qs)
+        columns = ColumnStore(records, cls.extractors)
+        group_list = cls.run_modules(columns, workers, observer)
         separated_duplicates = []
-        for obj_set in duplicates:
-            primary_secondary_tuple = cls.separate_duplicates(list(obj_set))
-            separated_duplicates.append(primary_secondary_tuple)
+        for group, primary in zip(group_list, cls.get_primaries(group_list, columns), strict=True):
+            objs = [records[index] for index in group]
+            separated_duplicates.append((objs[primary], objs[:primary] + objs[primary + 1 :]))
         return separated_duplicates
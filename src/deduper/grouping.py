@@ -0,0 +1,368 @@
+"""Grouping utilities."""
+from array import array
+from collections.abc import Hashable, Iterable, Iterator, Sequence
+
+import numpy as np
+
+
+def find_root(parent: list[int], node: int) -> int:
+    """Find the root of a node in a forest of parent pointers.
+
+    Args:
+        parent (list[int]): Parent of each node, where roots are their own parent.
+            Updated in place with path compression.
+        node (int): Node.
+
+    Returns:
+        int: Root of the tree containing the node.
+    """
+    root = node
+    while parent[root] != root:
+        root = parent[root]
+    # compress the path so later lookups are a single hop
+    while parent[node] != root:
+        parent[node], node = root, parent[node]
+    return root
+
+
+class DisjointSet:
+    """Disjoint-set forest (union-find) over hashable items.
+
+    Uses path compression and union by rank, so any sequence of
+    operations runs in near-linear time.
+    """
+
+    def __init__(self, items: Iterable[Hashable] = ()):
+        """Create disjoint set.
+
+        Args:
+            items (Iterable[Hashable]): Items to add as singletons.
+        """
+        self._nodes: dict[Hashable, int] = {}
+        self._items: list[Hashable] = []
+        self._parent: list[int] = []
+        self._rank: list[int] = []
+        for item in items:
+            self.add(item)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __contains__(self, item: Hashable) -> bool:
+        return item in self._nodes
+
+    def add(self, item: Hashable) -> int:
+        """Add an item as a singleton, if it is not already present.
+
+        Args:
+            item (Hashable): Item.
+
+        Returns:
+            int: Internal node of the item.
+        """
+        node = self._nodes.get(item)
+        if node is None:
+            node = len(self._items)
+            self._nodes[item] = node
+            self._items.append(item)
+            self._parent.append(node)
+            self._rank.append(0)
+        return node
+
+    def _find(self, node: int) -> int:
+        return find_root(self._parent, node)
+
+    def find(self, item: Hashable) -> Hashable:
+        """Get the representative item of the group containing an item.
+
+        Args:
+            item (Hashable): Item.
+
+        Raises:
+            KeyError: The item was never added.
+
+        Returns:
+            Hashable: Representative item.
+        """
+        return self._items[self._find(self._nodes[item])]
+
+    def union(self, first: Hashable, second: Hashable) -> bool:
+        """Join the groups of two items, adding the items if needed.
+
+        Args:
+            first (Hashable): First item.
+            second (Hashable): Second item.
+
+        Returns:
+            bool: Whether two separate groups were joined.
+        """
+        first_root = self._find(self.add(first))
+        second_root = self._find(self.add(second))
+        if first_root == second_root:
+            return False
+        # attach the shallower tree under the deeper one
+        if self._rank[first_root] < self._rank[second_root]:
+            first_root, second_root = second_root, first_root
+        self._parent[second_root] = first_root
+        if self._rank[first_root] == self._rank[second_root]:
+            self._rank[first_root] += 1
+        return True
+
+    def union_all(self, items: Iterable[Hashable]) -> None:
+        """Join the groups of all items, adding the items if needed.
+
+        Args:
+            items (Iterable[Hashable]): Items.
+        """
+        iterator = iter(items)
+        for first in iterator:
+            self.add(first)
+            # link every remaining item to the first
+            for item in iterator:
+                self.union(first, item)
+
+    def groups(self) -> list[set[Hashable]]:
+        """Get all groups.
+
+        Groups are ordered by their most recently added item,
+        which matches the order of DedupeModule.condense_obj_set_list.
+
+        Returns:
+            list[set[Hashable]]: Groups.
+        """
+        group_map = {}
+        for node in range(len(self._items) - 1, -1, -1):
+            root = self._find(node)
+            if root not in group_map:
+                group_map[root] = {self._items[node]}
+            else:
+                group_map[root].add(self._items[node])
+        return list(group_map.values())[::-1]
+
+
+def merge_pairs(
+    pairs: Iterable[tuple[Hashable, Hashable]], items: Iterable[Hashable] = ()
+) -> list[set[Hashable]]:
+    """Get connected components from pairs of items.
+
+    For example, if [(1,2),(2,3),(4,5)] is passed in, the result
+    would be [{1,2,3},{4,5}].
+
+    Args:
+        pairs (Iterable[tuple[Hashable, Hashable]]): Linked item pairs.
+        items (Iterable[Hashable]): Additional items, returned as singletons
+            if they are not in any pair.
+
+    Returns:
+        list[set[Hashable]]: Connected components.
+    """
+    disjoint_set = DisjointSet(items)
+    for first, second in pairs:
+        disjoint_set.union(first, second)
+    return disjoint_set.groups()
+
+
+def merge_sets(sets: Iterable[Iterable[Hashable]]) -> list[set[Hashable]]:
+    """Get connected components from sets of items.
+
+    For example, if [{1,2},{2,3},{4,5}] is passed in, the result
+    would be [{1,2,3},{4,5}].
+
+    Args:
+        sets (Iterable[Iterable[Hashable]]): Linked item sets.
+
+    Returns:
+        list[set[Hashable]]: Connected components.
+    """
+    disjoint_set = DisjointSet()
+    for items in sets:
+        disjoint_set.union_all(items)
+    return disjoint_set.groups()
+
+
+class GroupList(Sequence):
+    """Compact list of record id groups.
+
+    Groups are stored back to back in a flat members array,
+    with an offsets array marking where each group starts and ends.
+    """
+
+    def __init__(self, members: array | None = None, offsets: array | None = None):
+        """Create group list.
+
+        Args:
+            members (array | None): Record ids of every group, back to back.
+            offsets (array | None): Start of each group in members,
+                followed by the end of the last group.
+        """
+        self.members = array("q") if members is None else members
+        self.offsets = array("q", [0]) if offsets is None else offsets
+
+    @classmethod
+    def from_groups(cls, groups: Iterable[Iterable[int]]) -> "GroupList":
+        """Create group list from groups of record ids.
+
+        Record ids are sorted within each group.
+
+        Args:
+            groups (Iterable[Iterable[int]]): Record id groups.
+
+        Returns:
+            GroupList: Group list.
+        """
+        group_list = cls()
+        for group in groups:
+            group_list.append(sorted(group))
+        return group_list
+
+    @classmethod
+    def from_sizes(cls, sizes: Iterable[int]) -> "GroupList":
+        """Create group list of consecutive record ids.
+
+        For example, if [2,3] is passed in, the result would be [[0,1],[2,3,4]].
+
+        Args:
+            sizes (Iterable[int]): Size of each group.
+
+        Returns:
+            GroupList: Group list.
+        """
+        offsets = array("q", [0])
+        for size in sizes:
+            offsets.append(offsets[-1] + size)
+        return cls(array("q", range(offsets[-1])), offsets)
+
+    def append(self, group: Iterable[int]) -> None:
+        """Add a group to the end of the list.
+
+        Args:
+            group (Iterable[int]): Record ids.
+        """
+        self.members.extend(group)
+        self.offsets.append(len(self.members))
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index: int) -> array:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("group index out of range")
+        return self.members[self.offsets[index] : self.offsets[index + 1]]
+
+    def __iter__(self) -> Iterator[array]:
+        members, offsets = self.members, self.offsets
+        for index in range(len(offsets) - 1):
+            yield members[offsets[index] : offsets[index + 1]]
+
+
+class SimilarityGraph:
+    """Scored pairs of records, for grouping the records at any threshold above a floor.
+
+    Pairs are stored as arrays sorted by descending score. A single linkage
+    dendrogram is built once, as an order of the records in which every group
+    at every threshold is a contiguous run, along with the score joining each
+    record to the next. Grouping at a threshold then only cuts the order where
+    the joining score is below it, without scoring or joining any pairs.
+    """
+
+    def __init__(
+        self,
+        size: int,
+        first: Sequence[int],
+        second: Sequence[int],
+        scores: Sequence[float],
+        floor: float,
+    ):
+        """Create similarity graph.
+
+        Args:
+            size (int): Number of records.
+            first (Sequence[int]): Record id of the first record of each pair.
+            second (Sequence[int]): Record id of the second record of each pair.
+            scores (Sequence[float]): Score of each pair.
+            floor (float): Lowest score the pairs were scored down to.
+        """
+        scores = np.asarray(scores, dtype=np.float64)
+        order = np.argsort(-scores, kind="stable")
+        self.size = size
+        self.first = np.asarray(first, dtype=np.int64)[order]
+        self.second = np.asarray(second, dtype=np.int64)[order]
+        self.scores = scores[order]
+        self.floor = floor
+        self.order, self.heights = self.get_dendrogram()
+
+    def __len__(self) -> int:
+        return len(self.scores)
+
+    def get_dendrogram(self) -> tuple[np.ndarray, np.ndarray]:
+        """Get the single linkage dendrogram of the graph.
+
+        Pairs are joined in order of descending score, and each join appends
+        the records of one group after those of the other, so the records of
+        every group stay contiguous.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: Order of record ids, and the score joining
+                each record in the order to the next, or -inf if they are never joined.
+        """
+        parent = list(range(self.size))
+        # first and last record of each group, by root
+        heads = list(range(self.size))
+        tails = list(range(self.size))
+        # next record in the order, and the score joining it
+        next_records = [-1] * self.size
+        next_scores = [-np.inf] * self.size
+
+        for first, second, score in zip(
+            self.first.tolist(), self.second.tolist(), self.scores.tolist(), strict=True
+        ):
+            first_root, second_root = find_root(parent, first), find_root(parent, second)
+            if first_root == second_root:
+                continue
+            next_records[tails[first_root]] = heads[second_root]
+            next_scores[tails[first_root]] = score
+            parent[second_root] = first_root
+            tails[first_root] = tails[second_root]
+        order = []
+        heights = []
+        for node in range(self.size):
+            if parent[node] != node:
+                continue
+            record = heads[node]
+            while record != -1:
+                order.append(record)
+                heights.append(next_scores[record])
+                record = next_records[record]
+        # the last record of each group is not joined to the next group
+        return np.array(order, dtype=np.int64), np.array(heights[:-1], dtype=np.float64)
+
+    def get_groups(self, threshold: float) -> GroupList:
+        """Get the groups of records joined by pairs scoring at least a threshold.
+
+        Args:
+            threshold (float): Score cutoff. Must be at least the floor.
+
+        Raises:
+            ValueError: The threshold is below the floor, so pairs are missing.
+
+        Returns:
+            GroupList: Groups of more than one record, ordered by the dendrogram.
+        """
+        if threshold < self.floor:
+            raise ValueError(f"Threshold {threshold} is below the floor {self.floor}")
+        cuts = np.flatnonzero(self.heights < threshold) + 1
+        offsets = np.concatenate(([0], cuts, [self.size]))
+        sizes = np.diff(offsets)
+        segments = np.repeat(np.arange(len(sizes)), sizes)
+        kept = (sizes > 1)[segments]
+        members, segments = self.order[kept], segments[kept]
+        # record ids are sorted within each group, by sorting them along with their group
+        members = np.sort(segments * self.size + members) % max(self.size, 1)
+        sizes = sizes[sizes > 1]
+        offsets = np.concatenate(([0], np.cumsum(sizes)))
+        return GroupList(
+            array("q", members.astype(np.int64).tobytes()),
+            array("q", offsets.astype(np.int64).tobytes()),
+        )
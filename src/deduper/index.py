@@ -0,0 +1,836 @@
+"""Incremental dedupe indexes."""
+import copy
+import itertools
+from collections.abc import Hashable, Iterable, Sequence
+from typing import Any, NamedTuple
+
+from rapidfuzz.process import cdist, extract
+
+from deduper.columns import ColumnStore
+from deduper.dedupe import (
+    DedupeModule,
+    Deduper,
+    FuzzyDedupe,
+    RenameMe,
+    UniqueDedupe,
+    process_str,
+)
+from deduper.grouping import DisjointSet
+
+
+class IndexStorage:
+    """In-memory storage for a DeduperIndex.
+
+    All index state is kept in named multimaps of hashable keys to sets of ids,
+    plus a few metadata values, so a storage backend only has to implement
+    the handful of methods below.
+    """
+
+    def __init__(self):
+        """Create index storage."""
+        self.multimaps: dict[str, dict[Hashable, set[int]]] = {}
+        self.meta: dict[str, Any] = {}
+
+    def get(self, name: str, key: Hashable) -> set[int]:
+        """Get the ids stored under a key.
+
+        Args:
+            name (str): Multimap name.
+            key (Hashable): Key.
+
+        Returns:
+            set[int]: Ids.
+        """
+        return set(self.multimaps.get(name, {}).get(key, ()))
+
+    def get_many(self, name: str, keys: Iterable[Hashable]) -> set[int]:
+        """Get the ids stored under any of several keys.
+
+        Args:
+            name (str): Multimap name.
+            keys (Iterable[Hashable]): Keys.
+
+        Returns:
+            set[int]: Ids.
+        """
+        multimap = self.multimaps.get(name, {})
+        return set().union(*(multimap.get(key, ()) for key in keys))
+
+    def filter(self, name: str, key: Hashable, ids: Iterable[int]) -> set[int]:
+        """Get which of the given ids are stored under a key.
+
+        Args:
+            name (str): Multimap name.
+            key (Hashable): Key.
+            ids (Iterable[int]): Ids.
+
+        Returns:
+            set[int]: Ids stored under the key.
+        """
+        return self.multimaps.get(name, {}).get(key, set()).intersection(ids)
+
+    def keys(self, name: str) -> list[Hashable]:
+        """Get every key with ids stored under it.
+
+        Args:
+            name (str): Multimap name.
+
+        Returns:
+            list[Hashable]: Keys.
+        """
+        return list(self.multimaps.get(name, {}))
+
+    def add(self, name: str, pairs: Iterable[tuple[Hashable, int]]) -> None:
+        """Store ids under keys.
+
+        Args:
+            name (str): Multimap name.
+            pairs (Iterable[tuple[Hashable, int]]): Key and id pairs.
+        """
+        multimap = self.multimaps.setdefault(name, {})
+        for key, id_ in pairs:
+            if key not in multimap:
+                multimap[key] = {id_}
+            else:
+                multimap[key].add(id_)
+
+    def remove(self, name: str, pairs: Iterable[tuple[Hashable, int]]) -> None:
+        """Remove ids from under keys.
+
+        Args:
+            name (str): Multimap name.
+            pairs (Iterable[tuple[Hashable, int]]): Key and id pairs.
+        """
+        multimap = self.multimaps.setdefault(name, {})
+        for key, id_ in pairs:
+            if (ids := multimap.get(key)) is None:
+                continue
+            ids.discard(id_)
+            if not ids:
+                del multimap[key]
+
+    def pop(self, name: str, key: Hashable) -> set[int]:
+        """Remove and return every id stored under a key.
+
+        Args:
+            name (str): Multimap name.
+            key (Hashable): Key.
+
+        Returns:
+            set[int]: Ids.
+        """
+        return self.multimaps.get(name, {}).pop(key, set())
+
+    def get_meta(self, key: str, default: Any = None) -> Any:
+        """Get a metadata value.
+
+        Args:
+            key (str): Key.
+            default (Any): Value returned if the key is not set.
+
+        Returns:
+            Any: Value.
+        """
+        return self.meta.get(key, default)
+
+    def set_meta(self, key: str, value: Any) -> None:
+        """Set a metadata value.
+
+        Args:
+            key (str): Key.
+            value (Any): Value.
+        """
+        self.meta[key] = value
+
+
+class IndexStage:
+    """Duplicate groups produced by one module of a DeduperIndex."""
+
+    def __init__(self, module: DedupeModule, storage: IndexStorage, position: int):
+        """Create index stage.
+
+        Args:
+            module (DedupeModule): Dedupe module.
+            storage (IndexStorage): Storage of the index.
+            position (int): Position of the module in the deduper.
+        """
+        self.module = module
+        self.storage = storage
+        # group id to record ids
+        self.groups_name = f"stage{position}:groups"
+        # record id to group id
+        self.group_map_name = f"stage{position}:group_map"
+        # group id to the id of the input group it was produced from, or -1 if none
+        self.parent_map_name = f"stage{position}:parent_map"
+        # input group id to the ids of the groups produced from it
+        self.child_map_name = f"stage{position}:child_map"
+
+    def get_group(self, group_id: int) -> frozenset[int]:
+        """Get the record ids of a group.
+
+        Args:
+            group_id (int): Group id.
+
+        Returns:
+            frozenset[int]: Record ids.
+        """
+        return frozenset(self.storage.get(self.groups_name, group_id))
+
+    def get_groups(self) -> list[frozenset[int]]:
+        """Get every group.
+
+        Returns:
+            list[frozenset[int]]: Record ids of each group.
+        """
+        return [self.get_group(group_id) for group_id in self.storage.keys(self.groups_name)]
+
+    def get_group_ids(self, ids: Iterable[int]) -> set[int]:
+        """Get the ids of the groups containing any of the records.
+
+        Args:
+            ids (Iterable[int]): Record ids.
+
+        Returns:
+            set[int]: Group ids.
+        """
+        return self.storage.get_many(self.group_map_name, ids)
+
+    def get_parent(self, group_id: int) -> int:
+        """Get the id of the input group a group was produced from.
+
+        Args:
+            group_id (int): Group id.
+
+        Returns:
+            int: Input group id, or -1 if none.
+        """
+        return next(iter(self.storage.get(self.parent_map_name, group_id)))
+
+    def set_parent(self, group_id: int, parent_id: int) -> None:
+        """Set the id of the input group a group was produced from.
+
+        Args:
+            group_id (int): Group id.
+            parent_id (int): Input group id, or -1 if none.
+        """
+        if self.storage.get(self.parent_map_name, group_id):
+            old_parent_id = self.get_parent(group_id)
+            self.storage.remove(self.parent_map_name, [(group_id, old_parent_id)])
+            self.storage.remove(self.child_map_name, [(old_parent_id, group_id)])
+        self.storage.add(self.parent_map_name, [(group_id, parent_id)])
+        self.storage.add(self.child_map_name, [(parent_id, group_id)])
+
+    def pop_children(self, parent_id: int) -> set[int]:
+        """Get the ids of the groups produced from an input group, detaching them from it.
+
+        Args:
+            parent_id (int): Input group id.
+
+        Returns:
+            set[int]: Group ids.
+        """
+        return self.storage.pop(self.child_map_name, parent_id)
+
+    def add_group(self, group_id: int, members: frozenset[int], parent_id: int) -> None:
+        """Add a group.
+
+        Args:
+            group_id (int): Group id.
+            members (frozenset[int]): Record ids.
+            parent_id (int): Input group id, or -1 if none.
+        """
+        self.storage.add(self.groups_name, [(group_id, obj) for obj in members])
+        self.storage.add(self.group_map_name, [(obj, group_id) for obj in members])
+        self.set_parent(group_id, parent_id)
+
+    def remove_group(self, group_id: int) -> frozenset[int]:
+        """Remove a group.
+
+        Args:
+            group_id (int): Group id.
+
+        Returns:
+            frozenset[int]: Record ids of the removed group.
+        """
+        members = frozenset(self.storage.pop(self.groups_name, group_id))
+        self.storage.remove(self.group_map_name, [(obj, group_id) for obj in members])
+        for parent_id in self.storage.pop(self.parent_map_name, group_id):
+            self.storage.remove(self.child_map_name, [(parent_id, group_id)])
+        return members
+
+
+class ModuleIndex:
+    """Incremental index for the first module of a DeduperIndex.
+
+    The first module sees every record as a single candidate set, so
+    the index is used to narrow a change down to the records it affects.
+    This base index cannot narrow anything down, so every indexed record
+    is affected by a change. Subclasses index field values to do better.
+    """
+
+    # multimap of the ids of every indexed record, under a single key
+    ids_name = "ids"
+
+    def __init__(self, stage: IndexStage, columns: ColumnStore):
+        """Create module index.
+
+        Args:
+            stage (IndexStage): Stage of the module.
+            columns (ColumnStore): Column store of the records.
+        """
+        self.stage = stage
+        self.storage = stage.storage
+        self.module = stage.module
+        self.columns = columns
+
+    def get_ids(self) -> set[int]:
+        """Get the ids of every indexed record.
+
+        Returns:
+            set[int]: Record ids.
+        """
+        return self.storage.get(self.ids_name, None)
+
+    def get_affected(self, ids: set[int]) -> set[int]:
+        """Get the indexed records that may be grouped with the given records.
+
+        Args:
+            ids (set[int]): Record ids.
+
+        Returns:
+            set[int]: Record ids, including the given record ids.
+        """
+        return self.get_ids() | ids
+
+    def regroup(
+        self, affected: set[int], removed: set[int] | frozenset[int] = frozenset()
+    ) -> tuple[set[int], list[set[int]]]:
+        """Execute the module on the affected records and their current groups.
+
+        Args:
+            affected (set[int]): Affected record ids.
+            removed (set[int] | frozenset[int]): Removed record ids.
+
+        Returns:
+            tuple[set[int], list[set[int]]]: The first element is the ids of the groups
+                to replace, the second element is the groups replacing them.
+        """
+        old_group_ids = self.stage.get_group_ids(itertools.chain(affected, removed))
+        affected = affected.union(*(self.stage.get_group(group_id) for group_id in old_group_ids))
+        affected -= removed
+        if not affected:
+            return old_group_ids, []
+        return old_group_ids, [set(group) for group in self.module.run([affected], self.columns)]
+
+    def add(self, ids: Sequence[int]) -> tuple[set[int], list[set[int]]]:
+        """Index new records.
+
+        Args:
+            ids (Sequence[int]): Record ids.
+
+        Returns:
+            tuple[set[int], list[set[int]]]: The first element is the ids of the groups
+                to replace, the second element is the groups replacing them.
+        """
+        self.storage.add(self.ids_name, [(None, obj) for obj in ids])
+        return self.regroup(self.get_affected(set(ids)))
+
+    def remove(self, ids: set[int]) -> tuple[set[int], list[set[int]]]:
+        """Remove indexed records.
+
+        Args:
+            ids (set[int]): Record ids.
+
+        Returns:
+            tuple[set[int], list[set[int]]]: The first element is the ids of the groups
+                to replace, the second element is the groups replacing them.
+        """
+        affected = self.get_affected(ids) - ids
+        self.storage.remove(self.ids_name, [(None, obj) for obj in ids])
+        return self.regroup(affected, ids)
+
+
+class UniqueIndex(ModuleIndex):
+    """Incremental index for UniqueDedupe and its subclasses.
+
+    Field values are mapped to the records that have them, so a change
+    only affects the records connected to it through shared values.
+    """
+
+    module: UniqueDedupe
+
+    def get_column(self, field: str) -> Sequence:
+        """Get the column of a field, as the module reads it.
+
+        Args:
+            field (str): Field path.
+
+        Returns:
+            Sequence: Column.
+        """
+        return self.columns.get_column(
+            field, processor=self.module.processor, case_sensitive=self.module.case_sensitive
+        )
+
+    def get_affected(self, ids: set[int]) -> set[int]:
+        """Get the indexed records that may be grouped with the given records.
+
+        Args:
+            ids (set[int]): Record ids.
+
+        Returns:
+            set[int]: Record ids, including the given record ids.
+        """
+        affected = set(ids)
+        queue = list(ids)
+        visited = set()
+        columns = {field: self.get_column(field) for field in self.module.fields}
+        # walk every record connected through a shared value
+        while queue:
+            obj = queue.pop()
+            for field, column in columns.items():
+                value = column[obj]
+                if value is None or (field, value) in visited:
+                    continue
+                visited.add((field, value))
+                for other in self.storage.get(f"values:{field}", value):
+                    if other not in affected:
+                        affected.add(other)
+                        queue.append(other)
+        return affected
+
+    def get_value_pairs(self, field: str, ids: Iterable[int]) -> list[tuple[Any, int]]:
+        """Get the value and record id pairs of a field.
+
+        Args:
+            field (str): Field path.
+            ids (Iterable[int]): Record ids.
+
+        Returns:
+            list[tuple[Any, int]]: Value and record id pairs, skipping None values.
+        """
+        column = self.get_column(field)
+        return [(column[obj], obj) for obj in ids if column[obj] is not None]
+
+    def add(self, ids: Sequence[int]) -> tuple[set[int], list[set[int]]]:
+        """Index new records.
+
+        Args:
+            ids (Sequence[int]): Record ids.
+
+        Returns:
+            tuple[set[int], list[set[int]]]: The first element is the ids of the groups
+                to replace, the second element is the groups replacing them.
+        """
+        for field in self.module.fields:
+            self.storage.add(f"values:{field}", self.get_value_pairs(field, ids))
+        return super().add(ids)
+
+    def remove(self, ids: set[int]) -> tuple[set[int], list[set[int]]]:
+        """Remove indexed records.
+
+        Args:
+            ids (set[int]): Record ids.
+
+        Returns:
+            tuple[set[int], list[set[int]]]: The first element is the ids of the groups
+                to replace, the second element is the groups replacing them.
+        """
+        changes = super().remove(ids)
+        for field in self.module.fields:
+            self.storage.remove(f"values:{field}", self.get_value_pairs(field, ids))
+        return changes
+
+
+class FuzzyIndex(ModuleIndex):
+    """Incremental index for FuzzyDedupe.
+
+    Records are indexed by the block keys of the module's blockers, so new
+    records are only scored against records they share a block with.
+    Without blockers, new records are scored against every indexed record.
+
+    Blockers that are fit to the candidate set are fit on the first records
+    added, and are not refit afterwards so that block keys stay consistent.
+    """
+
+    module: FuzzyDedupe
+
+    def __init__(self, stage: IndexStage, columns: ColumnStore):
+        """Create module index.
+
+        Args:
+            stage (IndexStage): Stage of the module.
+            columns (ColumnStore): Column store of the records.
+        """
+        super().__init__(stage, columns)
+        # copies are kept so that executing the module does not refit them
+        self.blockers = self.storage.get_meta("blockers")
+        if self.blockers is None:
+            self.blockers = copy.deepcopy(self.module.blockers or [])
+
+    def get_str_list(self) -> Sequence[str]:
+        """Get the processed column of the module field.
+
+        Returns:
+            Sequence[str]: Column.
+        """
+        return self.columns.get_column(self.module.field, processor=process_str)
+
+    def get_str_values(self, field: str, ids: Sequence[int]) -> list[str]:
+        """Get the values of a blocker field for records, as the module reads them.
+
+        Values are read from the column store of the index, rather than
+        through the module, which may be running on another column store.
+
+        Args:
+            field (str): Field path.
+            ids (Sequence[int]): Record ids.
+
+        Returns:
+            list[str]: Values, with None as an empty string.
+        """
+        column = self.columns.get_column(field)
+        return [column[obj] or "" for obj in ids]
+
+    def get_key_lists(self, ids: Sequence[int]) -> list[list[list[Hashable]]]:
+        """Get the block keys of each blocker for records.
+
+        Args:
+            ids (Sequence[int]): Record ids.
+
+        Returns:
+            list[list[list[Hashable]]]: For each blocker, the block keys of each record.
+        """
+        key_lists = []
+        for blocker in self.blockers:
+            if blocker.field is None:
+                str_list = self.get_str_list()
+                values = [str_list[obj] for obj in ids]
+            else:
+                values = self.get_str_values(blocker.field, ids)
+            key_lists.append([set(blocker.get_keys(value)) for value in values])
+        return key_lists
+
+    def get_block_pairs(
+        self, key_lists: list[list[list[Hashable]]], ids: Sequence[int]
+    ) -> list[list[tuple[Hashable, int]]]:
+        """Get the block key and record id pairs of each blocker.
+
+        Args:
+            key_lists (list[list[list[Hashable]]]): For each blocker, the block keys of each record.
+            ids (Sequence[int]): Record ids.
+
+        Returns:
+            list[list[tuple[Hashable, int]]]: For each blocker, block key and record id pairs.
+        """
+        return [
+            [(key, obj) for obj, keys in zip(ids, keys_list, strict=True) for key in keys]
+            for keys_list in key_lists
+        ]
+
+    def get_candidates(self, obj: int, key_lists: list[list[Hashable]]) -> set[int]:
+        """Get the indexed records sharing a block with a record.
+
+        Args:
+            obj (int): Record id.
+            key_lists (list[list[Hashable]]): For each blocker, the block keys of the record.
+
+        Returns:
+            set[int]: Record ids.
+        """
+        if not self.blockers:
+            candidates = self.get_ids()
+        else:
+            candidates = set()
+            for index, keys in enumerate(key_lists):
+                candidates |= self.storage.get_many(f"blocks:{index}", keys)
+        candidates.discard(obj)
+        return candidates
+
+    def add(self, ids: Sequence[int]) -> tuple[set[int], list[set[int]]]:
+        """Index new records, scoring them against the records they share a block with.
+
+        Args:
+            ids (Sequence[int]): Record ids.
+
+        Returns:
+            tuple[set[int], list[set[int]]]: The first element is the ids of the groups
+                to replace, the second element is the groups replacing them.
+        """
+        if self.storage.get_meta("blockers") is None:
+            str_list = self.get_str_list()
+            for blocker in self.blockers:
+                if blocker.field is None:
+                    blocker.fit([str_list[obj] for obj in ids])
+                else:
+                    blocker.fit(self.get_str_values(blocker.field, ids))
+            self.storage.set_meta("blockers", self.blockers)
+        key_lists = self.get_key_lists(ids)
+        for index, pairs in enumerate(self.get_block_pairs(key_lists, ids)):
+            self.storage.add(f"blocks:{index}", pairs)
+        self.storage.add(self.ids_name, [(None, obj) for obj in ids])
+
+        # score each new record with the lower record id as the query,
+        # the same orientation that executing the module uses
+        str_list = self.get_str_list()
+        disjoint_set = DisjointSet()
+        for position, obj in enumerate(ids):
+            candidates = self.get_candidates(obj, [keys[position] for keys in key_lists])
+            lower = [other for other in candidates if other < obj]
+            higher = sorted(other for other in candidates if other > obj)
+            if lower:
+                scores = cdist(
+                    [str_list[other] for other in lower],
+                    [str_list[obj]],
+                    scorer=self.module.scorer,
+                    processor=None,
+                    score_cutoff=self.module.threshold,
+                    workers=self.module.workers,
+                )
+                for other, score in zip(lower, scores[:, 0], strict=True):
+                    if score > 0 or self.module.threshold <= 0:
+                        disjoint_set.union(other, obj)
+            results = extract(
+                query=str_list[obj],
+                choices=[str_list[other] for other in higher],
+                scorer=self.module.scorer,
+                processor=None,
+                score_cutoff=self.module.threshold,
+                limit=None,
+            )
+            for _, _, index in results:
+                disjoint_set.union(obj, higher[index])
+
+        # join the new matches with the groups they touch
+        old_group_ids = self.stage.get_group_ids(
+            obj for group in disjoint_set.groups() for obj in group
+        )
+        for group_id in old_group_ids:
+            disjoint_set.union_all(self.stage.get_group(group_id))
+        return old_group_ids, [group for group in disjoint_set.groups() if len(group) > 1]
+
+    def remove(self, ids: set[int]) -> tuple[set[int], list[set[int]]]:
+        """Remove indexed records, re-executing the module on the groups they were in.
+
+        Args:
+            ids (set[int]): Record ids.
+
+        Returns:
+            tuple[set[int], list[set[int]]]: The first element is the ids of the groups
+                to replace, the second element is the groups replacing them.
+        """
+        ids_list = sorted(ids)
+        key_lists = self.get_key_lists(ids_list)
+        for index, pairs in enumerate(self.get_block_pairs(key_lists, ids_list)):
+            self.storage.remove(f"blocks:{index}", pairs)
+        self.storage.remove(self.ids_name, [(None, obj) for obj in ids])
+        # removing records can only split the groups they were in
+        old_group_ids = self.stage.get_group_ids(ids)
+        group_list = [self.stage.get_group(group_id) - ids for group_id in old_group_ids]
+        return old_group_ids, [set(group) for group in self.module.run(group_list, self.columns)]
+
+
+class DeduperIndexChanges(NamedTuple):
+    """Changes made to a DeduperIndex."""
+
+    # record ids that were added or removed
+    ids: Sequence[int]
+    # duplicate groups that were added, as record ids
+    added: list[list[int]]
+    # duplicate groups that were removed, as record ids
+    removed: list[list[int]]
+
+
+class DeduperIndex:
+    """Incremental index of the duplicates found by a Deduper.
+
+    Records can be added and removed, and only the duplicate groups
+    affected by the change are recomputed.
+
+    The first module is indexed with a ModuleIndex, so a change only
+    touches the records it affects. Every later module is re-executed
+    only on the input groups that changed.
+    """
+
+    # multimap of the ids of every record in the index, under a single key
+    records_name = "records"
+
+    def __init__(
+        self,
+        deduper: type[Deduper],
+        records: Iterable[RenameMe] = (),
+        storage: IndexStorage | None = None,
+        columns: ColumnStore | None = None,
+    ):
+        """Create deduper index.
+
+        Args:
+            deduper (type[Deduper]): Deduper.
+            records (Iterable[RenameMe]): Initial records.
+            storage (IndexStorage | None): Storage of the index state.
+                If None, state is kept in memory.
+            columns (ColumnStore | None): Column store of the records.
+                If None, records are kept in memory.
+        """
+        self.deduper = deduper
+        self.storage = IndexStorage() if storage is None else storage
+        self.columns = ColumnStore([], deduper.extractors) if columns is None else columns
+        self.stages = [
+            IndexStage(module, self.storage, position)
+            for position, module in enumerate(deduper.modules)
+        ]
+        self.module_index = self.create_module_index(self.stages[0])
+        if records := list(records):
+            self.add(records)
+
+    def create_module_index(self, stage: IndexStage) -> ModuleIndex:
+        """Create the index for the first module.
+
+        Override this method to provide indexes for custom modules.
+
+        Args:
+            stage (IndexStage): Stage of the first module.
+
+        Returns:
+            ModuleIndex: Module index.
+        """
+        if isinstance(stage.module, UniqueDedupe):
+            return UniqueIndex(stage, self.columns)
+        if isinstance(stage.module, FuzzyDedupe):
+            return FuzzyIndex(stage, self.columns)
+        return ModuleIndex(stage, self.columns)
+
+    def new_group_id(self) -> int:
+        """Get an unused group id.
+
+        Returns:
+            int: Group id.
+        """
+        group_id = self.storage.get_meta("group_id", 0)
+        self.storage.set_meta("group_id", group_id + 1)
+        return group_id
+
+    def replace_groups(
+        self,
+        stage: IndexStage,
+        old_group_ids: set[int],
+        new_groups: list[tuple[set[int], int]],
+    ) -> tuple[dict[int, frozenset[int]], set[int]]:
+        """Replace groups on a stage.
+
+        New groups identical to a replaced group keep the existing group,
+        so unchanged groups are not reported or propagated.
+
+        Args:
+            stage (IndexStage): Stage.
+            old_group_ids (set[int]): Ids of the groups to replace.
+            new_groups (list[tuple[set[int], int]]): New groups, each with
+                the id of the input group it was produced from, or -1 if none.
+
+        Returns:
+            tuple[dict[int, frozenset[int]], set[int]]: The first element maps the ids of
+                removed groups to their record ids, the second element is the ids of added groups.
+        """
+        old_group_id_map = {stage.get_group(group_id): group_id for group_id in old_group_ids}
+        removed_group_ids = set(old_group_ids)
+        added_group_ids = set()
+        for group, parent_id in new_groups:
+            members = frozenset(group)
+            if (group_id := old_group_id_map.get(members)) in removed_group_ids:
+                # the group is unchanged, but may have a new parent
+                removed_group_ids.discard(group_id)
+                stage.set_parent(group_id, parent_id)
+            else:
+                group_id = self.new_group_id()
+                stage.add_group(group_id, members, parent_id)
+                added_group_ids.add(group_id)
+        removed_groups = {group_id: stage.remove_group(group_id) for group_id in removed_group_ids}
+        return removed_groups, added_group_ids
+
+    def update(
+        self,
+        ids: Sequence[int],
+        old_group_ids: set[int],
+        new_groups: list[set[int]],
+    ) -> DeduperIndexChanges:
+        """Replace groups on the first stage and propagate the change through later stages.
+
+        Args:
+            ids (Sequence[int]): Record ids that were added or removed.
+            old_group_ids (set[int]): Ids of the first stage groups to replace.
+            new_groups (list[set[int]]): First stage groups replacing them.
+
+        Returns:
+            DeduperIndexChanges: Changes.
+        """
+        previous_stage = self.stages[0]
+        removed_groups, added_group_ids = self.replace_groups(
+            previous_stage, old_group_ids, [(group, -1) for group in new_groups]
+        )
+        for stage in self.stages[1:]:
+            # groups produced from a removed input group are replaced
+            # by the groups produced from the added input groups
+            old_group_ids = set()
+            for parent_id in removed_groups:
+                old_group_ids.update(stage.pop_children(parent_id))
+            new_groups = []
+            for parent_id in sorted(added_group_ids):
+                group_list = stage.module.run([previous_stage.get_group(parent_id)], self.columns)
+                new_groups.extend((set(group), parent_id) for group in group_list)
+            removed_groups, added_group_ids = self.replace_groups(stage, old_group_ids, new_groups)
+            previous_stage = stage
+        return DeduperIndexChanges(
+            ids=ids,
+            added=[
+                sorted(previous_stage.get_group(group_id)) for group_id in sorted(added_group_ids)
+            ],
+            removed=[sorted(removed_groups[group_id]) for group_id in sorted(removed_groups)],
+        )
+
+    def add(self, records: Iterable[RenameMe]) -> DeduperIndexChanges:
+        """Add records to the index.
+
+        Args:
+            records (Iterable[RenameMe]): Records.
+
+        Returns:
+            DeduperIndexChanges: Changes, including the record ids of the added records.
+        """
+        ids = self.columns.add(list(records))
+        self.storage.add(self.records_name, [(None, obj) for obj in ids])
+        return self.update(ids, *self.module_index.add(ids))
+
+    def remove(self, ids: Iterable[int]) -> DeduperIndexChanges:
+        """Remove records from the index.
+
+        Removed records keep their record ids, which are not reused.
+
+        Args:
+            ids (Iterable[int]): Record ids.
+
+        Returns:
+            DeduperIndexChanges: Changes.
+        """
+        ids = self.storage.filter(self.records_name, None, ids)
+        self.storage.remove(self.records_name, [(None, obj) for obj in ids])
+        return self.update(sorted(ids), *self.module_index.remove(ids))
+
+    def get_records(self, ids: Iterable[int]) -> list[RenameMe]:
+        """Get records from their record ids.
+
+        Args:
+            ids (Iterable[int]): Record ids.
+
+        Returns:
+            list[RenameMe]: Records.
+        """
+        return [self.columns.records[obj] for obj in ids]
+
+    def get_duplicates(self) -> list[list[RenameMe]]:
+        """Get the current duplicates.
+
+        Returns:
+            list[list[RenameMe]]: Duplicates, ordered by their first record.
+        """
+        groups = sorted(sorted(group) for group in self.stages[-1].get_groups())
+        return [self.get_records(group) for group in groups]
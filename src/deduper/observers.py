@@ -0,0 +1,278 @@
+"""Observers used to instrument deduping."""
+import math
+import threading
+import time
+from collections import Counter
+from collections.abc import Iterable, Sized
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from deduper.dedupe import DedupeModule
+
+
+class Observer:
+    """Base observer of a deduping run.
+
+    Override any of these methods to be notified as modules run.
+    Modules only call an observer if one is given, so there is
+    no overhead when deduping without one.
+    """
+
+    def start_module(self, module: "DedupeModule", group_list: Iterable[Sized]) -> None:
+        """Called before a module runs.
+
+        Args:
+            module (DedupeModule): Dedupe module.
+            group_list (Iterable[Sized]): Input record id groups.
+        """
+        return
+
+    def finish_module(self, module: "DedupeModule", group_list: Iterable[Sized]) -> None:
+        """Called after a module runs.
+
+        Args:
+            module (DedupeModule): Dedupe module.
+            group_list (Iterable[Sized]): Output record id groups.
+        """
+        return
+
+    def count(self, module: "DedupeModule", name: str, value: int = 1) -> None:
+        """Called to count an event in a running module.
+
+        Events include "groups" as each candidate set is executed,
+        "comparisons" for each pair of values scored, and "condense",
+        "join" and "separate" for each call of the corresponding
+        DedupeModule method.
+
+        Args:
+            module (DedupeModule): Dedupe module.
+            name (str): Event name.
+            value (int): Number of events.
+        """
+        return
+
+
+class CountCollector(Observer):
+    """Observer that only collects event counts."""
+
+    def __init__(self):
+        """Create count collector."""
+        self.counts = Counter()
+
+    def count(self, module: "DedupeModule", name: str, value: int = 1) -> None:
+        """Count an event.
+
+        Args:
+            module (DedupeModule): Dedupe module.
+            name (str): Event name.
+            value (int): Number of events.
+        """
+        self.counts[name] += value
+
+
+def get_size_histogram(group_list: Iterable[Sized]) -> dict[int, int]:
+    """Get a histogram of group sizes.
+
+    Sizes are bucketed by powers of two, so a bucket of 4 counts groups of 4 to 7.
+
+    Args:
+        group_list (Iterable[Sized]): Groups.
+
+    Returns:
+        dict[int, int]: Number of groups in each bucket, by ascending bucket.
+    """
+    histogram = Counter(
+        0 if len(group) == 0 else 2 ** int(math.log2(len(group))) for group in group_list
+    )
+    return dict(sorted(histogram.items()))
+
+
+class ModuleStats:
+    """Statistics of a module run."""
+
+    def __init__(self, module: "DedupeModule"):
+        """Create module statistics.
+
+        Args:
+            module (DedupeModule): Dedupe module.
+        """
+        self.module = module
+        self.seconds = 0.0
+        self.input_groups = 0
+        self.output_groups = 0
+        self.input_histogram: dict[int, int] = {}
+        self.output_histogram: dict[int, int] = {}
+        self.counts = Counter()
+
+    def to_dict(self) -> dict:
+        """Get statistics as a JSON serializable dictionary.
+
+        Returns:
+            dict: Statistics.
+        """
+        return {
+            "module": type(self.module).__name__,
+            "seconds": self.seconds,
+            "input_groups": self.input_groups,
+            "output_groups": self.output_groups,
+            "input_histogram": self.input_histogram,
+            "output_histogram": self.output_histogram,
+            "counts": dict(self.counts),
+        }
+
+
+class StatsCollector(Observer):
+    """Observer that collects statistics of each module run.
+
+    Records wall time, input and output group counts, group size
+    histograms and event counts such as fuzzy comparisons.
+    """
+
+    def __init__(self):
+        """Create statistics collector."""
+        self.stats: list[ModuleStats] = []
+        self.start = 0.0
+
+    def start_module(self, module: "DedupeModule", group_list: Iterable[Sized]) -> None:
+        """Start collecting statistics of a module.
+
+        Args:
+            module (DedupeModule): Dedupe module.
+            group_list (Iterable[Sized]): Input record id groups.
+        """
+        stats = ModuleStats(module)
+        stats.input_histogram = get_size_histogram(group_list)
+        stats.input_groups = sum(stats.input_histogram.values())
+        self.stats.append(stats)
+        self.start = time.perf_counter()
+
+    def finish_module(self, module: "DedupeModule", group_list: Iterable[Sized]) -> None:
+        """Finish collecting statistics of a module.
+
+        Args:
+            module (DedupeModule): Dedupe module.
+            group_list (Iterable[Sized]): Output record id groups.
+        """
+        stats = self.stats[-1]
+        stats.seconds = time.perf_counter() - self.start
+        stats.output_histogram = get_size_histogram(group_list)
+        stats.output_groups = sum(stats.output_histogram.values())
+
+    def count(self, module: "DedupeModule", name: str, value: int = 1) -> None:
+        """Count an event of the running module.
+
+        Args:
+            module (DedupeModule): Dedupe module.
+            name (str): Event name.
+            value (int): Number of events.
+        """
+        self.stats[-1].counts[name] += value
+
+    def to_list(self) -> list[dict]:
+        """Get statistics of each module run as JSON serializable dictionaries.
+
+        Returns:
+            list[dict]: Statistics.
+        """
+        return [stats.to_dict() for stats in self.stats]
+
+
+class DedupeCancelled(Exception):
+    """Raised in a deduping run that was cancelled."""
+
+
+class ProgressObserver(Observer):
+    """Observer that tracks the progress of a deduping run, and can cancel it.
+
+    Progress advances through each module, and through the candidate sets
+    within each module. The run can be cancelled from another thread,
+    in which case it raises DedupeCancelled when it next reports progress.
+    """
+
+    def __init__(self, module_count: int):
+        """Create progress observer.
+
+        Args:
+            module_count (int): Number of modules in the deduper.
+        """
+        self.module_count = module_count
+        self.module_index = -1
+        self.group_count = 0
+        self.groups_started = 0
+        self.groups_done = 0
+        self.comparisons = 0
+        self.cancelled = threading.Event()
+
+    @property
+    def progress(self) -> float:
+        """Fraction of the run completed, between 0 and 1."""
+        if self.module_index < 0:
+            return 0.0
+        module_progress = self.groups_done / self.group_count if self.group_count else 0.0
+        return min((self.module_index + module_progress) / self.module_count, 1.0)
+
+    @property
+    def message(self) -> str:
+        """Description of the current step of the run."""
+        if self.module_index < 0:
+            return "Starting"
+        return (
+            f"Module {self.module_index + 1} of {self.module_count}: "
+            f"{self.groups_done} of {self.group_count} candidate sets done, "
+            f"{self.comparisons:,} comparisons"
+        )
+
+    def cancel(self) -> None:
+        """Cancel the run."""
+        self.cancelled.set()
+
+    def check_cancelled(self) -> None:
+        """Stop the run if it was cancelled.
+
+        Raises:
+            DedupeCancelled: The run was cancelled.
+        """
+        if self.cancelled.is_set():
+            raise DedupeCancelled()
+
+    def start_module(self, module: "DedupeModule", group_list: Iterable[Sized]) -> None:
+        """Advance to the next module.
+
+        Args:
+            module (DedupeModule): Dedupe module.
+            group_list (Iterable[Sized]): Input record id groups.
+        """
+        self.check_cancelled()
+        self.module_index += 1
+        self.group_count = sum(1 for _ in group_list)
+        self.groups_started = 0
+        self.groups_done = 0
+
+    def finish_module(self, module: "DedupeModule", group_list: Iterable[Sized]) -> None:
+        """Complete the current module.
+
+        Args:
+            module (DedupeModule): Dedupe module.
+            group_list (Iterable[Sized]): Output record id groups.
+        """
+        self.groups_done = self.group_count
+        self.check_cancelled()
+
+    def count(self, module: "DedupeModule", name: str, value: int = 1) -> None:
+        """Advance through the candidate sets of the current module.
+
+        Every event checks for cancellation, so a run stops
+        quickly even within a large candidate set.
+
+        Args:
+            module (DedupeModule): Dedupe module.
+            name (str): Event name.
+            value (int): Number of events.
+        """
+        if name == "groups":
+            # candidate sets are counted as they start, so every earlier one is done
+            self.groups_done = self.groups_started
+            self.groups_started += value
+        elif name == "comparisons":
+            self.comparisons += value
+        self.check_cancelled()
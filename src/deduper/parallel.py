@@ -0,0 +1,109 @@
+"""Parallel execution of dedupe modules."""
+import heapq
+from collections import Counter
+from collections.abc import Sequence
+from concurrent.futures import Executor
+from typing import TYPE_CHECKING
+
+from deduper.columns import ColumnStore
+from deduper.grouping import GroupList
+from deduper.observers import CountCollector, Observer
+
+if TYPE_CHECKING:
+    from deduper.dedupe import DedupeModule
+
+
+def split_batches(costs: Sequence[float], batch_count: int) -> list[list[int]]:
+    """Split items into batches of similar total cost.
+
+    Items are assigned from most to least costly, each to the
+    batch with the lowest total cost so far.
+
+    Args:
+        costs (Sequence[float]): Cost of each item.
+        batch_count (int): Maximum number of batches.
+
+    Returns:
+        list[list[int]]: Ascending item indices of each non-empty batch.
+    """
+    heap = [(0.0, batch) for batch in range(max(batch_count, 1))]
+    batches = [[] for _ in heap]
+    for index in sorted(range(len(costs)), key=lambda index: -costs[index]):
+        total, batch = heapq.heappop(heap)
+        batches[batch].append(index)
+        heapq.heappush(heap, (total + costs[index], batch))
+    return [sorted(batch) for batch in batches if batch]
+
+
+def run_batch(
+    module: "DedupeModule", columns: ColumnStore, group_list: GroupList, observe: bool = False
+) -> tuple[list[GroupList], Counter | None]:
+    """Run a module on each group of a batch separately.
+
+    Args:
+        module (DedupeModule): Dedupe module.
+        columns (ColumnStore): Column store of the batch.
+        group_list (GroupList): Record id groups of the batch.
+        observe (bool): Whether to count the events of the module.
+
+    Returns:
+        tuple[list[GroupList], Counter | None]: The first element is the deduped record id
+            groups of each group, the second element is the event counts if observed.
+    """
+    collector = CountCollector() if observe else None
+    results = [module.run([group], columns, collector) for group in group_list]
+    return results, None if collector is None else collector.counts
+
+
+def run_parallel(
+    module: "DedupeModule",
+    group_list: GroupList,
+    columns: ColumnStore,
+    executor: Executor,
+    batch_count: int,
+    observer: Observer | None = None,
+) -> GroupList:
+    """Run a module on groups of record ids, sending batches of groups to an executor.
+
+    Groups are independent candidate sets, so they are split into batches of
+    similar estimated cost. Each batch is sent with only the field columns the
+    module reads, and the results are merged in the order of the input groups,
+    so the result is the same as running the module serially.
+
+    Args:
+        module (DedupeModule): Dedupe module.
+        group_list (GroupList): Record id groups.
+        columns (ColumnStore): Column store of the records.
+        executor (Executor): Executor, usually a process pool.
+        batch_count (int): Maximum number of batches.
+        observer (Observer | None): Observer notified of the event counts of every batch.
+
+    Returns:
+        GroupList: Deduped record id groups.
+    """
+    groups = list(group_list)
+    batches = split_batches([module.estimate_cost(len(group)) for group in groups], batch_count)
+    fields = module.get_fields()
+    futures = []
+    for batch in batches:
+        # renumber the records of the batch, keeping their order
+        ids = sorted({obj for index in batch for obj in groups[index]})
+        id_map = {obj: local_obj for local_obj, obj in enumerate(ids)}
+        batch_group_list = GroupList.from_groups(
+            [id_map[obj] for obj in groups[index]] for index in batch
+        )
+        future = executor.submit(
+            run_batch, module, columns.take(ids, fields), batch_group_list, observer is not None
+        )
+        futures.append((batch, ids, future))
+    result_map = {}
+    for batch, ids, future in futures:
+        results, counts = future.result()
+        if observer is not None:
+            for name, value in counts.items():
+                observer.count(module, name, value)
+        for index, result in zip(batch, results, strict=True):
+            result_map[index] = [[ids[local_obj] for local_obj in group] for group in result]
+    return GroupList.from_groups(
+        group for index in range(len(groups)) for group in result_map.get(index, [])
+    )
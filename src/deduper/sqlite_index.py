@@ -0,0 +1,498 @@
+"""Persistent dedupe index stored in SQLite."""
+import itertools
+import json
+import pickle
+import sqlite3
+from collections.abc import Callable, Hashable, Iterable, Iterator, Mapping, Sequence
+from os import PathLike
+from typing import Any
+
+from deduper.columns import ColumnStore
+from deduper.dedupe import Deduper, RenameMe
+from deduper.index import DeduperIndex, DeduperIndexChanges, IndexStorage
+
+# maximum number of parameters bound in one query
+BATCH_SIZE = 500
+
+
+def normalize_key(key: Any) -> Any:
+    """Normalize the numbers of a key, so keys which are equal in Python encode the same.
+
+    Booleans and integral floats are converted to integers, since True, 1 and 1.0
+    are the same dictionary key in memory, but different JSON text.
+
+    Args:
+        key (Any): Key.
+
+    Returns:
+        Any: Normalized key.
+    """
+    if isinstance(key, bool):
+        return int(key)
+    if isinstance(key, float) and key.is_integer():
+        return int(key)
+    if isinstance(key, list | tuple):
+        return [normalize_key(item) for item in key]
+    return key
+
+
+def encode_key(key: Hashable) -> str:
+    """Encode a key or value as JSON text.
+
+    Args:
+        key (Hashable): Key.
+
+    Returns:
+        str: JSON text.
+    """
+    return json.dumps(normalize_key(key), separators=(",", ":"))
+
+
+def batched(items: Iterable[Any], size: int = BATCH_SIZE) -> Iterator[list[Any]]:
+    """Split items into lists of at most size items.
+
+    Args:
+        items (Iterable[Any]): Items.
+        size (int): Maximum number of items in a list.
+
+    Yields:
+        Iterator[list[Any]]: Lists of items.
+    """
+    iterator = iter(items)
+    while batch := list(itertools.islice(iterator, size)):
+        yield batch
+
+
+class SqliteIndexStorage(IndexStorage):
+    """Index storage kept in a SQLite database.
+
+    Multimaps are stored as rows of name, JSON encoded key and id,
+    and metadata values are pickled. Only the rows a change reads are
+    loaded, so the index does not have to fit in memory.
+    """
+
+    def __init__(self, connection: sqlite3.Connection):
+        """Create index storage, creating its tables if needed.
+
+        Args:
+            connection (sqlite3.Connection): Database connection.
+        """
+        self.connection = connection
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS multimap ("
+            "name TEXT NOT NULL, key TEXT NOT NULL, id INTEGER NOT NULL, "
+            "PRIMARY KEY (name, key, id)) WITHOUT ROWID"
+        )
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value BLOB NOT NULL)"
+        )
+        self.meta: dict[str, Any] = {}
+
+    def get(self, name: str, key: Hashable) -> set[int]:
+        """Get the ids stored under a key.
+
+        Args:
+            name (str): Multimap name.
+            key (Hashable): Key.
+
+        Returns:
+            set[int]: Ids.
+        """
+        rows = self.connection.execute(
+            "SELECT id FROM multimap WHERE name = ? AND key = ?", (name, encode_key(key))
+        )
+        return {id_ for (id_,) in rows}
+
+    def get_many(self, name: str, keys: Iterable[Hashable]) -> set[int]:
+        """Get the ids stored under any of several keys.
+
+        Args:
+            name (str): Multimap name.
+            keys (Iterable[Hashable]): Keys.
+
+        Returns:
+            set[int]: Ids.
+        """
+        ids = set()
+        for batch in batched({encode_key(key) for key in keys}):
+            rows = self.connection.execute(
+                "SELECT id FROM multimap WHERE name = ? "  # noqa: S608
+                f"AND key IN ({','.join('?' * len(batch))})",
+                (name, *batch),
+            )
+            ids.update(id_ for (id_,) in rows)
+        return ids
+
+    def filter(self, name: str, key: Hashable, ids: Iterable[int]) -> set[int]:
+        """Get which of the given ids are stored under a key.
+
+        Args:
+            name (str): Multimap name.
+            key (Hashable): Key.
+            ids (Iterable[int]): Ids.
+
+        Returns:
+            set[int]: Ids stored under the key.
+        """
+        found = set()
+        for batch in batched(set(ids)):
+            rows = self.connection.execute(
+                "SELECT id FROM multimap WHERE name = ? AND key = ? "  # noqa: S608
+                f"AND id IN ({','.join('?' * len(batch))})",
+                (name, encode_key(key), *batch),
+            )
+            found.update(id_ for (id_,) in rows)
+        return found
+
+    def keys(self, name: str) -> list[Hashable]:
+        """Get every key with ids stored under it.
+
+        Args:
+            name (str): Multimap name.
+
+        Returns:
+            list[Hashable]: Keys.
+        """
+        rows = self.connection.execute("SELECT DISTINCT key FROM multimap WHERE name = ?", (name,))
+        return [json.loads(key) for (key,) in rows]
+
+    def add(self, name: str, pairs: Iterable[tuple[Hashable, int]]) -> None:
+        """Store ids under keys.
+
+        Args:
+            name (str): Multimap name.
+            pairs (Iterable[tuple[Hashable, int]]): Key and id pairs.
+        """
+        self.connection.executemany(
+            "INSERT OR IGNORE INTO multimap (name, key, id) VALUES (?, ?, ?)",
+            ((name, encode_key(key), id_) for key, id_ in pairs),
+        )
+
+    def remove(self, name: str, pairs: Iterable[tuple[Hashable, int]]) -> None:
+        """Remove ids from under keys.
+
+        Args:
+            name (str): Multimap name.
+            pairs (Iterable[tuple[Hashable, int]]): Key and id pairs.
+        """
+        self.connection.executemany(
+            "DELETE FROM multimap WHERE name = ? AND key = ? AND id = ?",
+            ((name, encode_key(key), id_) for key, id_ in pairs),
+        )
+
+    def pop(self, name: str, key: Hashable) -> set[int]:
+        """Remove and return every id stored under a key.
+
+        Args:
+            name (str): Multimap name.
+            key (Hashable): Key.
+
+        Returns:
+            set[int]: Ids.
+        """
+        ids = self.get(name, key)
+        self.connection.execute(
+            "DELETE FROM multimap WHERE name = ? AND key = ?", (name, encode_key(key))
+        )
+        return ids
+
+    def get_meta(self, key: str, default: Any = None) -> Any:
+        """Get a metadata value.
+
+        Args:
+            key (str): Key.
+            default (Any): Value returned if the key is not set.
+
+        Returns:
+            Any: Value.
+        """
+        if key not in self.meta:
+            row = self.connection.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return default
+            self.meta[key] = pickle.loads(row[0])  # noqa: S301
+        return self.meta[key]
+
+    def set_meta(self, key: str, value: Any) -> None:
+        """Set a metadata value.
+
+        Args:
+            key (str): Key.
+            value (Any): Value.
+        """
+        self.connection.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, pickle.dumps(value))
+        )
+        self.meta[key] = value
+
+    def clear_cache(self) -> None:
+        """Clear cached metadata, so it is read again from the database."""
+        self.meta.clear()
+
+
+class SqliteRecords(Sequence):
+    """Records stored in a SQLite database as JSON, indexed by record id."""
+
+    def __init__(self, connection: sqlite3.Connection):
+        """Create records, creating their table if needed.
+
+        Args:
+            connection (sqlite3.Connection): Database connection.
+        """
+        self.connection = connection
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS records (id INTEGER PRIMARY KEY, data TEXT NOT NULL)"
+        )
+
+    def __len__(self) -> int:
+        row = self.connection.execute("SELECT max(id) FROM records").fetchone()
+        return 0 if row[0] is None else row[0] + 1
+
+    def __getitem__(self, index: int) -> RenameMe:
+        row = self.connection.execute("SELECT data FROM records WHERE id = ?", (index,)).fetchone()
+        if row is None:
+            raise IndexError("record id out of range")
+        return json.loads(row[0])
+
+    def extend(self, records: Iterable[RenameMe]) -> None:
+        """Add records to the end of the table.
+
+        Args:
+            records (Iterable[RenameMe]): JSON serializable records.
+        """
+        start = len(self)
+        self.connection.executemany(
+            "INSERT INTO records (id, data) VALUES (?, ?)",
+            ((obj, json.dumps(record)) for obj, record in enumerate(records, start)),
+        )
+
+
+class SqliteColumn(Sequence):
+    """Column stored in a SQLite database, indexed by record id.
+
+    Values are computed from their record the first time they are read,
+    then stored so they are not computed again.
+    """
+
+    def __init__(self, column_store: "SqliteColumnStore", name: str, compute: Callable[[Any], Any]):
+        """Create column.
+
+        Args:
+            column_store (SqliteColumnStore): Column store the column belongs to.
+            name (str): Column name.
+            compute (Callable[[Any], Any]): Function computing the value of a record.
+        """
+        self.column_store = column_store
+        self.name = name
+        self.compute = compute
+        self.cache: dict[int, Any] = {}
+
+    def __len__(self) -> int:
+        return len(self.column_store)
+
+    def __getitem__(self, index: int) -> Any:
+        if index in self.cache:
+            return self.cache[index]
+        connection = self.column_store.connection
+        row = connection.execute(
+            "SELECT value FROM columns WHERE name = ? AND id = ?", (self.name, index)
+        ).fetchone()
+        if row is not None:
+            value = json.loads(row[0])
+        else:
+            value = self.compute(self.column_store.records[index])
+            connection.execute(
+                "INSERT INTO columns (name, id, value) VALUES (?, ?, ?)",
+                (self.name, index, json.dumps(value)),
+            )
+        self.cache[index] = value
+        return value
+
+
+class SqliteColumnStore(ColumnStore):
+    """Column store kept in a SQLite database.
+
+    Records and the column values read from them are stored on disk,
+    and only the values that are read are loaded into memory.
+    Records and their values must be JSON serializable.
+    """
+
+    def __init__(
+        self,
+        connection: sqlite3.Connection,
+        extractors: Mapping[str, Callable[[Any], Any]] | None = None,
+    ):
+        """Create column store, creating its tables if needed.
+
+        Args:
+            connection (sqlite3.Connection): Database connection.
+            extractors (Mapping[str, Callable[[Any], Any]] | None): Functions getting
+                the values of fields from a record, by field.
+        """
+        self.connection = connection
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS columns ("
+            "name TEXT NOT NULL, id INTEGER NOT NULL, value TEXT NOT NULL, "
+            "PRIMARY KEY (name, id)) WITHOUT ROWID"
+        )
+        super().__init__(SqliteRecords(connection), extractors)
+
+    def get_column(
+        self,
+        field: str,
+        processor: Callable[[Any], Any] | None = None,
+        case_sensitive: bool = True,
+    ) -> SqliteColumn:
+        """Get the values of a field for every record.
+
+        Args:
+            field (str): Field path.
+            processor (Callable[[Any], Any] | None): Function applied to each value.
+            case_sensitive (bool): If False, str values are lower cased
+                before being processed.
+
+        Returns:
+            SqliteColumn: Column, indexed by record id.
+        """
+        key = (field, processor, case_sensitive)
+        if (column := self.columns.get(key)) is not None:
+            return column
+        processor_name = (
+            "" if processor is None else f"{processor.__module__}.{processor.__qualname__}"
+        )
+
+        def compute(record: RenameMe) -> Any:
+            value = self.extract_value(record, field)
+            return self.process_values([value], processor, case_sensitive)[0]
+
+        column = SqliteColumn(self, f"{field}:{processor_name}:{case_sensitive}", compute)
+        self.columns[key] = column
+        return column
+
+    def add(self, records: list[RenameMe]) -> range:
+        """Add records.
+
+        Column values of the added records are computed when they are first read.
+
+        Args:
+            records (list[RenameMe]): JSON serializable records.
+
+        Returns:
+            range: Record ids of the added records.
+        """
+        start = len(self.records)
+        self.records.extend(records)
+        return range(start, start + len(records))
+
+    def clear_cache(self) -> None:
+        """Clear the values cached in memory."""
+        for column in self.columns.values():
+            column.cache.clear()
+
+
+class SqliteDeduperIndex(DeduperIndex):
+    """Deduper index persisted in a SQLite database.
+
+    Opening an existing database only reads its metadata, and each change
+    only loads the records and index rows it affects. For fuzzy modules,
+    blockers keep the number of records scored against a change bounded;
+    without them, a change is scored against every record in the index.
+
+    Records are stored as JSON, so records returned by the index are
+    their decoded JSON values. Metadata is pickled, so only open databases
+    from trusted sources.
+    """
+
+    def __init__(
+        self,
+        deduper: type[Deduper],
+        path: str | PathLike,
+        records: Iterable[RenameMe] = (),
+    ):
+        """Open a deduper index, creating its database if needed.
+
+        Args:
+            deduper (type[Deduper]): Deduper.
+            path (str | PathLike): Database path.
+            records (Iterable[RenameMe]): Records to add.
+
+        Raises:
+            ValueError: The database was created with a different deduper.
+        """
+        self.connection = sqlite3.connect(path, isolation_level=None)
+        storage = SqliteIndexStorage(self.connection)
+        name = f"{deduper.__module__}.{deduper.__qualname__}"
+        if storage.get_meta("deduper", name) != name:
+            self.connection.close()
+            raise ValueError(f"Index was created with {storage.get_meta('deduper')}, not {name}")
+        storage.set_meta("deduper", name)
+        super().__init__(
+            deduper, (), storage, SqliteColumnStore(self.connection, deduper.extractors)
+        )
+        if records := list(records):
+            self.add(records)
+
+    def clear_cache(self) -> None:
+        """Clear the values cached in memory."""
+        self.storage.clear_cache()
+        self.columns.clear_cache()
+
+    def add(self, records: Iterable[RenameMe]) -> DeduperIndexChanges:
+        """Add records to the index.
+
+        Args:
+            records (Iterable[RenameMe]): JSON serializable records.
+
+        Returns:
+            DeduperIndexChanges: Changes, including the record ids of the added records.
+        """
+        try:
+            with self.connection:
+                self.connection.execute("BEGIN")
+                return super().add(records)
+        finally:
+            self.clear_cache()
+
+    def remove(self, ids: Iterable[int]) -> DeduperIndexChanges:
+        """Remove records from the index.
+
+        Removed records keep their record ids, which are not reused.
+
+        Args:
+            ids (Iterable[int]): Record ids.
+
+        Returns:
+            DeduperIndexChanges: Changes.
+        """
+        try:
+            with self.connection:
+                self.connection.execute("BEGIN")
+                return super().remove(ids)
+        finally:
+            self.clear_cache()
+
+    def match(self, records: Iterable[RenameMe]) -> list[list[RenameMe]]:
+        """Get the duplicates of records without adding them to the index.
+
+        Args:
+            records (Iterable[RenameMe]): JSON serializable records.
+
+        Returns:
+            list[list[RenameMe]]: Duplicates containing at least one of the records,
+                ordered by their first record. Indexed records come first in each group.
+        """
+        try:
+            self.connection.execute("BEGIN")
+            try:
+                stage = self.stages[-1]
+                group_ids = stage.get_group_ids(super().add(records).ids)
+                groups = sorted(sorted(stage.get_group(group_id)) for group_id in group_ids)
+                return [self.get_records(group) for group in groups]
+            finally:
+                self.connection.execute("ROLLBACK")
+        finally:
+            self.clear_cache()
+
+    def close(self) -> None:
+        """Close the database."""
+        self.connection.close()
@@ -0,0 +1,67 @@
+from rapidfuzz.fuzz import ratio
+
+from deduper import blocking, dedupe
+
+
+def get_blocks(blocker, values):
+    return sorted(sorted(block) for block in blocker.get_blocks(values).values())
+
+
+def test_prefix_blocker():
+    blocker = blocking.PrefixBlocker(length=3)
+    assert get_blocks(blocker, ["abcd", "abce", "bcd"]) == [[0, 1], [2]]
+
+
+def test_qgram_blocker():
+    blocker = blocking.QGramBlocker(q=2)
+    assert set(blocker.get_keys("abcd")) == {"ab", "bc", "cd"}
+    assert set(blocker.get_keys("a")) == {"a"}
+
+
+def test_token_blocker():
+    blocker = blocking.TokenBlocker(min_length=2, prefix=2)
+    assert blocker.get_keys("a cancer risk study") == ["cancer", "risk"]
+
+
+def test_year_blocker():
+    blocker = blocking.YearBlocker(tolerance=1)
+    assert get_blocks(blocker, ["2000", "2001", "2003", "", None]) == [
+        [0],
+        [0, 1],
+        [1],
+        [2],
+        [2],
+        [3, 4],
+    ]
+
+
+def get_index_groups(records, module):
+    results = module.really_execute([records])
+    return sorted(sorted(records.index(record) for record in group) for group in results)
+
+
+def test_prefix_filter_blocker():
+    # prefix filtering never drops a pair that reaches the threshold
+    records = [
+        {"title": title}
+        for title in [
+            "this is a duplicate title",
+            "THIS IS A DUPLICATE TITLE!",
+            "this is duplicate title",
+            "this is unique",
+            "another duplicate",
+            "and another duplicate",
+            "",
+            None,
+        ]
+    ]
+    for threshold in [0, 70, 80, 90, 100]:
+        exhaustive = dedupe.FuzzyDedupe(field="title", threshold=threshold, scorer=ratio)
+        blocked = dedupe.FuzzyDedupe(
+            field="title",
+            threshold=threshold,
+            scorer=ratio,
+            blockers=[blocking.PrefixFilterBlocker(threshold)],
+        )
+        # groups may be in a different order, since the exhaustive path compares copies once
+        assert get_index_groups(records, exhaustive) == get_index_groups(records, blocked)
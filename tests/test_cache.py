@@ -0,0 +1,50 @@
+from deduper import blocking, dedupe
+from deduper.app.cache import ResultCache, get_config, hash_file
+
+
+class TitleDeduper(dedupe.Deduper):
+    modules = (
+        dedupe.FuzzyDedupe(
+            field="title", threshold=90, blockers=[blocking.PrefixFilterBlocker(90)]
+        ),
+    )
+
+
+def test_hash_file(tmp_path):
+    path = tmp_path / "records.ris"
+    path.write_text("TY  - JOUR")
+    file_hash = hash_file(path)
+    assert file_hash == hash_file(path)
+    path.write_text("TY  - BOOK")
+    assert file_hash != hash_file(path)
+
+
+def test_get_config():
+    config = get_config(TitleDeduper)
+    assert hash(config)
+    # state computed while deduping does not change the configuration
+    TitleDeduper.get_duplicates([{"title": "foo"}, {"title": "bar"}])
+    assert get_config(TitleDeduper) == config
+    assert get_config(dedupe.FuzzyDedupe(field="title", threshold=80)) != get_config(
+        dedupe.FuzzyDedupe(field="title", threshold=90)
+    )
+
+
+class TestResultCache:
+    def test_get_or_compute(self):
+        cache = ResultCache(maxsize=2)
+        calls = []
+
+        def compute(value):
+            calls.append(value)
+            return value
+
+        assert cache.get_or_compute("a", lambda: compute(1)) == 1
+        assert cache.get_or_compute("a", lambda: compute(2)) == 1
+        cache.get_or_compute("b", lambda: compute(3))
+        # "a" was used more recently than "b", so "b" is evicted
+        cache.get_or_compute("a", lambda: compute(4))
+        cache.get_or_compute("c", lambda: compute(5))
+        assert len(cache) == 2
+        assert cache.get_or_compute("b", lambda: compute(6)) == 6
+        assert calls == [1, 3, 5, 6]
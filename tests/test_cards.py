@@ -0,0 +1,40 @@
+import pytest
+
+pytest.importorskip("shiny")
+
+from deduper.app.cards import format_value, get_card_key, get_preview, render_card  # noqa: E402
+
+group = [
+    {"id": "1", "title": "foo", "authors": ["Smith, J.", "Doe, J."], "abstract": "word " * 200},
+    {"id": "2", "title": "foo"},
+]
+
+
+def test_format_value():
+    assert format_value(None) == ""
+    assert format_value(["Smith, J.", "Doe, J."]) == "Smith, J.; Doe, J."
+    assert format_value(2020) == "2020"
+
+
+def test_get_preview():
+    assert get_preview("foo bar", 10) == ("foo bar", False)
+    assert get_preview("foo bar baz", 10) == ("foo bar…", True)
+    assert get_preview("foobarbaz", 3) == ("foo…", True)
+
+
+def test_get_card_key():
+    key = get_card_key(0, False, 1, None, False)
+    # the selection only matters when annotating
+    assert key == get_card_key(0, False, 2, None, False)
+    assert get_card_key(0, True, 1, None, False) != get_card_key(0, True, 2, None, False)
+
+
+def test_render_card():
+    html = str(render_card(0, 5, group, False, 0, None, False))
+    assert "word " * 200 not in html
+    assert "Show more" in html
+    html = str(render_card(0, 5, group, True, 3, "https://doi.org/{id}", True))
+    assert "word " * 200 in html
+    assert 'href="https://doi.org/1"' in html
+    assert html.count('type="radio"') == 4
+    assert "Show less" in html
@@ -0,0 +1,55 @@
+import pickle
+
+from deduper.columns import ColumnStore
+
+
+class TestColumnStore:
+    def test_get_column(self):
+        columns = ColumnStore([{"title": "Foo"}, {"title": None}, {}])
+        assert columns.get_column("title") == ["Foo", None, None]
+        assert columns.get_column("title", case_sensitive=False) == ["foo", None, None]
+        assert columns.get_column("title", processor=bool) == [True, False, False]
+        # columns are only computed once
+        assert columns.get_column("title") is columns.get_column("title")
+
+    def test_add(self):
+        columns = ColumnStore([{"title": "Foo"}])
+        columns.get_column("title", case_sensitive=False)
+        assert columns.add([{"title": "Bar"}]) == range(1, 2)
+        # computed columns are extended with the new records
+        assert columns.get_column("title", case_sensitive=False) == ["foo", "bar"]
+        assert columns.get_column("title") == ["Foo", "Bar"]
+
+    def test_take(self):
+        columns = ColumnStore([{"title": "Foo"}, {"title": "Bar"}, {"title": "Baz"}])
+        assert columns.take([2, 0]).records == [{"title": "Baz"}, {"title": "Foo"}]
+        # only the given fields are copied
+        subset = columns.take([2, 0], fields=["title"])
+        assert subset.get_column("title", case_sensitive=False) == ["baz", "foo"]
+
+    def test_field_paths(self):
+        class Journal:
+            def __init__(self, name):
+                self.name = name
+
+        records = [
+            {"journal": Journal("Nature"), "authors": [{"name": "Smith"}, {"name": "Doe"}]},
+            {"journal": None, "authors": []},
+        ]
+        columns = ColumnStore(records)
+        assert columns.get_column("journal__name") == ["Nature", None]
+        assert columns.get_column("authors__1__name") == ["Doe", None]
+        assert columns.get_column("authors__-1__name") == ["Doe", None]
+        assert columns.get_column("authors__0__missing") == [None, None]
+
+    def test_extractors(self):
+        records = [{"authors": ["Smith", "Doe"]}, {"authors": []}]
+        columns = ColumnStore(
+            records, extractors={"author_count": lambda record: len(record["authors"])}
+        )
+        assert columns.get_column("author_count") == [2, 0]
+        assert columns.take([1], fields=None).get_column("author_count") == [0]
+        # compiled accessors are not pickled
+        columns = ColumnStore(records)
+        columns.get_column("authors__0")
+        assert pickle.loads(pickle.dumps(columns)).get_column("authors__0") == ["Smith", None]  # noqa: S301
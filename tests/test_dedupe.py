@@ -1,8 +1,14 @@
 # from datetime import datetime, timezone
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 import pytest
+from rapidfuzz.fuzz import WRatio, partial_ratio, ratio
 
-from deduper import dedupe
+from deduper import blocking, dedupe
+from deduper.columns import ColumnStore
+from deduper.grouping import GroupList
+from deduper.observers import CountCollector, Observer
 
 
 def compare_set_lists(first_set_list, second_set_list):
@@ -38,12 +44,460 @@ class TestDedupeModule:
         tests = [
             ([{1, 2}, {3, 4}], [{2, 3}, {5, 6}], [{1, 2}, {3, 4}, {5, 6}]),
             ([{1, 2}], [{2, 3}], [{1, 2, 3}]),
+            ([{1, 2, 3, 4}], [{1}, {4}], [{1}, {2, 3}, {4}]),
+            ([{1, 2}, {4, 5}], [{2, 3}], [{1, 2, 3}, {4, 5}]),
         ]
         for test in tests:
             results = dedupe.DedupeModule().separate_obj_set_lists(test[0], test[1])
             compare_set_lists(results, test[2])
 
 
+class TestUniqueDedupe:
+    def test_multiple_fields(self):
+        records = [
+            {"id": "1", "doi": None},
+            {"id": "2", "doi": "10.1/A"},
+            {"id": "1", "doi": "10.1/a"},
+            {"id": "3", "doi": None},
+            {"id": None, "doi": "10.1/A"},
+            {"id": "3", "doi": "10.1/b"},
+        ]
+        module = dedupe.UniqueDedupe(fields=["id", "doi"])
+        # records are joined through any shared value, even a degree removed
+        compare_set_lists(
+            module.really_execute([records]),
+            [[records[0], records[2]], [records[1], records[4]], [records[3], records[5]]],
+        )
+        module = dedupe.UniqueDedupe(fields=["id", "doi"], case_sensitive=False)
+        compare_set_lists(
+            module.really_execute([records]),
+            [[records[0], records[1], records[2], records[4]], [records[3], records[5]]],
+        )
+
+
+class TestNormalizedDedupe:
+    def test_execute(self):
+        records = [
+            {"title": "This is a Title."},
+            {"title": "this is a title"},
+            {"title": "THIS IS A TITLE!"},
+            {"title": "this is another title"},
+            {"title": "..."},
+            {"title": None},
+            {"title": "!"},
+        ]
+        module = dedupe.NormalizedDedupe(fields=["title"])
+        # values which are empty once processed match nothing
+        compare_set_lists(module.really_execute([records]), [records[0:3]])
+
+
+class TestUniqueTogetherDedupe:
+    def test_execute(self):
+        values = ["a", "b", "c", None]
+        records = [
+            {"id": values[index % 4], "year": values[index // 4 % 3], "doi": values[index % 3]}
+            for index in range(40)
+        ]
+        module = dedupe.UniqueTogetherDedupe(fields=["id", "year", "doi"])
+        results = module.really_execute([records[:20], records[20:]])
+        # the same as separating the unique groups by the value sets of each field
+        module.columns = ColumnStore(records)
+        expected = []
+        for group in dedupe.UniqueDedupe.execute(module, [range(20), range(20, 40)]):
+            separated = [group]
+            for field in module.fields:
+                field_groups = module.get_field_obj_set_list(group, field)
+                separated = module.separate_obj_set_lists(separated, field_groups)
+            expected.extend(sorted(obj_set) for obj_set in separated if len(obj_set) > 1)
+        assert len(expected) > 1
+        assert results == [[records[index] for index in group] for group in expected]
+
+
+class TestFuzzyDedupe:
+    titles = (
+        "this is a duplicate title",  # duplicate 1a
+        "THIS IS A DUPLICATE TITLE!",  # duplicate 1b
+        "this is duplicate title",  # duplicate 1c
+        "this is unique",
+        "another duplicate",  # duplicate 2a
+        "and another duplicate",  # duplicate 2b
+    )
+
+    def test_execute(self):
+        records = [{"title": title} for title in self.titles]
+        results = dedupe.FuzzyDedupe(field="title", threshold=90).really_execute([records])
+        expected = [set(self.titles[0:3]), set(self.titles[4:6])]
+        compare_set_lists([{obj["title"] for obj in result} for result in results], expected)
+
+    def test_vectorized(self):
+        records = [{"title": title} for title in self.titles]
+        expected = dedupe.FuzzyDedupe(field="title", threshold=90).really_execute([records])
+        # tiles smaller than the candidate set are joined together
+        module = dedupe.FuzzyDedupe(field="title", threshold=90, vectorized=True, tile_size=2)
+        assert module.really_execute([records]) == expected
+
+    def test_vectorized_comparisons(self):
+        records = [{"title": f"{title} {index}"} for index in range(20) for title in self.titles]
+        group_list = GroupList.from_sizes([len(records)])
+        counts = []
+        for vectorized in (False, True):
+            collector = CountCollector()
+            module = dedupe.FuzzyDedupe(field="title", threshold=90, vectorized=vectorized)
+            module.strip_size = 16
+            module.tile_size = 50
+            module.run(group_list, ColumnStore(records), collector)
+            counts.append(collector.counts["comparisons"])
+        # only pairs above the diagonal are counted, as with extract
+        assert counts == [120 * 119 // 2] * 2
+
+    def test_blockers(self):
+        records = [{"title": title} for title in self.titles]
+        module = dedupe.FuzzyDedupe(
+            field="title", threshold=90, blockers=[blocking.PrefixBlocker(length=4)]
+        )
+        results = module.really_execute([records])
+        # "another duplicate" and "and another duplicate" no longer share a block
+        expected = [set(self.titles[0:3])]
+        compare_set_lists([{obj["title"] for obj in result} for result in results], expected)
+
+    def test_length_bounds(self):
+        records = [{"title": title} for title in self.titles]
+        for scorer in dedupe.LENGTH_BOUNDS:
+            for threshold in (50, 90, 97):
+                # a scorer without a length bound compares every pair
+                expected = dedupe.FuzzyDedupe(
+                    field="title",
+                    threshold=threshold,
+                    scorer=lambda *args, s=scorer, **kwargs: s(*args, **kwargs),
+                ).really_execute([records])
+                for vectorized in (False, True):
+                    module = dedupe.FuzzyDedupe(
+                        field="title", threshold=threshold, scorer=scorer, vectorized=vectorized
+                    )
+                    compare_set_lists(module.really_execute([records]), expected)
+
+    def test_copies(self):
+        records = [{"title": title} for title in self.titles * 3] + [{"title": None}] * 2
+        group_list = GroupList.from_sizes([len(records)])
+        collector = CountCollector()
+        module = dedupe.FuzzyDedupe(field="title", threshold=90)
+        results = module.run(group_list, ColumnStore(records), collector)
+        expected = [
+            [index for index, record in enumerate(records) if record["title"] in titles]
+            for titles in (self.titles[0:3], self.titles[3:4], self.titles[4:6])
+        ]
+        # empty values score 0 with WRatio, so they are not grouped
+        compare_set_lists([list(group) for group in results], expected)
+        # only the 5 distinct titles are scored with each other, then the
+        # ungrouped copied values, "this is unique" and the empty value, with themselves
+        assert collector.counts["comparisons"] == 5 * 4 // 2 + 2
+        # ratio scores empty values 100, but does not match "another duplicate" titles
+        module = dedupe.FuzzyDedupe(field="title", threshold=90, scorer=ratio)
+        results = module.run(group_list, ColumnStore(records))
+        expected = [*expected[0:2], [4, 10, 16], [5, 11, 17], [18, 19]]
+        compare_set_lists([list(group) for group in results], expected)
+
+    def test_get_similarity_graph(self):
+        records = [{"title": title} for title in self.titles * 2] + [{"title": None}] * 2
+        group_list = GroupList.from_sizes([len(records)])
+        for scorer in (WRatio, ratio):
+            for vectorized in (False, True):
+                module = dedupe.FuzzyDedupe(
+                    field="title", threshold=50, scorer=scorer, vectorized=vectorized
+                )
+                graph = module.get_similarity_graph(group_list, ColumnStore(records))
+                # groups at each threshold are those of a module with that threshold
+                for threshold in (50, 70, 90, 95, 100):
+                    module = dedupe.FuzzyDedupe(field="title", threshold=threshold, scorer=scorer)
+                    expected = module.run(group_list, ColumnStore(records))
+                    compare_set_lists(list(graph.get_groups(threshold)), list(expected))
+
+    def test_get_similarity_graph_vectorized(self):
+        titles = ("ozone exposure", "lead exposure", "air pollution", "noise pollution")
+        records = [{"title": title} for title in titles]
+        group_list = GroupList.from_sizes([len(records)])
+        graphs = [
+            dedupe.FuzzyDedupe(
+                field="title", threshold=60, scorer=ratio, vectorized=vectorized
+            ).get_similarity_graph(group_list, ColumnStore(records))
+            for vectorized in (False, True)
+        ]
+        # scores that occur are exact thresholds, so they must not be rounded to float32
+        thresholds = {score for score in graphs[0].scores.tolist() if score != int(score)}
+        assert thresholds
+        for threshold in thresholds:
+            assert list(graphs[0].get_groups(threshold)) == list(graphs[1].get_groups(threshold))
+
+    def test_get_length_ends(self):
+        str_list = ["", "", "abcd", "abcde", "abcdefgh", "abcdefghij"]
+        module = dedupe.FuzzyDedupe(field="title", threshold=80, scorer=ratio)
+        # 2 * 4 / (4 + 6) is 80, so a value of 4 may match one of 5 but not 8
+        assert module.get_length_ends(str_list) == [2, 2, 4, 4, 6, 6]
+        module = dedupe.FuzzyDedupe(field="title", threshold=80)
+        # empty values never match, and partial scores reach 90 up to 8 times the length
+        assert module.get_length_ends(str_list) == [0, 0, 6, 6, 6, 6]
+        module = dedupe.FuzzyDedupe(field="title", threshold=80, scorer=partial_ratio)
+        assert module.get_length_ends(str_list) is None
+
+    def test_wratio_length_bound(self):
+        assert dedupe.wratio_length_bound(0, 10) == 0
+        assert dedupe.wratio_length_bound(10, 10) == 100
+        assert dedupe.wratio_length_bound(10, 15) == 95
+        assert dedupe.wratio_length_bound(10, 80) == 90
+        assert dedupe.wratio_length_bound(10, 81) == 60
+
+
+class TestDeduper:
+    def test_get_duplicates(self):
+        class IdAndTitleDeduper(dedupe.Deduper):
+            modules = (
+                dedupe.UniqueDedupe(fields=["id"]),
+                dedupe.FuzzyDedupe(field="title", threshold=90),
+            )
+
+        records = [
+            {"id": "1", "title": "this is a duplicate title"},
+            {"id": "1", "title": "THIS IS A DUPLICATE TITLE!"},
+            {"id": "1", "title": "this is unique"},
+            {"id": "2", "title": "this is a duplicate title"},
+        ]
+        results = IdAndTitleDeduper.get_duplicates(records)
+        # groups are materialized in record order
+        assert results == [[records[0], records[1]]]
+
+    def test_get_duplicates_parallel(self):
+        class YearAndTitleDeduper(dedupe.Deduper):
+            modules = (
+                dedupe.UniqueDedupe(fields=["year"]),
+                dedupe.FuzzyDedupe(field="title", threshold=90),
+            )
+
+        titles = ("apples", "bridges", "candles", "dolphins", "engines", "forests")
+        records = [
+            {"year": str(index % 4), "title": f"a title about {titles[index % 6]}"}
+            for index in range(48)
+        ]
+        results = YearAndTitleDeduper.get_duplicates(records, workers=2)
+        assert results == YearAndTitleDeduper.get_duplicates(records)
+        assert len(results) == 12
+
+    def test_get_duplicates_threads(self):
+        class IdAndTitleDeduper(dedupe.Deduper):
+            modules = (
+                dedupe.UniqueDedupe(fields=["id"]),
+                dedupe.FuzzyDedupe(
+                    field="title", threshold=90, blockers=[blocking.PrefixFilterBlocker(90)]
+                ),
+            )
+
+        paused = threading.Event()
+        resumed = threading.Event()
+
+        class PausingObserver(Observer):
+            # pause the first run while fuzzy deduping, until the second run is done
+            def count(self, module, name, value=1):
+                if isinstance(module, dedupe.FuzzyDedupe) and not paused.is_set():
+                    paused.set()
+                    assert resumed.wait(10)
+
+        first_records = [
+            {"id": str(index % 2), "title": f"a title about {word}"}
+            for index, word in enumerate(["apples", "apples!", "bridges", "bridges!"] * 5)
+        ]
+        second_records = [
+            {"id": "1", "title": "this is a duplicate title"},
+            {"id": "1", "title": "THIS IS A DUPLICATE TITLE!"},
+        ]
+        observer = CountCollector()
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            first = executor.submit(
+                IdAndTitleDeduper.get_duplicates, first_records, observer=PausingObserver()
+            )
+            assert paused.wait(10)
+            second = executor.submit(
+                IdAndTitleDeduper.get_duplicates, second_records, observer=observer
+            )
+            second_results = second.result(timeout=10)
+            resumed.set()
+            first_results = first.result(timeout=10)
+        assert first_results == IdAndTitleDeduper.get_duplicates(first_records)
+        assert len(first_results) == 4
+        assert second_results == [second_records]
+        assert observer.counts["comparisons"] > 0
+
+    def test_get_duplicates_nested(self):
+        class Record:
+            def __init__(self, title, ids):
+                self.title = title
+                self.ids = ids
+
+        class NestedDeduper(dedupe.Deduper):
+            modules = (
+                dedupe.UniqueDedupe(fields=["ids__pmid"]),
+                dedupe.FuzzyDedupe(field="lower_title", threshold=90),
+            )
+            extractors = {"lower_title": lambda record: record.title.lower()}  # noqa: RUF012
+
+        records = [
+            Record("A Duplicate Title", {"pmid": "1"}),
+            Record("a duplicate title", {"pmid": "1"}),
+            Record("a duplicate title", {"pmid": "2"}),
+        ]
+        assert NestedDeduper.get_duplicates(records) == [records[:2]]
+
+    def test_deduplicate(self):
+        class IdDeduper(dedupe.Deduper):
+            modules = (dedupe.UniqueDedupe(fields=["id"]),)
+
+        class YearDeduper(IdDeduper):
+            primary_keys = ("year", "-title")
+
+        class ScoreDeduper(IdDeduper):
+            @classmethod
+            def score_obj(cls, obj):
+                return len(obj["title"])
+
+        records = [
+            {"id": "1", "year": 2000, "title": "b"},
+            {"id": "1", "year": 2001, "title": "bb"},
+            {"id": "1", "year": 2001, "title": "a"},
+            {"id": "1", "year": None, "title": "ccc"},
+            {"id": "2", "year": 2000, "title": "a"},
+            {"id": "2", "year": 2000, "title": "a"},
+        ]
+        # the first object is primary without any scoring
+        assert IdDeduper.deduplicate(records) == [
+            (records[0], records[1:4]),
+            (records[4], records[5:]),
+        ]
+        assert YearDeduper.deduplicate(records) == [
+            (records[2], [records[0], records[1], records[3]]),
+            (records[4], records[5:]),
+        ]
+        assert ScoreDeduper.deduplicate(records) == [
+            (records[3], records[:3]),
+            (records[4], records[5:]),
+        ]
+        assert YearDeduper.separate_duplicates(records[:4]) == (
+            records[2],
+            [*records[:2], records[3]],
+        )
+
+    def test_deduplicate_group_scores(self):
+        class IdDeduper(dedupe.Deduper):
+            modules = (dedupe.UniqueDedupe(fields=["id"]),)
+
+        class YearDeduper(IdDeduper):
+            primary_keys = ("year",)
+
+        scored = []
+
+        class ListScoreDeduper(IdDeduper):
+            @classmethod
+            def score_obj(cls, obj):
+                scored.append(obj)
+                return [obj["year"]]
+
+        records = [
+            {"id": "1", "year": 2000},
+            {"id": "1", "year": 2001},
+            {"id": "2", "year": "n/a"},
+            {"id": "3", "year": 1999},
+        ]
+        # only objects in a group are compared, and only with each other
+        assert YearDeduper.deduplicate(records) == [(records[1], [records[0]])]
+        assert ListScoreDeduper.deduplicate(records) == [(records[1], [records[0]])]
+        assert scored == records[:2]
+
+
+class TestMinHashDedupe:
+    words = "the quick brown fox jumps over a lazy dog while seven wizards box jolly quails".split()
+
+    def get_records(self):
+        text = " ".join(self.words * 4)
+        return [
+            {"abstract": text},
+            # a single changed word keeps most shingles
+            {"abstract": text.replace("lazy", "sleepy", 1)},
+            {"abstract": " ".join(reversed(self.words * 4))},
+            {"abstract": None},
+            {"abstract": text.upper()},
+        ]
+
+    def test_execute(self):
+        records = self.get_records()
+        module = dedupe.MinHashDedupe(field="abstract", threshold=0.8)
+        results = module.really_execute([records])
+        compare_set_lists(results, [[records[0], records[1], records[4]]])
+
+    def test_get_band_count(self):
+        assert dedupe.MinHashDedupe(field="abstract", threshold=0.8).get_band_count() == 16
+        assert dedupe.MinHashDedupe(field="abstract", threshold=0.5).get_band_count() == 32
+        assert dedupe.MinHashDedupe(field="abstract", bands=4).get_band_count() == 4
+
+    def test_get_signatures(self):
+        module = dedupe.MinHashDedupe(field="abstract", num_perm=64)
+        module.chunk_size = 8
+        word_hashes = {}
+        shingles_list = [
+            module.get_shingles(" ".join(self.words[:size]), word_hashes) for size in (1, 3, 12)
+        ]
+        signatures = module.get_signatures(shingles_list)
+        assert signatures.shape == (3, 64)
+        # signatures do not depend on how sets are chunked
+        module.chunk_size = 1 << 16
+        assert (module.get_signatures(shingles_list) == signatures).all()
+        assert (module.get_signatures(shingles_list[2:]) == signatures[2:]).all()
+
+
+class TestTfidfDedupe:
+    def get_records(self):
+        return [
+            {"title": "Effects of ozone exposure on lung function in children"},
+            # reordered words
+            {"title": "Lung function in children: effects of ozone exposure"},
+            # truncated
+            {"title": "Effects of ozone exposure on lung function"},
+            {"title": None},
+            {"title": "Effects of lead exposure on kidney function in adults"},
+        ]
+
+    def test_execute(self):
+        records = self.get_records()
+        module = dedupe.TfidfDedupe(field="title", threshold=0.7)
+        results = module.really_execute([records])
+        compare_set_lists(results, [records[:3]])
+        # character n-grams also match misspelled words
+        records[1]["title"] = "Lung functoin in childrn: effects of ozone exposure"
+        module = dedupe.TfidfDedupe(field="title", threshold=0.6, char_ngrams=3)
+        results = module.really_execute([records])
+        compare_set_lists(results, [records[:3]])
+
+    def test_get_match_lists(self):
+        module = dedupe.TfidfDedupe(field="title", threshold=0.5)
+        str_list = ["a b c", "a b c", "a b c d", "a b", "e f"]
+        match_lists = module.get_match_lists(str_list)
+        assert match_lists == [[1, 2, 3], [2, 3], [3], [], []]
+        # matches do not depend on how rows are chunked
+        module.chunk_size = 1
+        assert module.get_match_lists(str_list) == match_lists
+        # only the best matches of each row are kept
+        module.top_k = 1
+        assert module.get_match_lists(str_list) == [[1], [3], [3], [], []]
+
+    def test_identical_values(self):
+        # identical values can score slightly below 1 in floating point
+        records = [
+            {"title": "a study of lead exposure in children"},
+            {"title": "a study of lead exposure in children"},
+        ]
+        module = dedupe.TfidfDedupe(field="title", threshold=1.0)
+        assert module.really_execute([records]) == [records]
+        records = [{"title": "zeta"}, {"title": "zeta"}]
+        module = dedupe.TfidfDedupe(field="title", threshold=1.0, char_ngrams=3)
+        assert module.really_execute([records]) == [records]
+
+
 """
 @pytest.mark.django_db()
 class TestUniqueTogetherDedupe:
@@ -0,0 +1,53 @@
+import csv
+import io
+
+import pytest
+
+pytest.importorskip("openpyxl")
+
+from deduper.app.export import (  # noqa: E402
+    ANNOTATED_COLUMNS,
+    COLUMNS,
+    iter_rows,
+    stream_export,
+)
+
+results = [[{"id": "1"}, {"id": "2"}], [{"id": "3"}, {"id": "4"}, {"id": "5"}]]
+
+
+def test_iter_rows():
+    assert list(iter_rows(results)) == [(0, "1"), (0, "2"), (1, "3"), (1, "4"), (1, "5")]
+    # the first group is not reviewed, the second resolves to its second record
+    assert list(iter_rows(results, [0, 3])) == [
+        (0, "1", "Not reviewed", "1"),
+        (0, "2", "Not reviewed", "2"),
+        (1, "3", "Duplicate identified", "4"),
+        (1, "4", "Duplicate identified", "4"),
+        (1, "5", "Duplicate identified", "4"),
+    ]
+
+
+def test_stream_csv():
+    chunks = list(stream_export(iter_rows(results), COLUMNS, "csv", chunk_size=8))
+    assert len(chunks) > 1
+    rows = list(csv.reader(io.StringIO(b"".join(chunks).decode())))
+    assert rows[0] == COLUMNS
+    assert rows[1:] == [["0", "1"], ["0", "2"], ["1", "3"], ["1", "4"], ["1", "5"]]
+
+
+def test_stream_xlsx():
+    from openpyxl import load_workbook
+
+    data = b"".join(stream_export(iter_rows(results, [1, 0]), ANNOTATED_COLUMNS, "xlsx"))
+    rows = list(load_workbook(io.BytesIO(data)).active.values)
+    assert rows[0] == tuple(ANNOTATED_COLUMNS)
+    assert rows[1] == (0, "1", "No duplicates found", "1")
+    assert len(rows) == 6
+
+
+def test_stream_parquet():
+    pq = pytest.importorskip("pyarrow.parquet")
+    data = b"".join(stream_export(iter_rows(results), COLUMNS, "parquet"))
+    table = pq.read_table(io.BytesIO(data))
+    assert table.column_names == COLUMNS
+    assert table.column("id").to_pylist() == ["1", "2", "3", "4", "5"]
@@ -0,0 +1,71 @@
+import pytest
+
+from deduper import grouping
+
+
+class TestDisjointSet:
+    def test_union(self):
+        disjoint_set = grouping.DisjointSet([1, 2, 3, 4])
+        assert disjoint_set.union(1, 2) is True
+        assert disjoint_set.union(2, 1) is False
+        assert disjoint_set.find(1) == disjoint_set.find(2)
+        assert disjoint_set.find(3) != disjoint_set.find(1)
+        # new items are added on union
+        assert disjoint_set.union(4, 5) is True
+        assert 5 in disjoint_set
+        assert len(disjoint_set) == 5
+
+    def test_groups(self):
+        disjoint_set = grouping.DisjointSet()
+        disjoint_set.union_all([1, 2, 3])
+        disjoint_set.add(4)
+        disjoint_set.union_all([5, 6])
+        disjoint_set.union(6, 1)
+        # groups are ordered by their most recently added item
+        assert disjoint_set.groups() == [{4}, {1, 2, 3, 5, 6}]
+
+
+def test_merge_pairs():
+    assert grouping.merge_pairs([(1, 2), (2, 3), (4, 5)]) == [{1, 2, 3}, {4, 5}]
+    assert grouping.merge_pairs([(1, 2)], items=[3]) == [{3}, {1, 2}]
+
+
+def test_merge_sets():
+    assert grouping.merge_sets([{1, 2}, {3, 4}, {2, 3}, {5}]) == [{1, 2, 3, 4}, {5}]
+    assert grouping.merge_sets([set()]) == []
+
+
+class TestGroupList:
+    def test_from_groups(self):
+        group_list = grouping.GroupList.from_groups([{3, 1}, [2], []])
+        assert len(group_list) == 3
+        assert [list(group) for group in group_list] == [[1, 3], [2], []]
+        assert list(group_list[-1]) == []
+        assert list(group_list.members) == [1, 3, 2]
+        assert list(group_list.offsets) == [0, 2, 3, 3]
+
+    def test_from_sizes(self):
+        group_list = grouping.GroupList.from_sizes([2, 3])
+        assert [list(group) for group in group_list] == [[0, 1], [2, 3, 4]]
+
+
+class TestSimilarityGraph:
+    def test_get_groups(self):
+        graph = grouping.SimilarityGraph(
+            7,
+            first=[0, 1, 4, 0, 5],
+            second=[1, 2, 3, 3, 6],
+            scores=[95, 90, 100, 85, 80],
+            floor=80,
+        )
+        assert len(graph) == 5
+        assert [list(group) for group in graph.get_groups(100)] == [[3, 4]]
+        assert sorted(list(group) for group in graph.get_groups(90)) == [[0, 1, 2], [3, 4]]
+        assert sorted(list(group) for group in graph.get_groups(85)) == [[0, 1, 2, 3, 4]]
+        assert sorted(list(group) for group in graph.get_groups(80)) == [[0, 1, 2, 3, 4], [5, 6]]
+        with pytest.raises(ValueError):
+            graph.get_groups(70)
+
+    def test_empty(self):
+        graph = grouping.SimilarityGraph(3, first=[], second=[], scores=[], floor=90)
+        assert list(graph.get_groups(90)) == []
@@ -0,0 +1,102 @@
+import hashlib
+
+from deduper import blocking, dedupe
+from deduper.index import DeduperIndex
+
+
+class IdAndTitleDeduper(dedupe.Deduper):
+    modules = (
+        dedupe.UniqueDedupe(fields=["id"]),
+        dedupe.FuzzyDedupe(field="title", threshold=90),
+    )
+
+
+class YearTitleDeduper(dedupe.Deduper):
+    modules = (dedupe.FuzzyDedupe(field="title", threshold=90, blockers=[blocking.YearBlocker()]),)
+
+
+class NormalizedTitleDeduper(dedupe.Deduper):
+    modules = (
+        dedupe.NormalizedDedupe(fields=["title"]),
+        dedupe.FuzzyDedupe(field="title", threshold=90),
+    )
+
+
+class BlockedTitleDeduper(dedupe.Deduper):
+    modules = (dedupe.FuzzyDedupe(field="title", threshold=90, blockers=[blocking.TokenBlocker()]),)
+
+
+class TestDeduperIndex:
+    def test_add(self):
+        records = [
+            {"id": "1", "title": "this is a duplicate title"},
+            {"id": "1", "title": "this is unique"},
+            {"id": "2", "title": "this is a duplicate title"},
+        ]
+        index = DeduperIndex(IdAndTitleDeduper, records)
+        assert index.get_duplicates() == []
+
+        changes = index.add([{"id": "1", "title": "THIS IS A DUPLICATE TITLE!"}])
+        assert list(changes.ids) == [3]
+        assert changes.added == [[0, 3]]
+        assert changes.removed == []
+
+        # unrelated records do not change any groups
+        changes = index.add([{"id": "3", "title": "this is unique"}])
+        assert changes.added == changes.removed == []
+
+    def test_remove(self):
+        records = [
+            {"title": "this is a duplicate title"},
+            {"title": "this is a duplicate title!"},
+            {"title": "THIS IS A DUPLICATE TITLE"},
+            {"title": "another title"},
+        ]
+        index = DeduperIndex(BlockedTitleDeduper, records)
+        assert index.get_duplicates() == [records[0:3]]
+
+        changes = index.remove([1])
+        assert changes.added == [[0, 2]]
+        assert changes.removed == [[0, 1, 2]]
+        assert index.get_duplicates() == [[records[0], records[2]]]
+
+    def test_matches_deduper(self):
+        records = [
+            {"id": str(index % 3), "title": title}
+            for index, title in enumerate(
+                [
+                    "this is a duplicate title",
+                    "THIS IS A DUPLICATE TITLE!",
+                    "this is duplicate title",
+                    "this is unique",
+                    "another duplicate",
+                    "and another duplicate",
+                ]
+            )
+        ]
+        index = DeduperIndex(IdAndTitleDeduper)
+        for record in records:
+            index.add([record])
+        assert index.get_duplicates() == IdAndTitleDeduper.get_duplicates(records)
+
+    def test_normalized(self):
+        records = [
+            {"title": "this is a duplicate title"},
+            {"title": "another title"},
+            {"title": "..."},
+            {"title": "THIS IS A DUPLICATE TITLE!"},
+            {"title": "!"},
+        ]
+        index = DeduperIndex(NormalizedTitleDeduper, records)
+        assert index.get_duplicates() == NormalizedTitleDeduper.get_duplicates(records)
+        assert index.get_duplicates() == [[records[0], records[3]]]
+
+    def test_shared_module(self):
+        # distinct titles, which do not match each other
+        titles = [hashlib.sha256(str(index).encode()).hexdigest() for index in range(50)]
+        records = [{"title": title, "year": 2000 + index % 5} for index, title in enumerate(titles)]
+        index = DeduperIndex(YearTitleDeduper, records)
+        # running the deduper elsewhere does not affect the index
+        YearTitleDeduper.get_duplicates([{"title": "other title", "year": 2000}])
+        changes = index.add([{"title": titles[49], "year": 2004}])
+        assert changes.added == [[49, 50]]
@@ -0,0 +1,70 @@
+import pytest
+
+from deduper import dedupe
+from deduper.observers import (
+    DedupeCancelled,
+    ProgressObserver,
+    StatsCollector,
+    get_size_histogram,
+)
+
+
+class IdAndTitleDeduper(dedupe.Deduper):
+    modules = (
+        dedupe.UniqueDedupe(fields=["id"]),
+        dedupe.FuzzyDedupe(field="title", threshold=90),
+    )
+
+
+records = [
+    {"id": "1", "title": "this is a duplicate title"},
+    {"id": "1", "title": "THIS IS A DUPLICATE TITLE!"},
+    {"id": "1", "title": "this is unique"},
+    {"id": "2", "title": "this is a duplicate title"},
+    {"id": "2", "title": "another title"},
+]
+
+
+def test_get_size_histogram():
+    assert get_size_histogram([[], [1], [1, 2], [1, 2, 3], [1, 2, 3, 4]]) == {
+        0: 1,
+        1: 1,
+        2: 2,
+        4: 1,
+    }
+
+
+class TestStatsCollector:
+    def test_get_duplicates(self):
+        collector = StatsCollector()
+        IdAndTitleDeduper.get_duplicates(records, observer=collector)
+        unique_stats, fuzzy_stats = collector.stats
+        assert unique_stats.input_histogram == {4: 1}
+        assert unique_stats.output_histogram == {2: 2}
+        assert fuzzy_stats.input_groups == 2
+        assert fuzzy_stats.output_groups == 1
+        # each pair of distinct values in each candidate set is compared once,
+        # and the identical titles are only scored against themselves
+        assert fuzzy_stats.counts["comparisons"] == 2 + 1
+        assert fuzzy_stats.counts["condense"] == 2
+        assert collector.to_list()[0]["module"] == "UniqueDedupe"
+
+    def test_get_duplicates_parallel(self):
+        collector = StatsCollector()
+        IdAndTitleDeduper.get_duplicates(records, workers=2, observer=collector)
+        assert collector.stats[1].counts["comparisons"] == 2 + 1
+
+
+class TestProgressObserver:
+    def test_progress(self):
+        observer = ProgressObserver(len(IdAndTitleDeduper.modules))
+        assert observer.progress == 0
+        IdAndTitleDeduper.get_duplicates(records, observer=observer)
+        assert observer.progress == 1
+        assert observer.comparisons == 2 + 1
+
+    def test_cancel(self):
+        observer = ProgressObserver(len(IdAndTitleDeduper.modules))
+        observer.cancel()
+        with pytest.raises(DedupeCancelled):
+            IdAndTitleDeduper.get_duplicates(records, observer=observer)
@@ -0,0 +1,22 @@
+import pickle
+
+from deduper import dedupe
+from deduper.parallel import split_batches
+
+
+class TitleDeduper(dedupe.Deduper):
+    modules = (dedupe.FuzzyDedupe(field="title", threshold=90),)
+
+
+def test_split_batches():
+    assert split_batches([100, 1, 1, 50, 50], 2) == [[0, 1], [2, 3, 4]]
+    assert split_batches([1, 1], 4) == [[0], [1]]
+    assert split_batches([], 2) == []
+
+
+def test_module_pickle_size():
+    module = TitleDeduper.modules[0]
+    records = [{"title": f"title {index}"} for index in range(200)]
+    TitleDeduper.get_duplicates(records)
+    # the column store of a run is not kept on the module, so it is not sent to workers
+    assert len(pickle.dumps(module)) < 1000
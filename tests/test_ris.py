@@ -0,0 +1,39 @@
+import io
+
+import pytest
+
+rispy = pytest.importorskip("rispy")
+
+from deduper.app.ris import iter_ris  # noqa: E402
+
+RIS = """TY  - JOUR
+ID  - 1
+TI  - A multi
+  line title
+AU  - Doe, J.
+AU  - Roe, R.
+ZZ  - unknown tag
+UR  - http://a.org; http://b.org
+ER  -
+
+TY  - BOOK
+ID  - 2
+TI  - Another title
+AB  - An abstract
+ER  -
+"""
+
+
+def test_iter_ris():
+    records = iter_ris(io.StringIO(RIS))
+    # records are read one at a time
+    assert next(records)["id"] == "1"
+    assert list(iter_ris(io.StringIO(RIS))) == rispy.loads(RIS)
+
+
+def test_iter_ris_fields():
+    records = list(iter_ris(io.StringIO(RIS), fields=["id", "title"]))
+    assert records == [
+        {"id": "1", "title": "A multi line title"},
+        {"id": "2", "title": "Another title"},
+    ]
@@ -0,0 +1,76 @@
+import pytest
+
+from deduper import blocking, dedupe
+from deduper.sqlite_index import SqliteDeduperIndex
+
+
+class YearAndTitleDeduper(dedupe.Deduper):
+    modules = (
+        dedupe.UniqueDedupe(fields=["year"]),
+        dedupe.FuzzyDedupe(field="title", threshold=90, blockers=[blocking.TokenBlocker()]),
+    )
+
+
+class IdAndTitleDeduper(dedupe.Deduper):
+    modules = (
+        dedupe.UniqueDedupe(fields=["id"]),
+        dedupe.FuzzyDedupe(field="title", threshold=90),
+    )
+
+
+records = [
+    {"year": "2020", "title": "this is a duplicate title"},
+    {"year": "2020", "title": "this is unique"},
+    {"year": "2021", "title": "this is a duplicate title"},
+    {"year": "2020", "title": "THIS IS A DUPLICATE TITLE!"},
+    {"year": "2020", "title": "another title"},
+]
+
+
+class TestSqliteDeduperIndex:
+    def test_reopen(self, tmp_path):
+        path = tmp_path / "index.db"
+        index = SqliteDeduperIndex(YearAndTitleDeduper, path, records[:3])
+        index.close()
+
+        index = SqliteDeduperIndex(YearAndTitleDeduper, path)
+        changes = index.add(records[3:])
+        assert list(changes.ids) == [3, 4]
+        assert index.get_duplicates() == YearAndTitleDeduper.get_duplicates(records)
+
+        changes = index.remove([3])
+        assert changes.removed == [[0, 3]]
+        assert index.get_duplicates() == []
+        index.close()
+
+        with pytest.raises(ValueError):
+            SqliteDeduperIndex(dedupe.Deduper, path)
+
+    def test_match(self, tmp_path):
+        index = SqliteDeduperIndex(YearAndTitleDeduper, tmp_path / "index.db", records[:3])
+        new_record = {"year": "2020", "title": "this is a duplicate title!"}
+        assert index.match([new_record]) == [[records[0], new_record]]
+        # matched records are not added
+        assert index.match([]) == []
+        assert len(index.columns) == 3
+        index.close()
+
+    def test_numeric_keys(self, tmp_path):
+        # equal numbers of different types are the same key, as in memory
+        numeric_records = [
+            {"id": 1.0, "title": "this is a duplicate title"},
+            {"id": 2, "title": "this is unique"},
+            {"id": True, "title": "another title"},
+            {"id": 1, "title": "THIS IS A DUPLICATE TITLE!"},
+            {"id": 2.0, "title": "yet another title"},
+            {"id": 2.5, "title": "this is a duplicate title"},
+        ]
+        path = tmp_path / "index.db"
+        index = SqliteDeduperIndex(IdAndTitleDeduper, path, numeric_records[:3])
+        index.close()
+        index = SqliteDeduperIndex(IdAndTitleDeduper, path)
+        index.add(numeric_records[3:])
+        expected = IdAndTitleDeduper.get_duplicates(numeric_records)
+        assert expected == [[numeric_records[0], numeric_records[3]]]
+        assert index.get_duplicates() == expected
+        index.close()